@@ -0,0 +1,221 @@
+import os
+import sys
+import math
+import time
+import logging
+import collections
+import numpy as np
+import OpenGL.GLUT as glut # Criacao de janelas acesso ao teclado
+
+
+logger = logging.getLogger('animacao')
+
+
+def set_swap_interval(intervalo):
+    '''
+    Controla o vsync da janela atual: 0 desliga, 1 sincroniza cada troca de buffers
+    com o refresh do monitor (n > 1: a cada n refreshes).
+    O GLUT nao oferece essa opcao; usa a extensao de swap control da plataforma
+    (GLX EXT/MESA/SGI, WGL ou EGL). Retorna True se o driver aceitou.
+    '''
+    try:
+        if os.environ.get('PYOPENGL_PLATFORM') == 'egl':
+            from OpenGL import EGL
+            return bool(EGL.eglSwapInterval(EGL.eglGetCurrentDisplay(), intervalo))
+
+        if sys.platform.startswith('win'):
+            from OpenGL.WGL.EXT.swap_control import wglSwapIntervalEXT
+            return bool(wglSwapIntervalEXT(intervalo))
+
+        if sys.platform == 'darwin':
+            return False
+
+        from OpenGL import GLX
+        from OpenGL.GLX.EXT.swap_control import glXSwapIntervalEXT
+        from OpenGL.GLX.MESA.swap_control import glXSwapIntervalMESA
+        from OpenGL.GLX.SGI.swap_control import glXSwapIntervalSGI
+
+        if bool(glXSwapIntervalEXT):
+            glXSwapIntervalEXT(GLX.glXGetCurrentDisplay(), GLX.glXGetCurrentDrawable(), intervalo)
+            return True
+        if bool(glXSwapIntervalMESA):
+            return glXSwapIntervalMESA(intervalo) == 0
+        if bool(glXSwapIntervalSGI) and intervalo > 0: # a extensao SGI nao aceita 0
+            return glXSwapIntervalSGI(intervalo) == 0
+    except Exception as erro:
+        logger.warning('Nao foi possivel alterar o swap interval: %s', erro)
+
+    return False
+
+
+class LoopAnimacao:
+    '''
+    Laco de animacao com passo de simulacao fixo, independente da taxa de desenho.
+
+    A cada frame (glutTimerFunc no ritmo de fps_alvo) o tempo real decorrido e
+    acumulado e atualiza(passo) e chamada quantas vezes couberem: a simulacao avanca
+    sempre em passos de "passo" segundos, igual em qualquer maquina ou fps. A fracao
+    que sobra fica em alfa (0 a 1), para interpolar posicoes no desenho. Em seguida
+    a cena e invalidada (redesenho.Agendador.invalida ou glutPostRedisplay).
+
+    Se um frame atrasar muito (janela arrastada, GC, disco), no maximo max_passos passos
+    sao simulados e o restante do tempo e descartado, evitando que o atraso se acumule.
+
+    O ritmo e medido nos frames apresentados, e nao no timer: o display() chama swap() no
+    lugar de glut.glutSwapBuffers(), e o instante apos cada troca de buffers (que espera o
+    vsync, se ativo) e registrado. Frames apresentados mais de meio intervalo depois do
+    previsto sao atrasados, e cada intervalo inteiro sem frame novo e um frame perdido
+    (um frame atrasado tambem conta os intervalos que perdeu). Os intervalos reais entre
+    frames apresentados e o tempo gasto na troca de buffers ficam em janelas para estatisticas.
+
+    Uso:
+        loop = LoopAnimacao(atualiza, agendador.invalida, passo=1/120, fps_alvo=60, vsync=True)
+        loop.start()   # depois de criar a janela, antes do glutMainLoop
+        def display():
+            ...
+            loop.swap()   # no lugar de glut.glutSwapBuffers()
+    '''
+
+    def __init__(self, atualiza, invalida = None, passo = 1.0 / 120.0, fps_alvo = 60, vsync = None,
+                 max_passos = 8, janela = 300, intervalo_log = 600):
+
+        self.atualiza = atualiza
+        self.invalida = invalida if invalida is not None else glut.glutPostRedisplay
+        self.passo = passo
+        self.intervalo = 1.0 / fps_alvo
+        self.vsync = vsync # None: nao altera o swap interval do driver
+        self.max_passos = max_passos
+        self.intervalo_log = intervalo_log # a cada quantos frames uma linha de log e emitida (0 desativa)
+
+        self.ativo = False
+        self.tempo = 0.0 # tempo simulado, em segundos
+        self.acumulador = 0.0
+        self.alfa = 0.0
+        self.ultimo = 0.0
+        self.prazo = 0.0 # instante previsto para o proximo tick do timer
+        self.ultima_apresentacao = None # instante apos a ultima troca de buffers
+
+        # Intervalos reais entre frames apresentados e tempo dentro de glutSwapBuffers, em ms
+        self.intervalos = collections.deque(maxlen=janela)
+        self.tempos_swap = collections.deque(maxlen=janela)
+
+        # ticks: frames simulados pelo timer, frames: frames apresentados (swap), passos: atualiza()
+        # chamadas, atrasados/perdidos: ver acima, descartado: segundos de atraso nao simulados
+        # (limite max_passos)
+        self.contador = {'ticks': 0, 'frames': 0, 'passos': 0, 'atrasados': 0, 'perdidos': 0, 'descartado': 0.0}
+
+    def start(self):
+
+        if self.vsync is not None and not set_swap_interval(1 if self.vsync else 0):
+            logger.warning('Controle de vsync indisponivel; usando o padrao do driver.')
+
+        self.ativo = True
+        self.ultimo = self.prazo = time.perf_counter()
+        self.ultima_apresentacao = None
+        glut.glutTimerFunc(0, self._frame, 0)
+
+    def stop(self):
+
+        # O timer ja agendado ainda dispara, mas nao agenda outro
+        self.ativo = False
+
+    def _frame(self, valor):
+
+        if not self.ativo:
+            return
+
+        agora = time.perf_counter()
+
+        # Um timer muito atrasado recomeca o ritmo a partir de agora, em vez de disparar
+        # varios ticks seguidos para alcancar os prazos perdidos
+        if agora - self.prazo >= self.intervalo:
+            self.prazo = agora
+
+        # Simulacao em passos fixos
+        decorrido = agora - self.ultimo
+        limite = self.max_passos * self.passo
+        if decorrido > limite:
+            self.contador['descartado'] += decorrido - limite
+            decorrido = limite
+        self.ultimo = agora
+        self.acumulador += decorrido
+
+        while self.acumulador >= self.passo:
+            self.atualiza(self.passo)
+            self.tempo += self.passo
+            self.acumulador -= self.passo
+            self.contador['passos'] += 1
+
+        self.alfa = self.acumulador / self.passo
+
+        self.invalida()
+        self.contador['ticks'] += 1
+
+        # Proximo frame no proximo prazo, descontando o tempo gasto neste
+        self.prazo += self.intervalo
+        espera = max(0.0, self.prazo - time.perf_counter())
+        glut.glutTimerFunc(math.floor(espera * 1000), self._frame, 0)
+
+    def swap(self):
+        '''
+        Troca os buffers da janela (glut.glutSwapBuffers) e registra o frame apresentado.
+        Deve ser chamada pelo display() no lugar de glut.glutSwapBuffers().
+        '''
+        inicio = time.perf_counter()
+        glut.glutSwapBuffers()
+        agora = time.perf_counter()
+
+        self.tempos_swap.append((agora - inicio) * 1000.0)
+
+        # Redesenhos com o laco parado (exposicao da janela) nao entram no ritmo
+        if not self.ativo:
+            self.ultima_apresentacao = None
+            return
+
+        if self.ultima_apresentacao is not None:
+            decorrido = agora - self.ultima_apresentacao
+            self.intervalos.append(decorrido * 1000.0)
+
+            if decorrido - self.intervalo > self.intervalo / 2:
+                self.contador['atrasados'] += 1
+            self.contador['perdidos'] += max(0, round(decorrido / self.intervalo) - 1)
+
+        self.ultima_apresentacao = agora
+        self.contador['frames'] += 1
+
+        if self.intervalo_log and self.contador['frames'] % self.intervalo_log == 0:
+            self.log()
+
+    def estatisticas(self):
+        '''
+        Retorna os contadores, min/media/p95/p99 (em ms) dos intervalos entre frames
+        apresentados e media/p95 (em ms) do tempo dentro de glutSwapBuffers.
+        '''
+        resultado = dict(self.contador)
+        resultado['fps_alvo'] = 1.0 / self.intervalo
+
+        if self.intervalos:
+            t = np.fromiter(self.intervalos, dtype=np.float64)
+            p95, p99 = np.percentile(t, [95, 99])
+            resultado['intervalo'] = {'min': float(t.min()), 'media': float(t.mean()), 'p95': float(p95), 'p99': float(p99)}
+        else:
+            resultado['intervalo'] = None
+
+        if self.tempos_swap:
+            t = np.fromiter(self.tempos_swap, dtype=np.float64)
+            resultado['swap'] = {'media': float(t.mean()), 'p95': float(np.percentile(t, 95))}
+        else:
+            resultado['swap'] = None
+
+        return resultado
+
+    def log(self):
+
+        est = self.estatisticas()
+        intervalo = est['intervalo']
+        if intervalo is None:
+            return
+
+        logger.info('frame %d | intervalo min %.3f media %.3f p95 %.3f p99 %.3f ms | swap media %.3f ms | atrasados %d | perdidos %d',
+                    est['frames'], intervalo['min'], intervalo['media'], intervalo['p95'], intervalo['p99'],
+                    est['swap']['media'], est['atrasados'], est['perdidos'])
@@ -0,0 +1,188 @@
+import os
+import struct
+import numpy as np
+import OpenGL.GL as gl # Funcoes da API OpenGL
+import formas
+import upload
+import estado_gl
+import layout_vertice
+
+
+# Formato binario de malha (little-endian):
+#   cabecalho   : assinatura, versao, quant_atributos, floats_por_vertice, bytes_indice (0, 2 ou 4),
+#                 quant_vertices, quant_indices, inicio dos vertices e inicio dos indices (em bytes)
+#   layout      : quant_atributos x (nome ASCII com 16 bytes, quantidade de componentes)
+#   vertices    : quant_vertices x floats_por_vertice float32, atributos intercalados na ordem do layout
+#   indices     : quant_indices uint16/uint32
+# Vertices e indices comecam em posicoes alinhadas, para serem lidos diretamente com np.memmap.
+assinatura = b'CGMALHA\0'
+versao = 1
+cabecalho = struct.Struct('<8sIIIIQQQQ')
+descritor_atributo = struct.Struct('<16sI')
+alinhamento = 64
+
+# bytes_indice -> (dtype NumPy, tipo OpenGL)
+tipos_indice = {2: (np.uint16, gl.GL_UNSIGNED_SHORT), 4: (np.uint32, gl.GL_UNSIGNED_INT)}
+
+
+class MalhaArquivo:
+    '''
+    Malha lida de um arquivo binario. vertices e indices sao np.memmap: os dados so
+    sao lidos do disco quando acessados (ou enviados para a GPU), sem objetos Python
+    intermediarios.
+        layout: tupla de (nome, componentes), na ordem em que estao intercalados
+        vertices: (quant_vertices, floats_por_vertice) float32
+        indices: (quant_indices,) uint16/uint32, ou None
+    '''
+
+    def __init__(self, layout, vertices, indices):
+
+        self.layout = layout
+        self.vertices = vertices
+        self.indices = indices
+
+    @property
+    def tipo_indice(self):
+
+        return tipos_indice[self.indices.dtype.itemsize][1] if self.indices is not None else None
+
+
+def _alinha(posicao):
+
+    return -(-posicao // alinhamento) * alinhamento
+
+
+def write_malha(caminho, vertices, indices = None, layout = (('position', 3),)):
+    '''
+    Grava a malha no formato binario.
+        vertices: (quant_vertices, floats_por_vertice), atributos intercalados na ordem do layout
+        indices: opcional; gravados como uint16 quando todos os vertices cabem em 16 bits
+        layout: (nome, componentes) de cada atributo, e.g. (('position', 3), ('cor', 4));
+            nomes ASCII de ate 16 bytes
+    Uma malha sem vertices (ou sem indices) e gravada normalmente e lida como arrays vazios.
+    '''
+    nomes = []
+    for nome, _ in layout:
+        codificado = nome.encode('ascii')
+        if len(codificado) > descritor_atributo.size - 4:
+            raise ValueError(f'Nome de atributo com mais de {descritor_atributo.size - 4} bytes = {nome}.')
+        nomes.append(codificado)
+
+    floats_por_vertice = sum(componentes for _, componentes in layout)
+    vertices = upload.as_array(vertices).reshape(-1, floats_por_vertice)
+
+    bytes_indice = 0
+    if indices is not None:
+        indices = upload.as_array(indices, formas.index_dtype(len(vertices))).ravel()
+        bytes_indice = indices.dtype.itemsize
+
+    inicio_vertices = _alinha(cabecalho.size + descritor_atributo.size * len(layout))
+    inicio_indices = _alinha(inicio_vertices + vertices.nbytes)
+
+    # Grava em um arquivo temporario e renomeia: o arquivo nunca fica pela metade
+    temporario = caminho + '.tmp'
+    try:
+        with open(temporario, 'wb') as arquivo:
+            arquivo.write(cabecalho.pack(assinatura, versao, len(layout), floats_por_vertice, bytes_indice,
+                                         len(vertices), len(indices) if indices is not None else 0,
+                                         inicio_vertices, inicio_indices))
+            for nome, (_, componentes) in zip(nomes, layout):
+                arquivo.write(descritor_atributo.pack(nome, componentes))
+
+            # tofile escreve direto da memoria do array, sem conversao
+            arquivo.seek(inicio_vertices)
+            vertices.tofile(arquivo)
+            if indices is not None:
+                arquivo.seek(inicio_indices)
+                indices.tofile(arquivo)
+            # seek nao aumenta o arquivo: sem vertices ou indices, completa ate o fim declarado
+            arquivo.truncate(inicio_indices + indices.nbytes if indices is not None else inicio_vertices + vertices.nbytes)
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+def load_malha(caminho):
+    '''
+    Le o cabecalho e mapeia vertices e indices do arquivo com np.memmap.
+    Retorna um MalhaArquivo.
+    '''
+    with open(caminho, 'rb') as arquivo:
+        dados = arquivo.read(cabecalho.size)
+        if len(dados) < cabecalho.size:
+            raise ValueError(f'{caminho}: arquivo de malha truncado.')
+
+        (marca, versao_arquivo, quant_atributos, floats_por_vertice, bytes_indice,
+         quant_vertices, quant_indices, inicio_vertices, inicio_indices) = cabecalho.unpack(dados)
+
+        if marca != assinatura:
+            raise ValueError(f'{caminho}: nao e um arquivo de malha.')
+        if versao_arquivo != versao:
+            raise ValueError(f'{caminho}: versao {versao_arquivo} do formato de malha nao suportada.')
+        if bytes_indice not in (0,) + tuple(tipos_indice):
+            raise ValueError(f'{caminho}: tipo de indice invalido ({bytes_indice} bytes).')
+
+        layout = []
+        for _ in range(quant_atributos):
+            nome, componentes = descritor_atributo.unpack(arquivo.read(descritor_atributo.size))
+            layout.append((nome.rstrip(b'\0').decode('ascii'), componentes))
+
+    if sum(componentes for _, componentes in layout) != floats_por_vertice:
+        raise ValueError(f'{caminho}: layout nao corresponde ao tamanho dos vertices.')
+
+    fim = inicio_indices + quant_indices * bytes_indice if bytes_indice else inicio_vertices + quant_vertices * floats_por_vertice * 4
+    if os.path.getsize(caminho) < fim:
+        raise ValueError(f'{caminho}: arquivo de malha truncado.')
+
+    # np.memmap nao mapeia 0 bytes: malhas vazias usam arrays vazios
+    if quant_vertices and floats_por_vertice:
+        vertices = np.memmap(caminho, dtype=np.float32, mode='r', offset=inicio_vertices, shape=(quant_vertices, floats_por_vertice))
+    else:
+        vertices = np.empty((quant_vertices, floats_por_vertice), dtype=np.float32)
+
+    indices = None
+    if bytes_indice and not quant_indices:
+        indices = np.empty(0, dtype=tipos_indice[bytes_indice][0])
+    elif bytes_indice:
+        indices = np.memmap(caminho, dtype=tipos_indice[bytes_indice][0], mode='r', offset=inicio_indices, shape=(quant_indices,))
+
+    return MalhaArquivo(tuple(layout), vertices, indices)
+
+
+def upload_malha(malha, program_ref):
+    '''
+    Cria VAO, VBO e EBO para a malha e associa cada atributo do layout a variavel de
+    mesmo nome no shader (atributos que o shader nao declara sao ignorados).
+    Os dados vao do np.memmap direto para glBufferData: o driver le as paginas do arquivo.
+    Retorna (VAO, VBO, EBO ou None, quant_elementos, tipo_indice_gl ou None), prontos para:
+        estado_gl.bind_vertex_array(VAO)
+        gl.glDrawElements(gl.GL_TRIANGLES, quant_elementos, tipo_indice_gl, None)
+    ou, sem indices, gl.glDrawArrays(gl.GL_TRIANGLES, 0, quant_elementos).
+    '''
+    # Layout do arquivo: atributos float intercalados na ordem gravada
+    formato = layout_vertice.get_layout((nome, layout_vertice.tipo_float(componentes)) for nome, componentes in malha.layout)
+
+    VAO = estado_gl.gen_vertex_arrays(1)
+    estado_gl.bind_vertex_array(VAO)
+
+    VBO = estado_gl.gen_buffers(1)
+    estado_gl.bind_buffer(gl.GL_ARRAY_BUFFER, VBO)
+    upload.buffer_data(gl.GL_ARRAY_BUFFER, malha.vertices, gl.GL_STATIC_DRAW)
+    formato.configura(program_ref, VBO, obrigatorio=False)
+
+    # O EBO fica registrado no VAO
+    EBO = None
+    quant_elementos = len(malha.vertices)
+    if malha.indices is not None:
+        EBO = estado_gl.gen_buffers(1)
+        estado_gl.bind_buffer(gl.GL_ELEMENT_ARRAY_BUFFER, EBO)
+        upload.buffer_data(gl.GL_ELEMENT_ARRAY_BUFFER, malha.indices, gl.GL_STATIC_DRAW, dtype=malha.indices.dtype)
+        quant_elementos = len(malha.indices)
+
+    estado_gl.bind_vertex_array(0) # Importante: Unbind do VAO primeiro
+    estado_gl.bind_buffer(gl.GL_ARRAY_BUFFER, 0)
+    estado_gl.bind_buffer(gl.GL_ELEMENT_ARRAY_BUFFER, 0)
+
+    return VAO, VBO, EBO, quant_elementos, malha.tipo_indice
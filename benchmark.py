@@ -0,0 +1,245 @@
+import os
+import sys
+import json
+import time
+import platform
+import resource
+import argparse
+import subprocess
+
+import offscreen # Deve ser importado antes de OpenGL (seleciona a plataforma EGL/OSMesa)
+import OpenGL.GL as gl # Funcoes da API OpenGL
+import upload
+import estado_gl
+import motor
+
+
+# Funcoes OpenGL contadas como chamadas de desenho
+funcoes_desenho = ['glDrawArrays', 'glDrawElements', 'glMultiDrawArrays', 'glMultiDrawElements',
+                   'glDrawArraysInstanced', 'glDrawElementsInstanced']
+
+# Funcoes OpenGL que criam objetos: nome -> tipo de objeto
+funcoes_criacao = {'glGenBuffers': 'buffers', 'glGenVertexArrays': 'vaos'}
+
+
+class ContadorGL:
+    '''
+    Conta chamadas de desenho e objetos OpenGL criados substituindo temporariamente
+    as funcoes do modulo OpenGL.GL. As cenas chamam gl.<funcao> em tempo de execucao,
+    entao passam a usar as versoes contadas sem nenhuma alteracao.
+    '''
+
+    def __init__(self):
+        self.originais = {}
+        self.zera()
+
+    def zera(self):
+        self.desenhos = 0
+        self.objetos = {tipo: 0 for tipo in funcoes_criacao.values()}
+
+    def install(self):
+
+        for nome in funcoes_desenho:
+            if hasattr(gl, nome):
+                self.originais[nome] = getattr(gl, nome)
+                setattr(gl, nome, self._conta_desenho(self.originais[nome]))
+
+        for nome, tipo in funcoes_criacao.items():
+            self.originais[nome] = getattr(gl, nome)
+            setattr(gl, nome, self._conta_criacao(self.originais[nome], tipo))
+
+    def uninstall(self):
+
+        for nome, funcao in self.originais.items():
+            setattr(gl, nome, funcao)
+        self.originais = {}
+
+    def _conta_desenho(self, funcao):
+        def desenho(*args, **kwargs):
+            self.desenhos += 1
+            return funcao(*args, **kwargs)
+        return desenho
+
+    def _conta_criacao(self, funcao, tipo):
+        def criacao(n, *args, **kwargs):
+            self.objetos[tipo] += n
+            return funcao(n, *args, **kwargs)
+        return criacao
+
+
+def run_cena(cena, largura, altura, frames, aquecimento):
+    '''
+    Executa uma cena sem janela no processo atual e retorna o resultado da medicao.
+    '''
+    cena_carregada = offscreen.load_cena(cena)
+    contexto = offscreen.ContextoOffscreen(largura, altura)
+    contador = ContadorGL()
+    contador.install()
+    upload.zera_contador()
+
+    try:
+        # Inicializacao e frames de aquecimento (envio de dados, compilacao de shaders)
+        cena_carregada.init_scene()
+        for _ in range(aquecimento):
+            cena_carregada.render()
+        gl.glFinish()
+
+        objetos_inicio = dict(contador.objetos)
+        estado_inicio = dict(estado_gl.contador)
+        contador.desenhos = 0
+
+        inicio = time.perf_counter()
+        for _ in range(frames):
+            cena_carregada.render()
+        gl.glFinish() # inclui no tempo o trabalho pendente na GPU
+        duracao = time.perf_counter() - inicio
+
+        resultado = {
+            'cena': cena,
+            'largura': largura,
+            'altura': altura,
+            'frames': frames,
+            'aquecimento': aquecimento,
+            'segundos': duracao,
+            'fps': frames / duracao if duracao > 0 else None,
+            'desenhos_por_frame': contador.desenhos / frames,
+            'buffers_criados': contador.objetos['buffers'],
+            'vaos_criados': contador.objetos['vaos'],
+            'buffers_por_frame': (contador.objetos['buffers'] - objetos_inicio['buffers']) / frames,
+            'vaos_por_frame': (contador.objetos['vaos'] - objetos_inicio['vaos']) / frames,
+            # Vinculos (glUseProgram, glBindVertexArray, ...) enviados e evitados pelo estado_gl
+            'vinculos_por_frame': (estado_gl.contador['chamadas'] - estado_inicio['chamadas']) / frames,
+            'vinculos_elididos_por_frame': (estado_gl.contador['elididas'] - estado_inicio['elididas']) / frames,
+            # Buffers e VAOs criados por estado_gl.gen_* durante os frames medidos (deve ser 0)
+            'alocacoes_por_frame': (estado_gl.contador['alocacoes'] - estado_inicio['alocacoes']) / frames,
+            # Bytes enviados para a GPU e bytes convertidos antes do envio (ver upload.py)
+            'bytes_enviados': upload.contador['bytes_enviados'],
+            'bytes_copiados': upload.contador['bytes_copiados'],
+            # ru_maxrss e informado em KB no Linux
+            'pico_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            'renderer': gl.glGetString(gl.GL_RENDERER).decode(),
+            'versao_opengl': gl.glGetString(gl.GL_VERSION).decode(),
+        }
+    finally:
+        contador.uninstall()
+        contexto.destroy()
+
+    return resultado
+
+
+def run_subprocesso(cena, largura, altura, frames, aquecimento, software):
+    '''
+    Executa cada medicao em um processo novo, para que o pico de memoria (RSS)
+    e os caches de cada cena nao interfiram nas demais.
+    '''
+    env = dict(os.environ)
+    if software:
+        # Forca o rasterizador em CPU do Mesa (llvmpipe)
+        env['LIBGL_ALWAYS_SOFTWARE'] = '1'
+        env['GALLIUM_DRIVER'] = 'llvmpipe'
+
+    comando = [sys.executable, os.path.abspath(__file__), '--executar', cena,
+               '--frames', str(frames), '--aquecimento', str(aquecimento),
+               '--resolucoes', '{}x{}'.format(largura, altura)]
+    processo = subprocess.run(comando, capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+
+    if processo.returncode != 0:
+        raise RuntimeError(f'Falha no benchmark da cena {cena} ({largura}x{altura}):\n{processo.stderr}')
+
+    # A ultima linha da saida e o resultado em JSON
+    return json.loads(processo.stdout.strip().splitlines()[-1])
+
+
+def commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def comparar(base, atual, tolerancia):
+    '''
+    Compara o fps de cada cena/resolucao com uma execucao anterior.
+    Retorna a lista de regressoes acima da tolerancia (e.g. 0.1 = 10% mais lento).
+    '''
+    chave = lambda r: (r['cena'], r['largura'], r['altura'])
+    anteriores = {chave(r): r for r in base['resultados']}
+    regressoes = []
+
+    for r in atual['resultados']:
+        anterior = anteriores.get(chave(r))
+        if anterior is None or not anterior['fps'] or not r['fps']:
+            continue
+
+        razao = r['fps'] / anterior['fps']
+        print("{:<20} {:>5}x{:<5} fps {:>10.1f} -> {:>10.1f} ({:+.1f}%)".format(r['cena'], r['largura'], r['altura'], anterior['fps'], r['fps'], (razao - 1) * 100))
+
+        if razao < 1.0 - tolerancia:
+            regressoes.append(r)
+
+    return regressoes
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Benchmark sem janela das cenas de exemplo.')
+    parser.add_argument('--cenas', nargs='+', default=offscreen.cenas,
+                        help='cenas de exemplo ({}) ou arquivos de cena .json/.toml'.format(', '.join(offscreen.cenas)))
+    parser.add_argument('--resolucoes', nargs='+', default=['400x400', '1920x1080'], help='lista LARGURAxALTURA')
+    parser.add_argument('--frames', type=int, default=500)
+    parser.add_argument('--aquecimento', type=int, default=10)
+    parser.add_argument('--software', action='store_true', help='forca o Mesa llvmpipe')
+    parser.add_argument('--saida', default=None, help='arquivo JSON com os resultados')
+    parser.add_argument('--comparar', default=None, help='JSON de uma execucao anterior')
+    parser.add_argument('--tolerancia', type=float, default=0.10, help='queda de fps aceita na comparacao')
+    parser.add_argument('--executar', default=None, help=argparse.SUPPRESS) # uso interno: uma medicao
+    args = parser.parse_args()
+
+    resolucoes = [tuple(int(v) for v in r.lower().split('x')) for r in args.resolucoes]
+
+    if args.executar:
+        largura, altura = resolucoes[0]
+        print(json.dumps(run_cena(args.executar, largura, altura, args.frames, args.aquecimento)))
+        return 0
+
+    for cena in args.cenas:
+        if cena not in offscreen.cenas and not motor.eh_arquivo_cena(cena):
+            parser.error('cena desconhecida: {}'.format(cena))
+
+    resultados = []
+    for cena in args.cenas:
+        # Cada medicao roda com o diretorio do benchmark como diretorio atual
+        caminho = os.path.abspath(cena) if motor.eh_arquivo_cena(cena) else cena
+        for largura, altura in resolucoes:
+            r = run_subprocesso(caminho, largura, altura, args.frames, args.aquecimento, args.software)
+            r['cena'] = cena
+            resultados.append(r)
+            print("{:<20} {:>5}x{:<5} fps {:>10.1f} | desenhos/frame {:>4.1f} | buffers {:>3} | vaos {:>3} | pico RSS {} KB".format(
+                cena, largura, altura, r['fps'], r['desenhos_por_frame'], r['buffers_criados'], r['vaos_criados'], r['pico_rss_kb']))
+
+    relatorio = {
+        'commit': commit_atual(),
+        'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'resultados': resultados,
+    }
+
+    if args.saida:
+        with open(args.saida, 'w') as arquivo:
+            json.dump(relatorio, arquivo, indent=2)
+
+    if args.comparar:
+        with open(args.comparar) as arquivo:
+            base = json.load(arquivo)
+        regressoes = comparar(base, relatorio, args.tolerancia)
+        if regressoes:
+            print("{} regressao(oes) de desempenho acima de {:.0f}%".format(len(regressoes), args.tolerancia * 100))
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
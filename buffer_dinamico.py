@@ -0,0 +1,193 @@
+import ctypes
+import numpy as np
+import OpenGL.GL as gl # Funcoes da API OpenGL
+import upload
+import estado_gl
+import layout_vertice
+
+
+# Flags do mapeamento persistente: a CPU escreve enquanto a GPU le outras regioes do mesmo buffer
+flags_persistente = gl.GL_MAP_WRITE_BIT | gl.GL_MAP_PERSISTENT_BIT | gl.GL_MAP_COHERENT_BIT
+
+# Flags do mapeamento de uma regiao no modo orphaning: sem sincronizacao com a GPU
+flags_orphaning = gl.GL_MAP_WRITE_BIT | gl.GL_MAP_INVALIDATE_RANGE_BIT | gl.GL_MAP_UNSYNCHRONIZED_BIT
+
+
+def suporta_buffer_storage():
+    '''
+    Verifica se o contexto oferece glBufferStorage (OpenGL 4.4 ou GL_ARB_buffer_storage).
+    '''
+    if not bool(gl.glBufferStorage):
+        return False
+
+    versao = (gl.glGetIntegerv(gl.GL_MAJOR_VERSION), gl.glGetIntegerv(gl.GL_MINOR_VERSION))
+    if versao >= (4, 4):
+        return True
+
+    quant = gl.glGetIntegerv(gl.GL_NUM_EXTENSIONS)
+    return any(gl.glGetStringi(gl.GL_EXTENSIONS, i) == b'GL_ARB_buffer_storage' for i in range(quant))
+
+
+class BufferDinamico:
+    '''
+    VBO para vertices que mudam a cada frame (formas animadas), dividido em
+    quant_frames regioes usadas em rodizio (ring buffer). Enquanto a GPU ainda
+    desenha com a regiao do frame N - 1, a CPU ja escreve a do frame N no mesmo
+    buffer, sem nova alocacao e sem esperar a GPU.
+
+    Dois modos:
+        persistente: glBufferStorage + glMapBufferRange(GL_MAP_PERSISTENT_BIT), mapeado
+                     uma unica vez. Cada regiao e protegida por um glFenceSync criado
+                     depois dos desenhos que a usam (fence()); so ha espera se a GPU
+                     estiver quant_frames frames atrasada.
+        orphaning:   quando o rodizio volta a primeira regiao, glBufferData(None) descarta
+                     o armazenamento antigo (o driver o mantem ate a GPU terminar de usa-lo)
+                     e as regioes sao escritas com GL_MAP_UNSYNCHRONIZED_BIT.
+    Por padrao usa o modo persistente quando o driver oferece glBufferStorage.
+
+    As regioes tem o tamanho de max_vertices vertices, entao os atributos apontam
+    sempre para o inicio do buffer e cada frame desenha a partir de um primeiro vertice:
+
+    Uso:
+        hexagono = BufferDinamico(max_vertices=6)
+        estado_gl.bind_vertex_array(VAO)
+        hexagono.attrib(shaderProgramRef, 'position')   # uma vez, com o VAO vinculado
+
+        # a cada frame
+        primeiro = hexagono.update(vertices)
+        estado_gl.bind_vertex_array(VAO)
+        gl.glDrawArrays(gl.GL_LINE_LOOP, primeiro, len(vertices))
+        hexagono.fence()   # depois dos desenhos que usam os vertices deste frame
+    '''
+
+    def __init__(self, max_vertices, componentes = 3, quant_frames = 3, persistente = None):
+
+        if persistente is None:
+            persistente = suporta_buffer_storage()
+
+        self.max_vertices = max_vertices
+        self.componentes = componentes
+        self.quant_frames = quant_frames
+        self.persistente = persistente
+
+        self.tamanho_regiao = max_vertices * componentes * 4 # float32: 4 bytes por componente
+        self.tamanho = self.tamanho_regiao * quant_frames
+        self.regiao = quant_frames - 1 # o primeiro update() usa a regiao 0
+
+        # Fence de cada regiao (modo persistente): sinalizada quando a GPU termina de le-la
+        self.fences = [None] * quant_frames
+
+        # escritas: chamadas de update(), bytes: bytes escritos,
+        # esperas: updates que aguardaram a GPU liberar a regiao, orfaos: glBufferData(None) chamadas
+        self.contador = {'escritas': 0, 'bytes': 0, 'esperas': 0, 'orfaos': 0}
+
+        self.VBO = estado_gl.gen_buffers(1)
+        estado_gl.bind_buffer(gl.GL_ARRAY_BUFFER, self.VBO)
+
+        self.mapa = None
+        if persistente:
+            # Armazenamento imutavel, mapeado durante toda a vida do buffer
+            gl.glBufferStorage(gl.GL_ARRAY_BUFFER, self.tamanho, None, flags_persistente)
+            endereco = gl.glMapBufferRange(gl.GL_ARRAY_BUFFER, 0, self.tamanho, flags_persistente)
+            self.mapa = np.ctypeslib.as_array((ctypes.c_ubyte * self.tamanho).from_address(endereco))
+        else:
+            gl.glBufferData(gl.GL_ARRAY_BUFFER, self.tamanho, None, gl.GL_STREAM_DRAW)
+
+        estado_gl.bind_buffer(gl.GL_ARRAY_BUFFER, 0)
+
+    def attrib(self, program_ref, var_in_program):
+        '''
+        Associa o buffer a variavel do shader no VAO atualmente vinculado.
+        '''
+        formato = layout_vertice.get_layout(((var_in_program, layout_vertice.tipo_float(self.componentes)),))
+        formato.configura(program_ref, self.VBO)
+        estado_gl.bind_buffer(gl.GL_ARRAY_BUFFER, 0)
+
+    def update(self, vertices):
+        '''
+        Escreve os vertices do frame na proxima regiao do rodizio.
+        Retorna o indice do primeiro vertice, para glDrawArrays(modo, primeiro, quant)
+        ou glDrawElementsBaseVertex(..., primeiro).
+        '''
+        dados = upload.as_array(vertices).reshape(-1, self.componentes)
+
+        if len(dados) > self.max_vertices:
+            raise ValueError(f'{len(dados)} vertices nao cabem no buffer dinamico (maximo {self.max_vertices}).')
+
+        self.regiao = (self.regiao + 1) % self.quant_frames
+        inicio = self.regiao * self.tamanho_regiao
+
+        if self.persistente:
+            self._espera(self.regiao)
+            self.mapa[inicio:inicio + dados.nbytes] = dados.view(np.uint8).ravel()
+        else:
+            estado_gl.bind_buffer(gl.GL_ARRAY_BUFFER, self.VBO)
+
+            if self.regiao == 0:
+                # Orphaning: novo armazenamento, o antigo continua valido para os desenhos pendentes
+                gl.glBufferData(gl.GL_ARRAY_BUFFER, self.tamanho, None, gl.GL_STREAM_DRAW)
+                self.contador['orfaos'] += 1
+
+            if dados.nbytes:
+                endereco = gl.glMapBufferRange(gl.GL_ARRAY_BUFFER, inicio, dados.nbytes, flags_orphaning)
+                ctypes.memmove(endereco, dados.ctypes.data, dados.nbytes)
+                if not gl.glUnmapBuffer(gl.GL_ARRAY_BUFFER):
+                    # Conteudo perdido durante o mapeamento (e.g. troca de modo de video): reenvia
+                    gl.glBufferSubData(gl.GL_ARRAY_BUFFER, inicio, dados.nbytes, dados)
+
+            estado_gl.bind_buffer(gl.GL_ARRAY_BUFFER, 0)
+
+        upload.contador['bytes_enviados'] += dados.nbytes
+        self.contador['escritas'] += 1
+        self.contador['bytes'] += dados.nbytes
+
+        return self.regiao * self.max_vertices
+
+    def fence(self):
+        '''
+        Marca o fim dos desenhos que usam a regiao escrita no ultimo update().
+        No modo orphaning nao faz nada.
+        '''
+        if not self.persistente:
+            return
+
+        if self.fences[self.regiao] is not None:
+            gl.glDeleteSync(self.fences[self.regiao])
+        self.fences[self.regiao] = gl.glFenceSync(gl.GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+
+    def _espera(self, regiao):
+        '''
+        Aguarda a GPU terminar os desenhos que ainda leem a regiao.
+        '''
+        fence = self.fences[regiao]
+        if fence is None:
+            return
+
+        # Timeout zero: apenas consulta. Normalmente a fence ja foi sinalizada
+        status = gl.glClientWaitSync(fence, gl.GL_SYNC_FLUSH_COMMANDS_BIT, 0)
+        if status == gl.GL_TIMEOUT_EXPIRED:
+            self.contador['esperas'] += 1
+            while status == gl.GL_TIMEOUT_EXPIRED:
+                status = gl.glClientWaitSync(fence, gl.GL_SYNC_FLUSH_COMMANDS_BIT, 1000000) # 1 ms
+
+        if status == gl.GL_WAIT_FAILED:
+            raise RuntimeError('glClientWaitSync falhou ao aguardar o buffer dinamico.')
+
+        gl.glDeleteSync(fence)
+        self.fences[regiao] = None
+
+    def delete(self):
+
+        for fence in self.fences:
+            if fence is not None:
+                gl.glDeleteSync(fence)
+        self.fences = [None] * self.quant_frames
+
+        if self.mapa is not None:
+            estado_gl.bind_buffer(gl.GL_ARRAY_BUFFER, self.VBO)
+            gl.glUnmapBuffer(gl.GL_ARRAY_BUFFER)
+            estado_gl.bind_buffer(gl.GL_ARRAY_BUFFER, 0)
+            self.mapa = None
+
+        estado_gl.delete_buffers([self.VBO])
+        self.VBO = None
@@ -0,0 +1,133 @@
+import os
+import ctypes
+import hashlib
+import logging
+import OpenGL.GL as gl # Funcoes da API OpenGL
+from OpenGL.error import GLError
+
+
+logger = logging.getLogger('cache_shader')
+
+# Diretorio onde os programas ja linkados sao armazenados
+# Pode ser alterado pela variavel de ambiente CG_SHADER_CACHE
+diretorio_cache = os.environ.get('CG_SHADER_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'computacao-grafica', 'shaders'))
+
+# Quantidade de programas recuperados do cache (hits), compilados (misses)
+# e binarios recusados pelo driver (rejeitados)
+contador = {'hits': 0, 'misses': 0, 'rejeitados': 0}
+
+
+def suporta_program_binary():
+    '''
+    Verifica se o driver oferece ao menos um formato de binario de programa.
+    '''
+    return gl.glGetIntegerv(gl.GL_NUM_PROGRAM_BINARY_FORMATS) > 0
+
+
+def chave_programa(vertex_shader_codigo, fragment_shader_codigo, glsl_version_str = ''):
+    '''
+    Gera a chave do programa a partir dos codigos fontes, da versao GLSL
+    e do driver (fornecedor, hardware e versao do OpenGL).
+    Um binario so e valido para o mesmo driver que o gerou.
+    '''
+    h = hashlib.sha256()
+
+    for parte in (glsl_version_str, vertex_shader_codigo, fragment_shader_codigo):
+        h.update(parte.encode('utf-8'))
+        h.update(b'\0')
+
+    for nome in (gl.GL_VENDOR, gl.GL_RENDERER, gl.GL_VERSION):
+        h.update(gl.glGetString(nome) or b'')
+        h.update(b'\0')
+
+    return h.hexdigest()
+
+
+def caminho_programa(chave):
+    return os.path.join(diretorio_cache, chave + '.bin')
+
+
+def load_program(chave):
+    '''
+    Retorna um shader program criado a partir do binario armazenado no cache
+    ou None caso o binario nao exista ou seja recusado pelo driver.
+    Nesse caso o programa deve ser compilado normalmente.
+    '''
+    caminho = caminho_programa(chave)
+
+    if not suporta_program_binary() or not os.path.exists(caminho):
+        contador['misses'] += 1
+        return None
+
+    # O cache e apenas uma otimizacao: qualquer falha de leitura volta para a compilacao
+    try:
+        with open(caminho, 'rb') as arquivo:
+            dados = arquivo.read()
+    except OSError as erro:
+        logger.warning('Nao foi possivel ler o cache de shader %s: %s', caminho, erro)
+        contador['misses'] += 1
+        return None
+
+    # Os 4 primeiros bytes guardam o formato do binario informado pelo driver
+    formato = int.from_bytes(dados[:4], 'little')
+    binario = dados[4:]
+
+    shaderProgram = gl.glCreateProgram()
+
+    try:
+        gl.glProgramBinary(shaderProgram, formato, binario, len(binario))
+        sucesso_linking = gl.glGetProgramiv(shaderProgram, gl.GL_LINK_STATUS)
+    except GLError:
+        # Formato de binario desconhecido pelo driver atual
+        sucesso_linking = False
+
+    if not sucesso_linking:
+        # Driver atualizado ou binario corrompido: descarta e compila novamente
+        gl.glDeleteProgram(shaderProgram)
+        try:
+            os.remove(caminho)
+        except OSError as erro:
+            # Outro processo pode ter removido (ou substituido) o mesmo arquivo
+            logger.info('Nao foi possivel remover o cache de shader %s: %s', caminho, erro)
+        contador['rejeitados'] += 1
+        contador['misses'] += 1
+        return None
+
+    contador['hits'] += 1
+    return shaderProgram
+
+
+def save_program(chave, shaderProgram):
+    '''
+    Armazena no cache o binario de um programa ja linkado.
+    O programa deve ter sido linkado com GL_PROGRAM_BINARY_RETRIEVABLE_HINT.
+    '''
+    if not suporta_program_binary():
+        return
+
+    tamanho = gl.glGetProgramiv(shaderProgram, gl.GL_PROGRAM_BINARY_LENGTH)
+    if tamanho <= 0:
+        return
+
+    binario = (ctypes.c_ubyte * tamanho)()
+    tamanho_lido = gl.GLsizei(0)
+    formato = gl.GLenum(0)
+    gl.glGetProgramBinary(shaderProgram, tamanho, ctypes.byref(tamanho_lido), ctypes.byref(formato), binario)
+
+    # Escreve em arquivo temporario e renomeia, evitando que outro processo
+    # leia um binario pela metade
+    caminho = caminho_programa(chave)
+    caminho_tmp = '{}.{}.tmp'.format(caminho, os.getpid())
+    try:
+        os.makedirs(diretorio_cache, exist_ok=True)
+        with open(caminho_tmp, 'wb') as arquivo:
+            arquivo.write(int(formato.value).to_bytes(4, 'little'))
+            arquivo.write(bytes(binario)[:tamanho_lido.value])
+        os.replace(caminho_tmp, caminho)
+    except OSError as erro:
+        # Diretorio sem permissao de escrita ou disco cheio: o programa segue sem cache
+        logger.warning('Nao foi possivel gravar o cache de shader %s: %s', caminho, erro)
+        try:
+            os.remove(caminho_tmp)
+        except OSError:
+            pass
@@ -0,0 +1,233 @@
+import os
+import time
+import zlib
+import ctypes
+import struct
+import collections
+import concurrent.futures
+import numpy as np
+import OpenGL.GL as gl # Funcoes da API OpenGL
+import estado_gl
+
+
+# Frames entre a leitura para um PBO e o mapeamento desse PBO: o frame N mapeia o
+# PBO lido no frame N - 2, quando a GPU ja terminou a copia e o mapeamento nao espera
+atraso_mapeamento = 2
+
+# Formatos de arquivo -> extensao
+extensoes = {'png': 'png', 'raw': 'rgba'}
+
+# Espera maxima pela fence de um PBO (ns)
+timeout_fence = 1_000_000_000
+
+
+def codifica_png(imagem, nivel = 1):
+    '''
+    Imagem (altura, largura, 4) uint8, linha de cima primeiro -> bytes de um arquivo PNG RGBA.
+    Apenas com zlib: a compressao libera o GIL, entao varias imagens podem ser
+    codificadas ao mesmo tempo em threads.
+    '''
+    altura, largura = imagem.shape[:2]
+
+    # Cada linha comeca com o byte do filtro (0: sem filtro)
+    linhas = np.zeros((altura, 1 + largura * 4), dtype=np.uint8)
+    linhas[:, 1:] = imagem.reshape(altura, largura * 4)
+
+    def bloco(tipo, dados):
+        return struct.pack('>I', len(dados)) + tipo + dados + struct.pack('>I', zlib.crc32(tipo + dados))
+
+    return (b'\x89PNG\r\n\x1a\n'
+            + bloco(b'IHDR', struct.pack('>IIBBBBB', largura, altura, 8, 6, 0, 0, 0)) # 8 bits, RGBA
+            + bloco(b'IDAT', zlib.compress(linhas, nivel))
+            + bloco(b'IEND', b''))
+
+
+def salva_imagem(caminho, imagem, formato = 'png', nivel = 1):
+    '''
+    Grava a imagem (altura, largura, 4) uint8 como PNG ou como bytes RGBA sem cabecalho.
+    '''
+    if formato == 'png':
+        dados = codifica_png(imagem, nivel)
+    elif formato == 'raw':
+        dados = np.ascontiguousarray(imagem).tobytes()
+    else:
+        raise ValueError(f'Formato de captura desconhecido = {formato}. Use png ou raw.')
+
+    with open(caminho, 'wb') as arquivo:
+        arquivo.write(dados)
+
+
+class CapturaAssincrona:
+    '''
+    Captura continua de frames sem esperar a GPU.
+
+    Um glReadPixels comum logo apos o display() so retorna quando a GPU termina o frame.
+    Aqui cada captura() le o framebuffer para um pixel buffer object (PBO) de um anel de
+    quant_pbos buffers e retorna imediatamente; a copia acontece na GPU. O PBO lido
+    atraso_mapeamento frames antes (frame N - 2) ja esta pronto: ele e mapeado e a view
+    NumPy da memoria mapeada vai para um pool de threads, que inverte as linhas e grava
+    o arquivo (PNG ou RAW).
+
+    O PBO continua mapeado enquanto a thread codifica e so e desmapeado (na thread do
+    contexto) quando o anel volta a ele: ate quant_pbos - atraso_mapeamento frames podem
+    estar sendo codificados ao mesmo tempo. Por isso o padrao e atraso_mapeamento + threads
+    PBOs, um frame em codificacao por thread. Se as threads nao acompanharem o ritmo dos
+    frames, captura() espera a codificacao desse PBO: o anel limita a memoria usada.
+
+    Uso:
+        captura = CapturaAssincrona(largura, altura, 'frames')
+        def display():
+            ...
+            captura.captura()          # antes do glutSwapBuffers
+            glut.glutSwapBuffers()
+        ...
+        captura.finish()               # grava os frames pendentes
+        captura.destroy()
+    '''
+
+    def __init__(self, largura, altura, diretorio, formato = 'png', quant_pbos = None, threads = None, nivel_png = 1):
+
+        threads = threads or os.cpu_count() or 1
+        if quant_pbos is None:
+            quant_pbos = atraso_mapeamento + threads
+
+        if formato not in extensoes:
+            raise ValueError(f'Formato de captura desconhecido = {formato}. Use png ou raw.')
+        if quant_pbos <= atraso_mapeamento:
+            raise ValueError(f'quant_pbos deve ser maior que {atraso_mapeamento}.')
+
+        self.largura = largura
+        self.altura = altura
+        self.diretorio = diretorio
+        self.formato = formato
+        self.nivel_png = nivel_png
+        self.tamanho = largura * altura * 4
+        self.quant_pbos = quant_pbos
+
+        os.makedirs(diretorio, exist_ok=True)
+
+        self.pbos = estado_gl.gen_buffers(quant_pbos)
+        for pbo in self.pbos:
+            estado_gl.bind_buffer(gl.GL_PIXEL_PACK_BUFFER, int(pbo))
+            gl.glBufferData(gl.GL_PIXEL_PACK_BUFFER, self.tamanho, None, gl.GL_STREAM_READ)
+        estado_gl.bind_buffer(gl.GL_PIXEL_PACK_BUFFER, 0)
+
+        # Estado de cada PBO do anel
+        self.frame_pbo = [None] * quant_pbos  # frame lido para o PBO (None: livre)
+        self.fences = [None] * quant_pbos     # fence inserida apos o glReadPixels
+        self.futuros = [None] * quant_pbos    # codificacao em andamento (PBO mapeado)
+
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=threads)
+        self.frames = 0
+
+        # Tempos em milissegundos: captura() no frame, espera pela GPU e pelas threads, codificacao
+        self.tempos_captura = collections.deque(maxlen=300)
+        self.tempos_codificacao = collections.deque(maxlen=300)
+        self.espera_gpu = 0.0
+        self.espera_threads = 0.0
+
+    def _caminho(self, frame):
+
+        return os.path.join(self.diretorio, 'frame_{:06d}.{}'.format(frame, extensoes[self.formato]))
+
+    def _codifica(self, view, frame):
+        '''
+        Executada no pool de threads: a view aponta para o PBO mapeado, de baixo para cima.
+        '''
+        inicio = time.perf_counter()
+        imagem = np.flipud(view.reshape(self.altura, self.largura, 4))
+        salva_imagem(self._caminho(frame), imagem, self.formato, self.nivel_png)
+        self.tempos_codificacao.append((time.perf_counter() - inicio) * 1000.0)
+
+    def _libera(self, i):
+        '''
+        Espera a codificacao do PBO i (se houver) e o desmapeia.
+        '''
+        if self.futuros[i] is None:
+            return
+
+        inicio = time.perf_counter()
+        futuro, self.futuros[i] = self.futuros[i], None
+        try:
+            futuro.result() # erros das threads sao relancados aqui
+        finally:
+            self.espera_threads += (time.perf_counter() - inicio) * 1000.0
+            estado_gl.bind_buffer(gl.GL_PIXEL_PACK_BUFFER, int(self.pbos[i]))
+            gl.glUnmapBuffer(gl.GL_PIXEL_PACK_BUFFER)
+
+    def _mapeia(self, i):
+        '''
+        Mapeia o PBO i, ja lido, e entrega a view as threads.
+        '''
+        inicio = time.perf_counter()
+        gl.glClientWaitSync(self.fences[i], gl.GL_SYNC_FLUSH_COMMANDS_BIT, timeout_fence)
+        gl.glDeleteSync(self.fences[i])
+        self.fences[i] = None
+        self.espera_gpu += (time.perf_counter() - inicio) * 1000.0
+
+        estado_gl.bind_buffer(gl.GL_PIXEL_PACK_BUFFER, int(self.pbos[i]))
+        endereco = gl.glMapBufferRange(gl.GL_PIXEL_PACK_BUFFER, 0, self.tamanho, gl.GL_MAP_READ_BIT)
+        view = np.frombuffer((ctypes.c_ubyte * self.tamanho).from_address(endereco), dtype=np.uint8)
+
+        frame, self.frame_pbo[i] = self.frame_pbo[i], None
+        self.futuros[i] = self.executor.submit(self._codifica, view, frame)
+
+    def captura(self):
+        '''
+        Le o framebuffer de leitura atual (a janela, ou o FBO offscreen) para o proximo
+        PBO do anel e envia para as threads o frame lido atraso_mapeamento frames antes.
+        '''
+        inicio = time.perf_counter()
+
+        i = self.frames % self.quant_pbos
+        self._libera(i) # o anel voltou a um PBO que pode estar mapeado
+
+        estado_gl.bind_buffer(gl.GL_PIXEL_PACK_BUFFER, int(self.pbos[i]))
+        gl.glPixelStorei(gl.GL_PACK_ALIGNMENT, 1)
+        gl.glReadPixels(0, 0, self.largura, self.altura, gl.GL_RGBA, gl.GL_UNSIGNED_BYTE, ctypes.c_void_p(0))
+        self.fences[i] = gl.glFenceSync(gl.GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+        self.frame_pbo[i] = self.frames
+
+        anterior = (self.frames - atraso_mapeamento) % self.quant_pbos
+        if self.frame_pbo[anterior] is not None:
+            self._mapeia(anterior)
+
+        # Os demais buffers de pixels (glTexImage2D, glReadPixels comum) nao usam o PBO
+        estado_gl.bind_buffer(gl.GL_PIXEL_PACK_BUFFER, 0)
+
+        self.frames += 1
+        self.tempos_captura.append((time.perf_counter() - inicio) * 1000.0)
+
+    def finish(self):
+        '''
+        Mapeia os PBOs ainda nao lidos, na ordem dos frames, e espera todos os arquivos.
+        '''
+        pendentes = sorted((frame, i) for i, frame in enumerate(self.frame_pbo) if frame is not None)
+        for _, i in pendentes:
+            self._mapeia(i)
+        for i in range(self.quant_pbos):
+            self._libera(i)
+        estado_gl.bind_buffer(gl.GL_PIXEL_PACK_BUFFER, 0)
+
+    def estatisticas(self):
+        '''
+        Media e p95 (em ms) do tempo gasto em captura() no frame e da codificacao nas
+        threads, e o total de espera pela GPU e pelas threads.
+        '''
+        resultado = {'frames': self.frames, 'espera_gpu': self.espera_gpu, 'espera_threads': self.espera_threads}
+
+        for nome, tempos in (('captura', self.tempos_captura), ('codificacao', self.tempos_codificacao)):
+            if not tempos:
+                resultado[nome] = None
+                continue
+
+            t = np.fromiter(tempos, dtype=np.float64)
+            resultado[nome] = {'media': float(t.mean()), 'p95': float(np.percentile(t, 95))}
+
+        return resultado
+
+    def destroy(self):
+
+        self.finish()
+        self.executor.shutdown()
+        estado_gl.delete_buffers(int(pbo) for pbo in self.pbos)
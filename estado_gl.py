@@ -0,0 +1,180 @@
+import numpy as np
+import OpenGL.GL as gl # Funcoes da API OpenGL
+
+
+# Estado OpenGL vinculado no contexto atual, conforme as chamadas feitas por este modulo.
+# None significa desconhecido: a proxima chamada e sempre enviada ao driver.
+#   programa: glUseProgram, vao: glBindVertexArray
+#   buffers: target -> buffer vinculado (exceto GL_ELEMENT_ARRAY_BUFFER, que pertence ao VAO)
+estado = {'programa': None, 'vao': None, 'buffers': {}}
+
+# Estado guardado em cada VAO: vao -> {'ebo': buffer, 'atributos': {local: habilitado}}
+vaos = {}
+
+# 'chamadas', 'elididas' e 'alocacoes' (buffers e VAOs criados por gen_buffers e
+# gen_vertex_arrays) acumulam desde o inicio do programa,
+# as chaves 'frame_*' sao zeradas a cada chamada de inicio_frame()
+contador = {'chamadas': 0, 'elididas': 0, 'alocacoes': 0,
+            'frame_chamadas': 0, 'frame_elididas': 0, 'frame_alocacoes': 0}
+
+
+def inicio_frame():
+    '''
+    Zera os contadores do frame atual.
+    Deve ser chamada no inicio do display().
+    '''
+    contador['frame_chamadas'] = 0
+    contador['frame_elididas'] = 0
+    contador['frame_alocacoes'] = 0
+
+
+def elididas_frame():
+    '''
+    Retorna quantas chamadas foram evitadas desde o ultimo inicio_frame(),
+    por nao alterarem o estado ja vinculado.
+    '''
+    return contador['frame_elididas']
+
+
+def alocacoes_frame():
+    '''
+    Retorna quantos buffers e VAOs foram criados desde o ultimo inicio_frame().
+    Depois da inicializacao deve ser sempre 0: a geometria e enviada uma unica vez.
+    '''
+    return contador['frame_alocacoes']
+
+
+def invalida():
+    '''
+    Esquece todo o estado conhecido. Deve ser chamada ao trocar de contexto OpenGL
+    ou depois de codigo que vincula objetos diretamente com gl.*.
+    '''
+    estado['programa'] = None
+    estado['vao'] = None
+    estado['buffers'] = {}
+    vaos.clear()
+
+
+def _elide(igual):
+
+    if igual:
+        contador['elididas'] += 1
+        contador['frame_elididas'] += 1
+        return True
+
+    contador['chamadas'] += 1
+    contador['frame_chamadas'] += 1
+    return False
+
+
+def _estado_vao():
+    '''
+    Estado do VAO atual, ou None se o VAO vinculado e desconhecido.
+    '''
+    if estado['vao'] is None:
+        return None
+    return vaos.setdefault(estado['vao'], {'ebo': None, 'atributos': {}})
+
+
+def use_program(program_ref):
+
+    if _elide(estado['programa'] == program_ref):
+        return
+    gl.glUseProgram(program_ref)
+    estado['programa'] = program_ref
+
+
+def bind_vertex_array(VAO):
+
+    if _elide(estado['vao'] == VAO):
+        return
+    gl.glBindVertexArray(VAO)
+    estado['vao'] = VAO
+
+
+def bind_buffer(target, buffer):
+
+    if target == gl.GL_ELEMENT_ARRAY_BUFFER:
+        estado_vao = _estado_vao()
+        if _elide(estado_vao is not None and estado_vao['ebo'] == buffer):
+            return
+        gl.glBindBuffer(target, buffer)
+        if estado_vao is not None:
+            estado_vao['ebo'] = buffer
+        return
+
+    if _elide(estado['buffers'].get(target) == buffer):
+        return
+    gl.glBindBuffer(target, buffer)
+    estado['buffers'][target] = buffer
+
+
+def _attrib_array(local, habilitado, funcao):
+
+    estado_vao = _estado_vao()
+    if _elide(estado_vao is not None and estado_vao['atributos'].get(local) == habilitado):
+        return
+    funcao(local)
+    if estado_vao is not None:
+        estado_vao['atributos'][local] = habilitado
+
+
+def enable_vertex_attrib_array(local):
+
+    _attrib_array(local, True, gl.glEnableVertexAttribArray)
+
+
+def disable_vertex_attrib_array(local):
+
+    _attrib_array(local, False, gl.glDisableVertexAttribArray)
+
+
+def _aloca(quant):
+
+    contador['alocacoes'] += quant
+    contador['frame_alocacoes'] += quant
+
+
+def gen_buffers(quant = 1):
+    '''
+    glGenBuffers, contado em alocacoes_frame().
+    '''
+    _aloca(quant)
+    return gl.glGenBuffers(quant)
+
+
+def gen_vertex_arrays(quant = 1):
+    '''
+    glGenVertexArrays, contado em alocacoes_frame().
+    '''
+    _aloca(quant)
+    return gl.glGenVertexArrays(quant)
+
+
+def delete_buffers(buffers):
+    '''
+    glDeleteBuffers: buffers apagados deixam de estar vinculados.
+    '''
+    # Array NumPy: o PyOpenGL recusa listas com OpenGL.ERROR_ON_COPY (ver producao.py)
+    buffers = np.fromiter(buffers, dtype=np.uint32)
+    gl.glDeleteBuffers(len(buffers), buffers)
+
+    for target, buffer in list(estado['buffers'].items()):
+        if buffer in buffers:
+            estado['buffers'][target] = 0
+    for estado_vao in vaos.values():
+        if estado_vao['ebo'] in buffers:
+            estado_vao['ebo'] = None
+
+
+def delete_vertex_arrays(VAOs):
+    '''
+    glDeleteVertexArrays: apagar o VAO atual volta ao VAO 0.
+    '''
+    VAOs = np.fromiter(VAOs, dtype=np.uint32)
+    gl.glDeleteVertexArrays(len(VAOs), VAOs)
+
+    for VAO in VAOs:
+        vaos.pop(VAO, None)
+        if estado['vao'] == VAO:
+            estado['vao'] = 0
@@ -0,0 +1,193 @@
+import os
+import time
+import queue
+import threading
+import collections
+import numpy as np
+import captura
+
+
+# Formatos de saida:
+#   raw: um unico arquivo com os frames RGBA (altura, largura, 4) um apos o outro
+#   y4m: video YUV4MPEG2 (YCbCr 4:4:4, BT.601), lido por ffmpeg e pela maioria dos players
+#   png: diretorio com um PNG por frame (frame_000000.png, ...)
+formatos = ('raw', 'y4m', 'png')
+
+
+def formato_arquivo(caminho):
+    '''
+    Formato pela extensao: .y4m -> y4m, .rgba/.raw -> raw, sem extensao (diretorio) -> png.
+    '''
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao == '.y4m':
+        return 'y4m'
+    if extensao in ('.rgba', '.raw'):
+        return 'raw'
+    if extensao == '':
+        return 'png'
+    raise ValueError(f'Extensao de video desconhecida = {extensao}. Use .y4m, .rgba ou um diretorio.')
+
+
+def rgba_para_ycbcr(imagem):
+    '''
+    RGBA (altura, largura, 4) uint8 -> planos Y, Cb, Cr (3, altura, largura) uint8,
+    BT.601 com faixa limitada (Y de 16 a 235), como esperado por padrao em Y4M.
+    '''
+    rgb = imagem[..., :3].astype(np.float32)
+    matriz = np.array([[0.257, 0.504, 0.098],
+                       [-0.148, -0.291, 0.439],
+                       [0.439, -0.368, -0.071]], dtype=np.float32)
+    deslocamento = np.array([16.0, 128.0, 128.0], dtype=np.float32)
+
+    ycbcr = rgb @ matriz.T + deslocamento
+    return np.clip(np.rint(ycbcr), 0, 255).astype(np.uint8).transpose(2, 0, 1)
+
+
+class ExportadorFrames:
+    '''
+    Grava uma sequencia de frames em disco a partir do laco de renderizacao.
+
+    put() coloca o frame em uma fila de no maximo tamanho_fila frames, e uma thread
+    escreve (e codifica) os frames em segundo plano, na ordem. Com a fila cheia, put()
+    espera a thread liberar um lugar: o laco de renderizacao desacelera ate o ritmo do
+    disco (backpressure) em vez de acumular frames na memoria.
+
+    Uso:
+        with ExportadorFrames('animacao.y4m', largura, altura, fps=60) as exportador:
+            for _ in range(frames):
+                render()
+                exportador.put(contexto.read_pixels())
+        print(exportador.estatisticas())
+    '''
+
+    def __init__(self, caminho, largura, altura, formato = None, fps = 60, tamanho_fila = 8, nivel_png = 1):
+
+        self.caminho = caminho
+        self.largura = largura
+        self.altura = altura
+        self.formato = formato or formato_arquivo(caminho)
+        self.fps = fps
+        self.nivel_png = nivel_png
+
+        if self.formato not in formatos:
+            raise ValueError(f'Formato de video desconhecido = {self.formato}. Use raw, y4m ou png.')
+
+        if self.formato == 'png':
+            os.makedirs(caminho, exist_ok=True)
+            self.arquivo = None
+        else:
+            self.arquivo = open(caminho, 'wb')
+            if self.formato == 'y4m':
+                self.arquivo.write(f'YUV4MPEG2 W{largura} H{altura} F{fps}:1 Ip A1:1 C444\n'.encode('ascii'))
+
+        self.fila = queue.Queue(maxsize=tamanho_fila)
+        self.erro = None
+        self.frames = 0 # frames recebidos por put()
+        self.gravados = 0
+
+        # Tempos em milissegundos de codificacao + escrita de cada frame e de espera em put();
+        # profundidade da fila vista por put()
+        self.tempos_codificacao = collections.deque(maxlen=300)
+        self.profundidades = collections.deque(maxlen=300)
+        self.espera_total = 0.0
+        self.profundidade_maxima = 0
+
+        self.thread = threading.Thread(target=self._escreve, name='exportador', daemon=True)
+        self.thread.start()
+
+    def _escreve_frame(self, imagem):
+
+        if self.formato == 'raw':
+            self.arquivo.write(np.ascontiguousarray(imagem).tobytes())
+        elif self.formato == 'y4m':
+            self.arquivo.write(b'FRAME\n')
+            self.arquivo.write(rgba_para_ycbcr(imagem).tobytes())
+        else:
+            nome = os.path.join(self.caminho, 'frame_{:06d}.png'.format(self.gravados))
+            captura.salva_imagem(nome, imagem, 'png', self.nivel_png)
+
+    def _escreve(self):
+        '''
+        Thread de escrita: consome a fila ate receber None.
+        '''
+        while True:
+            imagem = self.fila.get()
+            if imagem is None:
+                return
+
+            if self.erro is not None:
+                continue # apenas esvazia a fila; o erro sera relancado em put()/close()
+
+            inicio = time.perf_counter()
+            try:
+                self._escreve_frame(imagem)
+            except BaseException as erro:
+                self.erro = erro
+                continue
+            self.gravados += 1
+            self.tempos_codificacao.append((time.perf_counter() - inicio) * 1000.0)
+
+    def put(self, imagem):
+        '''
+        Envia um frame (altura, largura, 4) uint8, linha de cima primeiro, como
+        offscreen.ContextoOffscreen.read_pixels. Espera se a fila estiver cheia.
+        O array nao deve ser alterado depois: ele e gravado mais tarde, pela thread.
+        '''
+        if self.erro is not None:
+            raise self.erro
+
+        if imagem.shape != (self.altura, self.largura, 4):
+            raise ValueError(f'Frame com tamanho {imagem.shape}, esperado {(self.altura, self.largura, 4)}.')
+
+        profundidade = self.fila.qsize()
+        self.profundidades.append(profundidade)
+        self.profundidade_maxima = max(self.profundidade_maxima, profundidade)
+
+        inicio = time.perf_counter()
+        self.fila.put(imagem)
+        self.espera_total += (time.perf_counter() - inicio) * 1000.0
+
+        self.frames += 1
+
+    def close(self):
+        '''
+        Espera a thread gravar os frames da fila e fecha o arquivo.
+        '''
+        if self.thread is None:
+            return
+
+        self.fila.put(None)
+        self.thread.join()
+        self.thread = None
+
+        if self.arquivo is not None:
+            self.arquivo.close()
+            self.arquivo = None
+
+        if self.erro is not None:
+            raise self.erro
+
+    def estatisticas(self):
+        '''
+        Tempo de codificacao + escrita por frame (media e p95 em ms), espera total em put()
+        (ms) e profundidade da fila (media e maxima).
+        '''
+        resultado = {'formato': self.formato, 'frames': self.frames, 'gravados': self.gravados,
+                     'espera_put': self.espera_total, 'fila_maxima': self.profundidade_maxima,
+                     'fila_media': float(np.mean(self.profundidades)) if self.profundidades else 0.0}
+
+        if self.tempos_codificacao:
+            t = np.fromiter(self.tempos_codificacao, dtype=np.float64)
+            resultado['codificacao'] = {'media': float(t.mean()), 'p95': float(np.percentile(t, 95))}
+        else:
+            resultado['codificacao'] = None
+
+        return resultado
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, *erro):
+
+        self.close()
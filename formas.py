@@ -0,0 +1,156 @@
+import numpy as np
+
+
+# Maior quantidade de vertices enderecavel com indices de 16 bits (GL_UNSIGNED_SHORT)
+max_vertices_uint16 = 65536
+
+
+def index_dtype(quant_vertices):
+    '''
+    Tipo dos indices: uint16 quando todos os vertices cabem em 16 bits, senao uint32.
+    '''
+    return np.uint16 if quant_vertices <= max_vertices_uint16 else np.uint32
+
+
+def _por_forma(valor, quant_formas):
+    '''
+    Retorna o valor como coluna (quant_formas, 1), ou (1, 1) quando e o mesmo para todas
+    as formas. Valores escalares nao sao expandidos: as contas ficam no tamanho do modelo.
+    '''
+    valor = np.asarray(valor, dtype=np.float32).reshape(-1, 1)
+
+    if valor.shape[0] not in (1, quant_formas):
+        raise ValueError(f'Esperado um valor ou {quant_formas} valores, recebido {valor.shape[0]}.')
+
+    return valor
+
+
+def fan_indices(quant_formas, vertices_por_forma):
+    '''
+    Indices de triangulos (0, i, i + 1) equivalentes a um GL_TRIANGLE_FAN de cada forma,
+    para formas com a mesma quantidade de vertices armazenadas em sequencia.
+    Retorna um array (quant_formas * (vertices_por_forma - 2) * 3,).
+    '''
+    n = vertices_por_forma
+    modelo = np.empty((n - 2, 3), dtype=np.int64)
+    modelo[:, 0] = 0
+    modelo[:, 1] = np.arange(1, n - 1)
+    modelo[:, 2] = np.arange(2, n)
+
+    return _replica_indices(modelo, quant_formas, n)
+
+
+def _replica_indices(modelo, quant_formas, vertices_por_forma):
+    '''
+    Repete os indices "modelo" de uma forma para quant_formas formas em sequencia,
+    somando o deslocamento de cada forma no array de vertices.
+    As contas ja sao feitas no tipo final, sem array intermediario de 64 bits.
+    '''
+    dtype = index_dtype(quant_formas * vertices_por_forma)
+
+    base = np.arange(0, quant_formas * vertices_por_forma, vertices_por_forma, dtype=dtype)
+    indices = np.empty((quant_formas,) + modelo.shape, dtype=dtype)
+    np.add(base[:, None, None], modelo.astype(dtype)[None, :, :], out=indices)
+
+    return indices.ravel()
+
+
+def _vertices(centros, dx, dy, vertices_por_forma, z):
+    '''
+    Monta o array (quant_formas * vertices_por_forma, 3) float32 com centro + (dx, dy).
+    dx e dy sao (quant_formas, vertices_por_forma) ou (1, vertices_por_forma) quando
+    todas as formas tem o mesmo tamanho e rotacao. As somas escrevem direto no resultado.
+    '''
+    vertices = np.empty((len(centros), vertices_por_forma, 3), dtype=np.float32)
+    np.add(centros[:, 0, None], dx, out=vertices[..., 0])
+    np.add(centros[:, 1, None], dy, out=vertices[..., 1])
+    vertices[..., 2] = z
+    return vertices.reshape(-1, 3)
+
+
+def regular_polygons(centros, raios = 1.0, rotacoes = 0.0, lados = 6, z = 0.0):
+    '''
+    Poligonos regulares de "lados" lados, um para cada centro.
+        centros: (M, 2)
+        raios, rotacoes (radianos): escalar ou (M,)
+    Retorna (vertices (M * lados, 3) float32, indices de triangulos uint16/uint32).
+    '''
+    centros = np.asarray(centros, dtype=np.float32).reshape(-1, 2)
+    quant = len(centros)
+    raios = _por_forma(raios, quant)
+    rotacoes = _por_forma(rotacoes, quant)
+
+    # cos/sen calculados apenas para os "lados" angulos do modelo e para a rotacao de cada forma:
+    # cos(a + r) = cos(a)cos(r) - sen(a)sen(r), sen(a + r) = sen(a)cos(r) + cos(a)sen(r)
+    angulos = (2.0 * np.pi / lados) * np.arange(lados, dtype=np.float32)
+    cos_a = np.cos(angulos)[None, :]
+    sen_a = np.sin(angulos)[None, :]
+    cos_r = raios * np.cos(rotacoes)
+    sen_r = raios * np.sin(rotacoes)
+
+    dx = cos_a * cos_r - sen_a * sen_r
+    dy = sen_a * cos_r + cos_a * sen_r
+
+    return _vertices(centros, dx, dy, lados, z), fan_indices(quant, lados)
+
+
+def circles(centros, raios = 1.0, segmentos = 32, z = 0.0):
+    '''
+    Circulos aproximados por poligonos regulares de "segmentos" lados.
+    '''
+    return regular_polygons(centros, raios, 0.0, segmentos, z)
+
+
+def rectangles(centros, larguras, alturas, rotacoes = 0.0, z = 0.0):
+    '''
+    Retangulos com vertices na mesma ordem do quadrado de cenas/quadrado_triangulo.json:
+    direita acima, direita abaixo, esquerda abaixo, esquerda acima.
+        centros: (M, 2)
+        larguras, alturas, rotacoes (radianos): escalar ou (M,)
+    Retorna (vertices (M * 4, 3) float32, indices de triangulos uint16/uint32).
+    '''
+    centros = np.asarray(centros, dtype=np.float32).reshape(-1, 2)
+    quant = len(centros)
+    meia_largura = _por_forma(larguras, quant) * 0.5
+    meia_altura = _por_forma(alturas, quant) * 0.5
+    rotacoes = _por_forma(rotacoes, quant)
+
+    # Cantos do retangulo sem rotacao, relativos ao centro
+    sinal_x = np.array([1.0, 1.0, -1.0, -1.0], dtype=np.float32)[None, :]
+    sinal_y = np.array([1.0, -1.0, -1.0, 1.0], dtype=np.float32)[None, :]
+    cx = sinal_x * meia_largura
+    cy = sinal_y * meia_altura
+
+    cos = np.cos(rotacoes)
+    sen = np.sin(rotacoes)
+
+    dx = cx * cos - cy * sen
+    dy = cx * sen + cy * cos
+
+    return _vertices(centros, dx, dy, 4, z), fan_indices(quant, 4)
+
+
+def rings(centros, raios_internos, raios_externos, segmentos = 32, z = 0.0):
+    '''
+    Aneis (coroas circulares). Cada anel tem 2 * segmentos vertices:
+    primeiro os do circulo externo, depois os do interno, ligados por 2 * segmentos triangulos.
+    Retorna (vertices (M * 2 * segmentos, 3) float32, indices de triangulos uint16/uint32).
+    '''
+    centros = np.asarray(centros, dtype=np.float32).reshape(-1, 2)
+    quant = len(centros)
+    internos = _por_forma(raios_internos, quant)
+    externos = _por_forma(raios_externos, quant)
+
+    angulos = (2.0 * np.pi / segmentos) * np.arange(segmentos, dtype=np.float32)[None, :]
+    cos = np.cos(angulos)
+    sen = np.sin(angulos)
+
+    dx = np.concatenate(np.broadcast_arrays(externos * cos, internos * cos), axis=1)
+    dy = np.concatenate(np.broadcast_arrays(externos * sen, internos * sen), axis=1)
+
+    # Dois triangulos por segmento: (externo k, externo k+1, interno k) e (interno k, externo k+1, interno k+1)
+    k = np.arange(segmentos, dtype=np.int64)
+    k1 = (k + 1) % segmentos
+    modelo = np.stack([k, k1, k + segmentos, k + segmentos, k1, k1 + segmentos], axis=1).reshape(-1, 3)
+
+    return _vertices(centros, dx, dy, 2 * segmentos, z), _replica_indices(modelo, quant, 2 * segmentos)
@@ -0,0 +1,219 @@
+import os
+import functools
+import multiprocessing
+import concurrent.futures
+from multiprocessing import shared_memory
+import numpy as np
+import formas
+
+
+# Menor quantidade de itens de entrada por bloco: blocos menores custam mais em
+# comunicacao entre processos do que economizam em calculo
+itens_minimos_bloco = 4096
+
+
+class BufferCompartilhado:
+    '''
+    Array float32 (quant_vertices, componentes) em multiprocessing.shared_memory.
+    Os processos de trabalho escrevem cada um o seu trecho, e o processo principal
+    envia o array direto para a GPU (e.g. upload.buffer_data(..., buffer.array, ...)), sem copia:
+    a memoria compartilhada ja e float32 contigua.
+
+    O processo que cria o buffer e o dono: release() deve ser chamada depois do envio.
+    '''
+
+    def __init__(self, forma, dtype = np.float32, nome = None):
+
+        self.forma = tuple(forma)
+        self.dtype = np.dtype(dtype)
+        self.dono = nome is None
+
+        tamanho = max(1, int(np.prod(self.forma)) * self.dtype.itemsize) # shared_memory nao aceita 0 bytes
+        if self.dono:
+            self.memoria = shared_memory.SharedMemory(create=True, size=tamanho)
+        else:
+            self.memoria = shared_memory.SharedMemory(name=nome)
+
+        self.array = np.ndarray(self.forma, dtype=self.dtype, buffer=self.memoria.buf)
+
+    @property
+    def nome(self):
+
+        return self.memoria.name
+
+    def descritor(self):
+        '''
+        (nome, forma, dtype): o suficiente para outro processo abrir o mesmo buffer.
+        '''
+        return self.memoria.name, self.forma, self.dtype.str
+
+    def release(self):
+        '''
+        Fecha o mapeamento; o dono tambem apaga a memoria compartilhada.
+        '''
+        if self.memoria is None:
+            return
+
+        self.array = None # o mapeamento so fecha sem views abertas
+        self.memoria.close()
+        if self.dono:
+            self.memoria.unlink()
+        self.memoria = None
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, *erro):
+
+        self.release()
+
+
+def _executa_bloco(funcao, descritor_entrada, descritor_saida, inicio, fim, vertices_por_item):
+    '''
+    Executada no processo de trabalho: le os itens [inicio, fim) da entrada e escreve
+    os vertices correspondentes na saida, ambas em memoria compartilhada.
+    '''
+    entrada = BufferCompartilhado(descritor_entrada[1], descritor_entrada[2], nome=descritor_entrada[0])
+    saida = BufferCompartilhado(descritor_saida[1], descritor_saida[2], nome=descritor_saida[0])
+    try:
+        vertices = funcao(entrada.array[inicio:fim])
+        saida.array[inicio * vertices_por_item:fim * vertices_por_item] = np.asarray(vertices).reshape(-1, saida.forma[1])
+    finally:
+        entrada.release()
+        saida.release()
+
+    return fim - inicio
+
+
+class TarefaGeometria:
+    '''
+    Preparacao de geometria em andamento nos processos de trabalho.
+    O laco do GLUT pode consultar pronta() (e.g. em um glutTimerFunc) e continuar
+    desenhando enquanto os blocos sao calculados.
+    '''
+
+    def __init__(self, entrada, saida, futuros):
+
+        self.entrada = entrada
+        self.saida = saida
+        self.futuros = futuros
+
+    def pronta(self):
+
+        return all(futuro.done() for futuro in self.futuros)
+
+    def result(self):
+        '''
+        Espera todos os blocos e retorna o BufferCompartilhado com os vertices.
+        Erros dos processos de trabalho sao relancados aqui.
+        '''
+        try:
+            for futuro in self.futuros:
+                futuro.result()
+        except BaseException:
+            self.saida.release()
+            raise
+        finally:
+            self.entrada.release()
+
+        return self.saida
+
+
+class PreparadorGeometria:
+    '''
+    Etapa de preparacao de geometria na CPU (transformar, gerar, triangular) dividida
+    entre processos, um por nucleo. Entrada e saida ficam em memoria compartilhada
+    float32: os processos so recebem o nome do buffer e o trecho de cada bloco, sem
+    serializar os arrays.
+
+    Nenhuma chamada OpenGL e feita fora do processo principal: os processos de trabalho
+    so calculam, e o envio para a GPU continua na thread do contexto.
+
+    Os processos sao criados com "spawn": um fork do processo principal copiaria o
+    estado do driver OpenGL e do GLUT, que nao pode ser usado no processo filho.
+    Por isso funcao deve ser definida no nivel de um modulo (ou functools.partial de uma).
+
+    Uso:
+        preparador = PreparadorGeometria()
+        with preparador.map(geometria_paralela.poligonos, parametros, vertices_por_item=6) as buffer:
+            upload.buffer_data(gl.GL_ARRAY_BUFFER, buffer.array, gl.GL_STATIC_DRAW)   # VBO ja vinculado
+        ...
+        preparador.shutdown()
+    '''
+
+    def __init__(self, processos = None):
+
+        self.processos = processos or os.cpu_count() or 1
+        self.executor = None # criado na primeira chamada
+
+    def _executor(self):
+
+        if self.executor is None:
+            contexto = multiprocessing.get_context('spawn')
+            self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.processos, mp_context=contexto)
+        return self.executor
+
+    def submit(self, funcao, entrada, vertices_por_item, componentes = 3):
+        '''
+        Divide as linhas de entrada em blocos e agenda funcao(bloco) em cada processo.
+            funcao: recebe (quant_itens, ...) e retorna (quant_itens * vertices_por_item, componentes)
+            entrada: array com um item por linha (e.g. parametros de cada forma, vertices)
+        Retorna uma TarefaGeometria.
+        '''
+        entrada = np.asarray(entrada, dtype=np.float32)
+        quant = len(entrada)
+
+        # A entrada e copiada uma unica vez para a memoria compartilhada
+        buffer_entrada = BufferCompartilhado(entrada.shape)
+        buffer_entrada.array[...] = entrada
+        saida = BufferCompartilhado((quant * vertices_por_item, componentes))
+
+        # Alguns blocos por processo equilibram a carga quando os blocos tem custos diferentes
+        quant_blocos = max(1, min(self.processos * 4, quant // itens_minimos_bloco))
+        limites = np.linspace(0, quant, quant_blocos + 1).astype(int)
+
+        executor = self._executor()
+        futuros = [executor.submit(_executa_bloco, funcao, buffer_entrada.descritor(), saida.descritor(),
+                                   int(inicio), int(fim), vertices_por_item)
+                   for inicio, fim in zip(limites[:-1], limites[1:]) if fim > inicio]
+
+        return TarefaGeometria(buffer_entrada, saida, futuros)
+
+    def map(self, funcao, entrada, vertices_por_item, componentes = 3):
+        '''
+        Como submit(), mas espera o resultado: retorna o BufferCompartilhado.
+        '''
+        return self.submit(funcao, entrada, vertices_por_item, componentes).result()
+
+    def shutdown(self):
+
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+
+def transforma(vertices, matriz):
+    '''
+    Aplica a matriz 4x4 (column-major, como as matrizes GLM) a vertices (N, 3).
+    Uso: preparador.map(functools.partial(transforma, matriz=np.array(modelo)), vertices, 1)
+    '''
+    matriz = np.asarray(matriz, dtype=np.float32).reshape(4, 4).T # linhas da matriz
+    return vertices @ matriz[:3, :3].T + matriz[:3, 3]
+
+
+def poligonos(parametros, lados = 6, z = 0.0):
+    '''
+    Vertices de poligonos regulares (formas.regular_polygons) a partir de
+    parametros (M, 4): centro x, centro y, raio e rotacao de cada forma.
+    Os indices nao dependem das posicoes: use formas.fan_indices(M, lados).
+    '''
+    vertices, _ = formas.regular_polygons(parametros[:, 0:2], parametros[:, 2], parametros[:, 3], lados, z)
+    return vertices
+
+
+def poligonos_lados(lados, z = 0.0):
+    '''
+    poligonos() com lados fixo, pronta para map(): poligonos_lados(32) -> circulos de 32 segmentos.
+    '''
+    return functools.partial(poligonos, lados=lados, z=z)
@@ -0,0 +1,504 @@
+import os
+import numpy as np
+import OpenGL.GL as gl # Funcoes da API OpenGL
+import formas
+import upload
+import estado_gl
+import layout_vertice
+
+
+# Bytes do arquivo lidos por bloco: limita a memoria usada na importacao
+tamanho_bloco_padrao = 4 * 1024 * 1024
+
+# Tipos escalares do PLY -> tipo NumPy (sem ordem de bytes)
+tipos_ply = {
+    'char': 'i1', 'int8': 'i1', 'uchar': 'u1', 'uint8': 'u1',
+    'short': 'i2', 'int16': 'i2', 'ushort': 'u2', 'uint16': 'u2',
+    'int': 'i4', 'int32': 'i4', 'uint': 'u4', 'uint32': 'u4',
+    'float': 'f4', 'float32': 'f4', 'double': 'f8', 'float64': 'f8',
+}
+
+
+def _triangula(faces, ids):
+    '''
+    Divide faces poligonais em triangulos (0, i, i + 1), como um GL_TRIANGLE_FAN.
+        faces: lista de arrays (quant_faces, vertices_por_face), um por quantidade de vertices
+        ids: posicao de cada face no arquivo, para manter a ordem original entre os grupos
+    Retorna os indices (quant_triangulos * 3,) uint32.
+    '''
+    if not faces:
+        return np.empty(0, dtype=np.uint32)
+
+    triangulos = []
+    ordem = []
+    for grupo, id_grupo in zip(faces, ids):
+        n = grupo.shape[1]
+        modelo = formas.fan_indices(1, n).astype(np.intp)
+        triangulos.append(grupo[:, modelo].reshape(-1, 3))
+        ordem.append(np.repeat(id_grupo, n - 2))
+
+    triangulos = np.concatenate(triangulos)
+    if len(faces) > 1:
+        triangulos = triangulos[np.argsort(np.concatenate(ordem), kind='stable')]
+
+    return triangulos.astype(np.uint32).ravel()
+
+
+def _linhas(bytes_texto):
+    '''
+    Inicio e comprimento (com a quebra de linha) de cada linha de um bloco terminado em quebra de linha.
+    '''
+    fins = np.flatnonzero(bytes_texto == ord('\n'))
+    inicios = np.empty(len(fins), dtype=np.intp)
+    inicios[:1] = 0
+    inicios[1:] = fins[:-1] + 1
+    return inicios, fins - inicios + 1
+
+
+def _espacos(bytes_texto):
+
+    return (bytes_texto == ord(' ')) | (bytes_texto == ord('\t')) | (bytes_texto == ord('\n')) | (bytes_texto == ord('\r'))
+
+
+def _numeros(bytes_texto, dtype):
+    '''
+    Converte um bloco de linhas de numeros separados por espacos, sem laco por linha.
+    Retorna (valores 1D, quantidade de numeros em cada linha).
+    '''
+    if len(bytes_texto) == 0:
+        return np.empty(0, dtype=dtype), np.empty(0, dtype=np.intp)
+
+    espaco = _espacos(bytes_texto)
+    inicio_numero = ~espaco
+    inicio_numero[1:] &= espaco[:-1]
+
+    inicios, _ = _linhas(bytes_texto)
+    quantidades = np.add.reduceat(inicio_numero.astype(np.intp), inicios)
+
+    valores = np.fromstring(bytes_texto.tobytes(), dtype=dtype, sep=' ')
+    if len(valores) != quantidades.sum():
+        raise ValueError('Valor nao numerico no arquivo.')
+
+    return valores, quantidades
+
+
+def _faces(valores, quantidades, primeiro = 0):
+    '''
+    Separa os indices de cada face a partir dos valores de _numeros (uma face por linha,
+    ignorando os "primeiro" valores de cada linha), agrupados pela quantidade de vertices.
+    Retorna (faces, ids) no formato de _triangula.
+    '''
+    inicio_linha = np.cumsum(quantidades) - quantidades + primeiro
+    vertices_por_face = quantidades - primeiro
+
+    faces = []
+    ids = []
+    for n in np.unique(vertices_por_face):
+        if n < 3:
+            continue
+        posicoes = np.flatnonzero(vertices_por_face == n)
+        faces.append(valores[inicio_linha[posicoes, None] + np.arange(n)])
+        ids.append(posicoes)
+
+    return faces, ids
+
+
+def _read_blocos_texto(arquivo, tamanho_bloco):
+    '''
+    Gera blocos de aproximadamente tamanho_bloco bytes terminados no fim de uma linha,
+    como arrays uint8.
+    '''
+    while True:
+        texto = arquivo.read(tamanho_bloco)
+        if not texto:
+            return
+        texto += arquivo.readline()
+        if not texto.endswith(b'\n'):
+            texto += b'\n'
+        yield np.frombuffer(texto, dtype=np.uint8)
+
+
+def _seleciona_linhas(bytes_texto, inicios, comprimentos, selecao):
+    '''
+    Copia as linhas selecionadas em um novo bloco, trocando o primeiro caractere
+    (o tipo da linha no OBJ, e.g. "v", "f") por espaco.
+    '''
+    linhas = bytes_texto[np.repeat(selecao, comprimentos)]
+    tamanhos = comprimentos[selecao]
+    linhas[np.cumsum(tamanhos) - tamanhos] = ord(' ')
+    return linhas
+
+
+def read_obj(caminho, tamanho_bloco = tamanho_bloco_padrao):
+    '''
+    Le um arquivo Wavefront OBJ em blocos de aproximadamente tamanho_bloco bytes.
+    Gera (vertices (k, 3) float32, indices (m,) uint32) de cada bloco; os indices sao
+    absolutos (relativos ao inicio do arquivo) e as faces ja vem divididas em triangulos.
+    Apenas posicoes ("v") e faces ("f") sao usadas.
+
+    Cada bloco e convertido com operacoes NumPy sobre os bytes: o tipo de cada linha
+    vem dos seus dois primeiros bytes e os numeros sao lidos de uma vez com np.fromstring.
+    '''
+    quant_vertices = 0
+
+    with open(caminho, 'rb') as arquivo:
+        for bytes_texto in _read_blocos_texto(arquivo, tamanho_bloco):
+
+            inicios, comprimentos = _linhas(bytes_texto)
+            segundo = bytes_texto[np.minimum(inicios + 1, len(bytes_texto) - 1)]
+            separador = (segundo == ord(' ')) | (segundo == ord('\t'))
+            eh_vertice = (bytes_texto[inicios] == ord('v')) & separador
+            eh_face = (bytes_texto[inicios] == ord('f')) & separador
+
+            # Posicoes: x y z [w] -> apenas os 3 primeiros valores de cada linha
+            valores, quantidades = _numeros(_seleciona_linhas(bytes_texto, inicios, comprimentos, eh_vertice), np.float32)
+            if np.any(quantidades < 3):
+                raise ValueError(f'{caminho}: vertice com menos de 3 coordenadas.')
+            vertices = valores[(np.cumsum(quantidades) - quantidades)[:, None] + np.arange(3)]
+
+            # Faces: em "v/vt/vn" apenas v interessa; o restante de cada item vira espaco
+            texto_faces = _seleciona_linhas(bytes_texto, inicios, comprimentos, eh_face)
+            barra = texto_faces == ord('/')
+            if barra.any():
+                evento = barra | _espacos(texto_faces)
+                ultimo_evento = np.maximum.accumulate(np.where(evento, np.arange(len(texto_faces)), 0))
+                texto_faces[barra[ultimo_evento] & ~_espacos(texto_faces)] = ord(' ')
+
+            faces, ids = _faces(*_numeros(texto_faces, np.int64))
+
+            # OBJ comeca em 1; valores negativos contam a partir do ultimo vertice lido
+            bases = quant_vertices + np.cumsum(eh_vertice)[eh_face]
+            faces = [np.where(grupo < 0, grupo + bases[posicoes, None], grupo - 1) for grupo, posicoes in zip(faces, ids)]
+
+            quant_vertices += len(vertices)
+
+            yield vertices, _triangula(faces, ids)
+
+
+def read_cabecalho_ply(arquivo):
+    '''
+    Le o cabecalho de um arquivo PLY aberto em modo binario.
+    Retorna (formato, elementos), com elementos = [(nome, quantidade, propriedades)] e
+    cada propriedade (nome, tipo) ou (nome, (tipo_quantidade, tipo_item)) para listas.
+    '''
+    if arquivo.readline().strip() != b'ply':
+        raise ValueError(f'{arquivo.name}: nao e um arquivo PLY.')
+
+    formato = None
+    elementos = []
+
+    for linha in arquivo:
+        partes = linha.decode('ascii').split()
+        if not partes or partes[0] in ('comment', 'obj_info'):
+            continue
+        if partes[0] == 'end_header':
+            return formato, elementos
+        if partes[0] == 'format':
+            formato = partes[1]
+        elif partes[0] == 'element':
+            elementos.append((partes[1], int(partes[2]), []))
+        elif partes[0] == 'property':
+            if partes[1] == 'list':
+                elementos[-1][2].append((partes[4], (partes[2], partes[3])))
+            else:
+                elementos[-1][2].append((partes[2], partes[1]))
+
+    raise ValueError(f'{arquivo.name}: cabecalho PLY incompleto.')
+
+
+def count_ply(caminho):
+    '''
+    Quantidade de vertices e de faces declarada no cabecalho do PLY.
+    '''
+    with open(caminho, 'rb') as arquivo:
+        _, elementos = read_cabecalho_ply(arquivo)
+
+    quantidades = {nome: quantidade for nome, quantidade, _ in elementos}
+    return quantidades.get('vertex', 0), quantidades.get('face', 0)
+
+
+def _dtype_ply(tipo, ordem):
+
+    return np.dtype(ordem + tipos_ply[tipo])
+
+
+def _read_vertices_ply(arquivo, formato, quantidade, propriedades, vertices_por_bloco):
+    '''
+    Gera blocos (k, 3) float32 com as propriedades x, y, z dos vertices.
+    '''
+    nomes = [nome for nome, _ in propriedades]
+    colunas = [nomes.index(eixo) for eixo in ('x', 'y', 'z')]
+
+    if formato == 'ascii':
+        restantes = quantidade
+        while restantes:
+            k = min(vertices_por_bloco, restantes)
+            bytes_texto = np.frombuffer(b''.join(arquivo.readline() for _ in range(k)), dtype=np.uint8)
+            valores, _ = _numeros(bytes_texto, np.float32)
+            yield valores.reshape(k, -1)[:, colunas]
+            restantes -= k
+        return
+
+    ordem = '<' if formato == 'binary_little_endian' else '>'
+    if any(isinstance(tipo, tuple) for _, tipo in propriedades):
+        raise ValueError(f'{arquivo.name}: listas no elemento vertex nao sao suportadas.')
+    dtype = np.dtype([(nome, _dtype_ply(tipo, ordem)) for nome, tipo in propriedades])
+
+    restantes = quantidade
+    while restantes:
+        k = min(vertices_por_bloco, restantes)
+        bruto = arquivo.read(k * dtype.itemsize)
+        if len(bruto) < k * dtype.itemsize:
+            raise ValueError(f'{arquivo.name}: arquivo PLY truncado.')
+        dados = np.frombuffer(bruto, dtype=dtype, count=k)
+        vertices = np.empty((k, 3), dtype=np.float32)
+        for i, eixo in enumerate(('x', 'y', 'z')):
+            vertices[:, i] = dados[eixo]
+        yield vertices
+        restantes -= k
+
+
+def _read_faces_ply(arquivo, formato, quantidade, propriedades, faces_por_bloco):
+    '''
+    Gera blocos de indices de triangulos (m,) uint32 do elemento face.
+    '''
+    listas = [tipo for _, tipo in propriedades if isinstance(tipo, tuple)]
+    if len(propriedades) != 1 or len(listas) != 1:
+        raise ValueError(f'{arquivo.name}: o elemento face deve ter apenas a lista de indices.')
+
+    if formato == 'ascii':
+        restantes = quantidade
+        while restantes:
+            k = min(faces_por_bloco, restantes)
+            bytes_texto = np.frombuffer(b''.join(arquivo.readline() for _ in range(k)), dtype=np.uint8)
+            # Cada linha e "n indice_1 ... indice_n": o primeiro valor e ignorado
+            yield _triangula(*_faces(*_numeros(bytes_texto, np.int64), primeiro=1))
+            restantes -= k
+        return
+
+    ordem = '<' if formato == 'binary_little_endian' else '>'
+    tipo_quantidade = _dtype_ply(listas[0][0], ordem)
+    tipo_item = _dtype_ply(listas[0][1], ordem)
+
+    # Cada face e (n, indice_1, ..., indice_n). Um bloco e lido supondo o mesmo n da
+    # primeira face (e.g. todos triangulos) e convertido de uma vez; se outra quantidade
+    # aparecer, o bloco e cortado nela e o restante e relido com o novo n.
+    restantes = quantidade
+    while restantes:
+        bruto = arquivo.read(tipo_quantidade.itemsize)
+        if len(bruto) < tipo_quantidade.itemsize:
+            raise ValueError(f'{arquivo.name}: arquivo PLY truncado.')
+        n = int(np.frombuffer(bruto, dtype=tipo_quantidade)[0])
+        arquivo.seek(-tipo_quantidade.itemsize, os.SEEK_CUR)
+
+        dtype = np.dtype([('n', tipo_quantidade), ('indices', tipo_item, (n,))])
+        k = min(faces_por_bloco, restantes)
+        bruto = arquivo.read(k * dtype.itemsize)
+        dados = np.frombuffer(bruto, dtype=dtype, count=len(bruto) // dtype.itemsize)
+
+        if len(dados) == 0:
+            raise ValueError(f'{arquivo.name}: arquivo PLY truncado.')
+
+        diferentes = np.flatnonzero(dados['n'] != n)
+        if len(diferentes):
+            dados = dados[:diferentes[0]]
+        # Volta para o fim da ultima face usada
+        arquivo.seek(len(dados) * dtype.itemsize - len(bruto), os.SEEK_CUR)
+
+        if n >= 3:
+            yield _triangula([dados['indices'].astype(np.int64)], [np.arange(len(dados))])
+        restantes -= len(dados)
+
+
+def read_ply(caminho, tamanho_bloco = tamanho_bloco_padrao):
+    '''
+    Le um arquivo PLY (ascii ou binario) em blocos de aproximadamente tamanho_bloco bytes.
+    Gera (vertices (k, 3) float32, indices (m,) uint32) como read_obj: primeiro os blocos
+    de vertices (com indices vazios), depois os de faces (com vertices vazios).
+    '''
+    with open(caminho, 'rb') as arquivo:
+        formato, elementos = read_cabecalho_ply(arquivo)
+
+        if formato not in ('ascii', 'binary_little_endian', 'binary_big_endian'):
+            raise ValueError(f'{caminho}: formato PLY {formato} desconhecido.')
+
+        vazio_vertices = np.empty((0, 3), dtype=np.float32)
+        vazio_indices = np.empty(0, dtype=np.uint32)
+
+        # Elementos ainda nao lidos; outros elementos (e.g. edge) so sao aceitos depois deles
+        pendentes = {'vertex', 'face'} & {nome for nome, _, _ in elementos}
+
+        for nome, quantidade, propriedades in elementos:
+            pendentes.discard(nome)
+            if nome == 'vertex':
+                for vertices in _read_vertices_ply(arquivo, formato, quantidade, propriedades, max(1, tamanho_bloco // 12)):
+                    yield vertices, vazio_indices
+            elif nome == 'face':
+                for indices in _read_faces_ply(arquivo, formato, quantidade, propriedades, max(1, tamanho_bloco // 16)):
+                    yield vazio_vertices, indices
+            elif quantidade:
+                if pendentes:
+                    raise ValueError(f'{caminho}: elemento {nome} antes de vertex/face nao suportado.')
+                return
+
+
+def read_malha(caminho, tamanho_bloco = tamanho_bloco_padrao):
+    '''
+    Escolhe read_obj ou read_ply pela extensao do arquivo.
+    '''
+    extensao = os.path.splitext(caminho)[1].lower()
+
+    if extensao == '.obj':
+        return read_obj(caminho, tamanho_bloco)
+    if extensao == '.ply':
+        return read_ply(caminho, tamanho_bloco)
+
+    raise ValueError(f'{caminho}: extensao {extensao} nao suportada (use .obj ou .ply).')
+
+
+class ImportadorMalha:
+    '''
+    Importa um OBJ/PLY para um VBO e um EBO pre-alocados, um bloco por vez com
+    glBufferSubData. A parte ja enviada pode ser desenhada enquanto o restante do
+    arquivo ainda esta sendo lido, e a memoria usada fica em torno de um bloco.
+
+    Os buffers sao alocados com as quantidades do cabecalho (PLY) ou com uma estimativa
+    pelo tamanho do arquivo (OBJ); se a estimativa for pequena, a capacidade dobra e os
+    dados ja enviados sao copiados na propria GPU (glCopyBufferSubData).
+
+    O VBO e associado a variavel var_in_program do shader no VAO por layout_vertice.
+
+    Uso:
+        modelo = ImportadorMalha('modelo.ply', shaderProgramRef, 'position', 'vec3')
+        while modelo.step():   # um bloco por frame, por exemplo
+            modelo.draw()
+    '''
+
+    def __init__(self, caminho, program_ref, var_in_program, var_data_type, tamanho_bloco = tamanho_bloco_padrao):
+
+        self.program_ref = program_ref
+        self.formato = layout_vertice.get_layout(((var_in_program, var_data_type),))
+
+        self.blocos = read_malha(caminho, tamanho_bloco)
+        self.quant_vertices = 0
+        self.quant_indices = 0
+        self.completo = False
+
+        if caminho.lower().endswith('.ply'):
+            quant_vertices, quant_faces = count_ply(caminho)
+            capacidade_vertices, capacidade_indices = quant_vertices, quant_faces * 3
+        else:
+            # Estimativa para OBJ: ~ metade do arquivo em linhas "v" de ~40 bytes e metade em "f"
+            tamanho = os.path.getsize(caminho)
+            capacidade_vertices, capacidade_indices = tamanho // 80, tamanho // 80 * 6
+
+        self.capacidade_vertices = max(capacidade_vertices, 1024)
+        self.capacidade_indices = max(capacidade_indices, 1024)
+
+        self.VAO = estado_gl.gen_vertex_arrays(1)
+        self.VBO = self._novo_buffer(gl.GL_ARRAY_BUFFER, self.capacidade_vertices * 12)
+        self.EBO = self._novo_buffer(gl.GL_ELEMENT_ARRAY_BUFFER, self.capacidade_indices * 4)
+        self._vincula()
+
+    def _novo_buffer(self, target, tamanho):
+
+        buffer = estado_gl.gen_buffers(1)
+        estado_gl.bind_buffer(target, buffer)
+        gl.glBufferData(target, tamanho, None, gl.GL_STATIC_DRAW)
+        estado_gl.bind_buffer(target, 0)
+        return buffer
+
+    def _vincula(self):
+        '''
+        Associa o VBO (variavel do shader) e o EBO ao VAO.
+        '''
+        estado_gl.bind_vertex_array(self.VAO)
+        self.formato.configura(self.program_ref, self.VBO)
+        estado_gl.bind_buffer(gl.GL_ELEMENT_ARRAY_BUFFER, self.EBO)
+        estado_gl.bind_vertex_array(0) # Importante: Unbind do VAO primeiro
+        estado_gl.bind_buffer(gl.GL_ARRAY_BUFFER, 0)
+        estado_gl.bind_buffer(gl.GL_ELEMENT_ARRAY_BUFFER, 0)
+
+    def _cresce(self, buffer, tamanho_usado, tamanho_novo):
+        '''
+        Cria um buffer maior com os dados ja enviados, copiados na GPU.
+        '''
+        novo = estado_gl.gen_buffers(1)
+        estado_gl.bind_buffer(gl.GL_COPY_WRITE_BUFFER, novo)
+        gl.glBufferData(gl.GL_COPY_WRITE_BUFFER, tamanho_novo, None, gl.GL_STATIC_DRAW)
+        estado_gl.bind_buffer(gl.GL_COPY_READ_BUFFER, buffer)
+        gl.glCopyBufferSubData(gl.GL_COPY_READ_BUFFER, gl.GL_COPY_WRITE_BUFFER, 0, 0, tamanho_usado)
+        estado_gl.bind_buffer(gl.GL_COPY_READ_BUFFER, 0)
+        estado_gl.bind_buffer(gl.GL_COPY_WRITE_BUFFER, 0)
+        estado_gl.delete_buffers([buffer])
+        return novo
+
+    def _envia(self, vertices, indices):
+
+        mudou = False
+
+        if self.quant_vertices + len(vertices) > self.capacidade_vertices:
+            nova = max(2 * self.capacidade_vertices, self.quant_vertices + len(vertices))
+            self.VBO = self._cresce(self.VBO, self.quant_vertices * 12, nova * 12)
+            self.capacidade_vertices = nova
+            mudou = True
+
+        if self.quant_indices + len(indices) > self.capacidade_indices:
+            nova = max(2 * self.capacidade_indices, self.quant_indices + len(indices))
+            self.EBO = self._cresce(self.EBO, self.quant_indices * 4, nova * 4)
+            self.capacidade_indices = nova
+            mudou = True
+
+        if mudou:
+            self._vincula()
+
+        if len(vertices):
+            estado_gl.bind_buffer(gl.GL_ARRAY_BUFFER, self.VBO)
+            upload.buffer_sub_data(gl.GL_ARRAY_BUFFER, self.quant_vertices * 12, vertices)
+            estado_gl.bind_buffer(gl.GL_ARRAY_BUFFER, 0)
+            self.quant_vertices += len(vertices)
+
+        if len(indices):
+            estado_gl.bind_buffer(gl.GL_ELEMENT_ARRAY_BUFFER, self.EBO)
+            upload.buffer_sub_data(gl.GL_ELEMENT_ARRAY_BUFFER, self.quant_indices * 4, indices, dtype=np.uint32)
+            estado_gl.bind_buffer(gl.GL_ELEMENT_ARRAY_BUFFER, 0)
+            self.quant_indices += len(indices)
+
+    def step(self):
+        '''
+        Le e envia o proximo bloco. Retorna False quando o arquivo terminou.
+        '''
+        if self.completo:
+            return False
+
+        bloco = next(self.blocos, None)
+        if bloco is None:
+            self.completo = True
+            return False
+
+        self._envia(*bloco)
+        return True
+
+    def load(self):
+        '''
+        Le e envia o arquivo inteiro.
+        '''
+        while self.step():
+            pass
+        return self
+
+    def draw(self, modo = gl.GL_TRIANGLES):
+        '''
+        Desenha os triangulos enviados ate o momento.
+        '''
+        if self.quant_indices == 0:
+            return
+
+        estado_gl.use_program(self.program_ref)
+        estado_gl.bind_vertex_array(self.VAO)
+        gl.glDrawElements(modo, self.quant_indices, gl.GL_UNSIGNED_INT, None)
+
+    def delete(self):
+
+        estado_gl.delete_vertex_arrays([self.VAO])
+        estado_gl.delete_buffers([self.VBO, self.EBO])
@@ -0,0 +1,149 @@
+import numpy as np
+import OpenGL.GL as gl # Funcoes da API OpenGL
+import upload
+import estado_gl
+import layout_vertice
+
+
+#Shaders escritos na linguagem GLSL (sem a linha #version, adicionada por init_shader)
+# position: vertice da forma base (igual para todas as instancias)
+# offset, escala, cor: atributos de cada instancia (glVertexAttribDivisor = 1)
+vertex_shader_codigo= """
+in vec3 position;
+in vec2 offset;
+in vec2 escala;
+in vec4 cor;
+out vec4 corInstancia;
+void main()
+{
+    gl_Position = vec4(position.xy * escala + offset, position.z, 1.0f);
+    corInstancia = cor;
+}
+"""
+
+fragment_shader_codigo= """
+in vec4 corInstancia;
+out vec4 FragColor;
+void main()
+{
+    FragColor = corInstancia;
+}
+"""
+
+# Vertice da forma base e atributos de cada instancia, intercalados no VBO de instancias
+layout_base = layout_vertice.get_layout((('position', 'vec3'),))
+layout_instancia = layout_vertice.get_layout((('offset', 'vec2'), ('escala', 'vec2'), ('cor', 'vec4')))
+
+
+class GeometriaInstanciada:
+    '''
+    Uma forma base (e.g. os vertices de um hexagono) desenhada N vezes com uma unica
+    chamada glDrawArraysInstanced / glDrawElementsInstanced.
+
+    Cada instancia tem deslocamento (x, y), escala (sx, sy) e cor RGBA,
+    lidos de um segundo VBO com glVertexAttribDivisor(local, 1).
+
+    Uso:
+        hexagonos = GeometriaInstanciada(vertices_hexagono, gl.GL_TRIANGLE_FAN, programInstancias)
+        hexagonos.set_instancias(offsets, escalas, cores)   # arrays NumPy com N linhas
+        hexagonos.draw()
+    '''
+
+    def __init__(self, vertices, modo, program_ref, indices = None):
+
+        vertices = upload.as_array(vertices).reshape(-1, 3)
+
+        self.modo = modo
+        self.program_ref = program_ref
+        self.quant_vertices = len(vertices)
+        self.quant_indices = 0
+        self.quant_instancias = 0
+        self.capacidade = 0 # quantidade de instancias que cabem no VBO de instancias
+
+        self.VAO = estado_gl.gen_vertex_arrays(1)
+        estado_gl.bind_vertex_array(self.VAO)
+
+        # VBO da forma base
+        self.VBO = estado_gl.gen_buffers(1)
+        estado_gl.bind_buffer(gl.GL_ARRAY_BUFFER, self.VBO)
+        upload.buffer_data(gl.GL_ARRAY_BUFFER, vertices, gl.GL_STATIC_DRAW)
+        layout_base.configura(program_ref, self.VBO)
+
+        self.EBO = None
+        if indices is not None:
+            indices = upload.as_array(indices, np.uint32).ravel()
+            self.quant_indices = len(indices)
+            self.EBO = estado_gl.gen_buffers(1)
+            estado_gl.bind_buffer(gl.GL_ELEMENT_ARRAY_BUFFER, self.EBO)
+            upload.buffer_data(gl.GL_ELEMENT_ARRAY_BUFFER, indices, gl.GL_STATIC_DRAW, dtype=np.uint32)
+
+        # VBO de instancias: offset | escala | cor intercalados, avanca uma vez por instancia
+        self.VBO_instancias = estado_gl.gen_buffers(1)
+        layout_instancia.configura(program_ref, self.VBO_instancias, divisor=1)
+
+        estado_gl.bind_vertex_array(0) # Importante: Unbind do VAO primeiro
+        estado_gl.bind_buffer(gl.GL_ARRAY_BUFFER, 0)
+        estado_gl.bind_buffer(gl.GL_ELEMENT_ARRAY_BUFFER, 0)
+
+    def set_instancias(self, offsets, escalas = 1.0, cores = (1.0, 1.0, 1.0, 1.0)):
+        '''
+        Envia os atributos das instancias para a GPU.
+            offsets: (N, 2) deslocamento de cada instancia
+            escalas: escalar (mesma escala para todas), (N,) ou (N, 1) uma escala por instancia
+                (igual em x e y), (N, 2) um (sx, sy) por instancia, ou (1, 2) o mesmo (sx, sy)
+                para todas as instancias
+            cores: (4,) para todas as instancias ou (N, 4)
+        '''
+        offsets = np.asarray(offsets, dtype=np.float32).reshape(-1, 2)
+        quant = len(offsets)
+
+        escalas = np.asarray(escalas, dtype=np.float32)
+        if escalas.ndim == 1:
+            # Um array de uma dimensao e sempre uma escala por instancia: com N = 2, (2,)
+            # seria ambiguo entre duas escalas e um unico (sx, sy)
+            if escalas.shape[0] != quant:
+                raise ValueError(f'escalas com {escalas.shape[0]} valores para {quant} instancias. Use (1, 2) para o mesmo (sx, sy) em todas.')
+            escalas = escalas[:, None] # mesma escala em x e y
+        elif escalas.ndim == 2 and (escalas.shape[0] not in (1, quant) or escalas.shape[1] not in (1, 2)):
+            raise ValueError(f'escalas com formato {escalas.shape}, esperado (N,), (N, 1), (N, 2) ou (1, 2) com N = {quant}.')
+
+        # Atributos intercalados em um unico array de N registros offset | escala | cor
+        dados = np.empty(quant, dtype=layout_instancia.dtype)
+        dados['offset'] = offsets
+        dados['escala'] = escalas
+        dados['cor'] = cores
+
+        estado_gl.bind_buffer(gl.GL_ARRAY_BUFFER, self.VBO_instancias)
+
+        if quant > self.capacidade:
+            # Buffer maior: realoca
+            upload.buffer_data(gl.GL_ARRAY_BUFFER, dados, gl.GL_DYNAMIC_DRAW, dtype=dados.dtype)
+            self.capacidade = quant
+        else:
+            # Reaproveita o buffer existente
+            upload.buffer_sub_data(gl.GL_ARRAY_BUFFER, 0, dados, dtype=dados.dtype)
+
+        estado_gl.bind_buffer(gl.GL_ARRAY_BUFFER, 0)
+
+        self.quant_instancias = quant
+
+    def draw(self):
+        '''
+        Desenha todas as instancias com uma unica chamada.
+        '''
+        if self.quant_instancias == 0:
+            return
+
+        estado_gl.use_program(self.program_ref)
+        estado_gl.bind_vertex_array(self.VAO)
+
+        if self.EBO is None:
+            gl.glDrawArraysInstanced(self.modo, 0, self.quant_vertices, self.quant_instancias)
+        else:
+            gl.glDrawElementsInstanced(self.modo, self.quant_indices, gl.GL_UNSIGNED_INT, None, self.quant_instancias)
+
+    def delete(self):
+
+        estado_gl.delete_vertex_arrays([self.VAO])
+        buffers = [self.VBO, self.VBO_instancias] + ([self.EBO] if self.EBO is not None else [])
+        estado_gl.delete_buffers(buffers)
@@ -0,0 +1,164 @@
+import time
+import ctypes
+import logging
+import collections
+import numpy as np
+import OpenGL.GL as gl # Funcoes da API OpenGL
+
+
+logger = logging.getLogger('instrumentacao')
+
+# Medidores de tempo por cena: nome da cena -> MedidorFrame
+medidores = {}
+
+
+class MedidorFrame:
+    '''
+    Mede o tempo de cada frame de uma cena no CPU (relogio de parede)
+    e na GPU (queries GL_TIME_ELAPSED).
+
+    As queries ficam em um anel de quant_queries objetos: o resultado de um frame
+    so e lido quando o anel volta a mesma query, alguns frames depois, e apenas se
+    ja estiver disponivel. Assim a medicao nunca espera a GPU terminar o frame.
+    '''
+
+    def __init__(self, nome_cena, janela = 300, quant_queries = 4, intervalo_log = 120, frames_aquecimento = 1):
+
+        self.nome_cena = nome_cena
+        self.quant_queries = quant_queries
+        self.intervalo_log = intervalo_log # a cada quantos frames uma linha de log e emitida (0 desativa)
+        self.frames_aquecimento = frames_aquecimento # primeiros frames (envio de dados, compilacao) ignorados
+
+        # Tempos em milissegundos dos ultimos "janela" frames
+        self.tempos_cpu = collections.deque(maxlen=janela)
+        self.tempos_gpu = collections.deque(maxlen=janela)
+
+        self.frames = 0
+        self.queries = None # criadas no primeiro frame, quando ja existe contexto OpenGL
+        self.pendentes = [False] * quant_queries
+        self.frame_query = [0] * quant_queries # frame medido por cada query do anel
+        self.indice = 0
+        self.inicio_cpu = 0.0
+        self.query_ativa = False
+
+    def _ler_query(self, i):
+        '''
+        Le o resultado da query i caso esteja disponivel, sem bloquear.
+        '''
+        query = int(self.queries[i])
+
+        if not gl.glGetQueryObjectiv(query, gl.GL_QUERY_RESULT_AVAILABLE):
+            return False
+
+        resultado = ctypes.c_uint64(0)
+        gl.glGetQueryObjectui64v(query, gl.GL_QUERY_RESULT, ctypes.byref(resultado))
+        self.pendentes[i] = False
+
+        if self.frame_query[i] >= self.frames_aquecimento:
+            self.tempos_gpu.append(resultado.value / 1e6) # ns -> ms
+
+        return True
+
+    def begin(self):
+
+        if self.queries is None:
+            self.queries = gl.glGenQueries(self.quant_queries)
+
+        # A query da vez ainda guarda o resultado de quant_queries frames atras
+        self.query_ativa = True
+        if self.pendentes[self.indice] and not self._ler_query(self.indice):
+            # GPU atrasada: este frame fica sem medicao na GPU para nao bloquear
+            self.query_ativa = False
+
+        if self.query_ativa:
+            gl.glBeginQuery(gl.GL_TIME_ELAPSED, int(self.queries[self.indice]))
+
+        self.inicio_cpu = time.perf_counter()
+
+    def end(self):
+
+        tempo_cpu = (time.perf_counter() - self.inicio_cpu) * 1000.0
+
+        if self.query_ativa:
+            gl.glEndQuery(gl.GL_TIME_ELAPSED)
+            self.pendentes[self.indice] = True
+            self.frame_query[self.indice] = self.frames
+            self.indice = (self.indice + 1) % self.quant_queries
+
+        self.frames += 1
+
+        if self.frames > self.frames_aquecimento:
+            self.tempos_cpu.append(tempo_cpu)
+
+        if self.intervalo_log and self.frames % self.intervalo_log == 0:
+            self.log()
+
+    def estatisticas(self):
+        '''
+        Retorna min/media/p95/p99 (em ms) dos tempos de CPU e GPU da janela atual.
+        '''
+        resultado = {'cena': self.nome_cena, 'frames': self.frames}
+
+        for nome, tempos in (('cpu', self.tempos_cpu), ('gpu', self.tempos_gpu)):
+            if not tempos:
+                resultado[nome] = None
+                continue
+
+            t = np.fromiter(tempos, dtype=np.float64)
+            p95, p99 = np.percentile(t, [95, 99])
+            resultado[nome] = {'min': float(t.min()), 'media': float(t.mean()), 'p95': float(p95), 'p99': float(p99)}
+
+        return resultado
+
+    def log(self):
+
+        est = self.estatisticas()
+        partes = []
+
+        for nome in ('cpu', 'gpu'):
+            if est[nome] is not None:
+                partes.append('{} min {:.3f} media {:.3f} p95 {:.3f} p99 {:.3f} ms'.format(nome.upper(), est[nome]['min'], est[nome]['media'], est[nome]['p95'], est[nome]['p99']))
+
+        logger.info('[%s] frame %d | %s', self.nome_cena, est['frames'], ' | '.join(partes))
+
+    def delete(self):
+
+        if self.queries is not None:
+            gl.glDeleteQueries(self.quant_queries, self.queries)
+            self.queries = None
+            self.pendentes = [False] * self.quant_queries
+
+
+def get_medidor(nome_cena, **kwargs):
+    '''
+    Retorna o medidor da cena, criando-o na primeira chamada.
+    '''
+    if nome_cena not in medidores:
+        medidores[nome_cena] = MedidorFrame(nome_cena, **kwargs)
+    return medidores[nome_cena]
+
+
+def instrumentar(display, nome_cena, **kwargs):
+    '''
+    Retorna uma versao de display() que mede o tempo de cada frame.
+    Uso: glut.glutDisplayFunc(instrumentacao.instrumentar(display, 'tarefa'))
+    '''
+    medidor = get_medidor(nome_cena, **kwargs)
+
+    def display_instrumentado():
+        medidor.begin()
+        try:
+            display()
+        finally:
+            medidor.end()
+
+    display_instrumentado.medidor = medidor
+
+    return display_instrumentado
+
+
+def estatisticas():
+    '''
+    Estatisticas de todas as cenas medidas: nome da cena -> dict.
+    '''
+    return {nome: medidor.estatisticas() for nome, medidor in medidores.items()}
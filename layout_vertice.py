@@ -0,0 +1,139 @@
+import ctypes
+import numpy as np
+import OpenGL.GL as gl # Funcoes da API OpenGL
+import estado_gl
+import programa
+
+
+# Tipo da variavel no shader -> (componentes, tipo OpenGL, dtype NumPy, atributo inteiro)
+# Atributos inteiros (int, ivecN, uint, uvecN) usam glVertexAttribIPointer: os valores
+# chegam ao shader sem conversao para float.
+tipos_atributo = {
+    'float': (1, gl.GL_FLOAT, np.float32, False),
+    'vec2': (2, gl.GL_FLOAT, np.float32, False),
+    'vec3': (3, gl.GL_FLOAT, np.float32, False),
+    'vec4': (4, gl.GL_FLOAT, np.float32, False),
+    'int': (1, gl.GL_INT, np.int32, True),
+    'ivec2': (2, gl.GL_INT, np.int32, True),
+    'ivec3': (3, gl.GL_INT, np.int32, True),
+    'ivec4': (4, gl.GL_INT, np.int32, True),
+    'uint': (1, gl.GL_UNSIGNED_INT, np.uint32, True),
+    'uvec2': (2, gl.GL_UNSIGNED_INT, np.uint32, True),
+    'uvec3': (3, gl.GL_UNSIGNED_INT, np.uint32, True),
+    'uvec4': (4, gl.GL_UNSIGNED_INT, np.uint32, True),
+}
+
+# atributos -> LayoutVertice, preenchido por get_layout()
+layouts = {}
+
+
+def tipo_float(componentes):
+    '''
+    Tipo do shader com componentes floats: 1 -> 'float', 3 -> 'vec3'.
+    '''
+    return 'float' if componentes == 1 else f'vec{componentes}'
+
+
+class LayoutVertice:
+    '''
+    Formato de vertice com atributos intercalados em um unico VBO, e.g.
+        LayoutVertice((('position', 'vec3'), ('cor', 'vec4'), ('uv', 'vec2'), ('normal', 'vec3')))
+    guarda cada vertice como | position | cor | uv | normal | (48 bytes).
+
+    Deslocamentos, stride e dtype sao calculados uma unica vez no construtor. Para cada
+    shader program, as chamadas glVertexAttribPointer/glVertexAttribIPointer (localizacao,
+    componentes, tipo, deslocamento) sao resolvidas na primeira configura() e guardadas no
+    Programa (ver programa.py); as seguintes apenas repetem a lista.
+
+    Uso:
+        formato = get_layout((('position', 'vec3'), ('cor', 'vec4')))
+        dados = formato.intercala(position=vertices, cor=cores)
+        upload.buffer_data(gl.GL_ARRAY_BUFFER, dados, gl.GL_STATIC_DRAW, dtype=formato.dtype)
+        formato.configura(program_ref, VBO)   # com o VAO vinculado
+    '''
+
+    def __init__(self, atributos):
+
+        self.atributos = tuple((nome, tipo) for nome, tipo in atributos)
+
+        # nome -> (componentes, tipo OpenGL, inteiro, deslocamento em bytes)
+        self.campos = {}
+        campos_dtype = []
+
+        deslocamento = 0
+        for nome, tipo in self.atributos:
+            if tipo not in tipos_atributo:
+                raise Exception(f'\n\nErro Shader : Variavel {nome} com tipo desconhecido = {tipo}.\n')
+            componentes, tipo_gl, dtype, inteiro = tipos_atributo[tipo]
+            self.campos[nome] = (componentes, tipo_gl, inteiro, deslocamento)
+            campos_dtype.append((nome, dtype, (componentes,)))
+            deslocamento += componentes * np.dtype(dtype).itemsize
+
+        self.stride = deslocamento # bytes entre dois vertices
+
+        # Um vertice como registro NumPy: arrays deste dtype tem exatamente os bytes do VBO
+        self.dtype = np.dtype(campos_dtype)
+
+    def intercala(self, **arrays):
+        '''
+        Monta o array de vertices intercalados a partir de um array por atributo
+        (mesmo nome do layout). Valores com uma unica linha sao repetidos em todos os vertices.
+        '''
+        arrays = {nome: np.asarray(array).reshape(-1, self.campos[nome][0]) for nome, array in arrays.items()}
+
+        dados = np.zeros(max(len(array) for array in arrays.values()), dtype=self.dtype)
+        for nome, array in arrays.items():
+            dados[nome] = array
+
+        return dados
+
+    def _compila(self, program_ref, obrigatorio):
+        '''
+        Resolve as localizacoes no programa e monta a lista de chamadas do layout.
+        '''
+        atributos = programa.get_programa(program_ref).atributos
+
+        chamadas = []
+        for nome, _ in self.atributos:
+            if nome not in atributos:
+                if obrigatorio:
+                    raise Exception(f'\n\nErro Shader : Variavel {nome} nao encontrada no shader.\n')
+                continue # o shader nao usa este atributo: os dados ficam no VBO sem leitura
+            componentes, tipo_gl, inteiro, deslocamento = self.campos[nome]
+            chamadas.append((atributos[nome].local, componentes, tipo_gl, inteiro, ctypes.c_void_p(deslocamento)))
+
+        return chamadas
+
+    def configura(self, program_ref, vbo_ref, divisor = 0, obrigatorio = True):
+        '''
+        Associa todos os atributos do layout, lidos de vbo_ref, ao VAO atualmente vinculado.
+            divisor: 0 avanca a cada vertice, 1 a cada instancia (glVertexAttribDivisor)
+            obrigatorio: se False, atributos que o shader nao declara sao ignorados
+        '''
+        descritores = programa.get_programa(program_ref).layouts
+        chave = (self, obrigatorio)
+        if chave not in descritores:
+            descritores[chave] = self._compila(program_ref, obrigatorio)
+
+        # Seleciona o Buffer
+        estado_gl.bind_buffer(gl.GL_ARRAY_BUFFER, vbo_ref)
+
+        for local, componentes, tipo_gl, inteiro, deslocamento in descritores[chave]:
+            if inteiro:
+                gl.glVertexAttribIPointer(local, componentes, tipo_gl, self.stride, deslocamento)
+            else:
+                gl.glVertexAttribPointer(local, componentes, tipo_gl, False, self.stride, deslocamento)
+            # Sempre enviado, inclusive 0: o divisor e estado do VAO e a mesma localizacao
+            # pode ter sido configurada antes como atributo por instancia
+            gl.glVertexAttribDivisor(local, divisor)
+            estado_gl.enable_vertex_attrib_array(local)
+
+
+def get_layout(atributos):
+    '''
+    Retorna o layout dos atributos ((nome, tipo), ...), criando-o na primeira chamada.
+    '''
+    chave = tuple((nome, tipo) for nome, tipo in atributos)
+    if chave not in layouts:
+        layouts[chave] = LayoutVertice(chave)
+    return layouts[chave]
@@ -0,0 +1,243 @@
+import ctypes
+import numpy as np
+import OpenGL.GL as gl # Funcoes da API OpenGL
+import upload
+import estado_gl
+import programa
+import layout_vertice
+
+
+def _concatena(arrays, componentes):
+    '''
+    Junta os arrays (quant_i, componentes) em um unico array float32 contiguo (ordem C).
+    np.concatenate sozinho segue a ordem de memoria das entradas (e.g. transpostas de
+    matrizes GLM), o que obrigaria uma segunda copia antes do envio.
+    '''
+    saida = np.empty((sum(len(a) for a in arrays), componentes), dtype=np.float32)
+    return np.concatenate(arrays, out=saida)
+
+
+def ordem_desenho(camadas, estados):
+    '''
+    Ordem de desenho (indices) das formas, agrupando por estado (shader program, modo, ...)
+    as formas de uma mesma camada para reduzir as trocas de estado.
+
+    camadas: camada de cada forma. Formas consecutivas com a mesma camada (diferente de
+        None) podem ser desenhadas em qualquer ordem entre si, e.g. formas que nao se
+        sobrepoem. Formas com camada None nunca mudam de posicao.
+    estados: chave de estado de cada forma. Dentro da camada os estados seguem a ordem da
+        sua primeira forma, e formas do mesmo estado mantem a ordem original.
+
+    A ordem entre camadas (e entre uma camada e as formas vizinhas) e sempre preservada.
+    '''
+    ordem = []
+    inicio = 0
+    while inicio < len(camadas):
+        fim = inicio + 1
+        if camadas[inicio] is not None:
+            while fim < len(camadas) and camadas[fim] == camadas[inicio]:
+                fim += 1
+        posicao = {}
+        for indice in range(inicio, fim):
+            posicao.setdefault(estados[indice], len(posicao))
+        ordem.extend(sorted(range(inicio, fim), key=lambda indice: (posicao[estados[indice]], indice)))
+        inicio = fim
+    return ordem
+
+
+class LoteGeometria:
+    '''
+    Agrupa os vertices de varias formas em um unico VBO (e um unico EBO para as
+    formas indexadas), guardando para cada forma o inicio e a quantidade de vertices.
+
+    No desenho, formas consecutivas de um mesmo shader program, de um mesmo modo de
+    primitiva (GL_TRIANGLES, GL_LINE_LOOP, ...) e ambas indexadas (ou ambas nao) sao
+    enviadas em uma unica chamada glMultiDrawArrays / glMultiDrawElements, em vez de uma
+    glDrawArrays por forma. A ordem de desenho e a ordem de add(): formas intercaladas
+    (e.g. triangulo, linha, triangulo) geram uma chamada por sequencia, a menos que
+    estejam em uma mesma camada (add(camada=)), cujas formas sao agrupadas por shader
+    program e modo (ordem_desenho) antes do envio.
+
+    Opcionalmente cada forma recebe uma cor RGBA, enviada como atributo de vertice
+    (var_cor em build) intercalado com a posicao no mesmo VBO. Assim um unico shader
+    program desenha formas de cores diferentes, sem trocar de program entre elas.
+
+    Uso:
+        lote = LoteGeometria()
+        lote.add(vertices_hex, gl.GL_LINE_LOOP, shaderProgramRef)
+        lote.add(vertices_tri, gl.GL_TRIANGLES, shaderProgramRef)
+        lote.build('position')   # uma vez, na inicializacao
+        lote.draw()              # a cada frame
+    '''
+
+    def __init__(self):
+
+        self.formas = [] # (vertices, indices ou None, modo, program_ref, cor, camada)
+        self.componentes = None # componentes por vertice, iguais em todas as formas
+
+        self.VAO = None
+        self.VBO = None
+        self.EBO = None
+
+        # Sequencias de formas consecutivas com o mesmo (program_ref, modo, indexada), na
+        # ordem de desenho: (program_ref, modo, indexada, firsts ou counts, counts ou offsets)
+        self.sequencias = []
+
+    def add(self, vertices, modo, program_ref, indices = None, cor = (1.0, 1.0, 1.0, 1.0), camada = None):
+        '''
+        Adiciona uma forma ao lote e retorna o seu indice.
+        vertices: array (quant_vertices, componentes) ou matriz GLM (um vertice por coluna).
+            Todas as formas do lote devem ter a mesma quantidade de componentes.
+        indices: opcional, relativos a forma.
+        cor: RGBA da forma, usada apenas se build receber var_cor.
+        camada: opcional. Formas consecutivas da mesma camada podem ser reordenadas entre si
+            para reduzir trocas de shader program (ver ordem_desenho).
+        '''
+        if self.VAO is not None:
+            raise RuntimeError('Lote ja enviado para a GPU. Crie um novo lote para adicionar formas.')
+
+        vertices = upload.as_array(vertices)
+        if indices is not None:
+            indices = upload.as_array(indices, np.uint32).ravel()
+
+        # Todas as formas vao para o mesmo VBO, com um unico formato de vertice: uma forma
+        # de outra largura seria reinterpretada por reshape (e.g. vec2 lido como vec3)
+        if vertices.ndim > 1:
+            if self.componentes is None:
+                self.componentes = vertices.shape[-1]
+            elif vertices.shape[-1] != self.componentes:
+                raise ValueError(f'Forma com {vertices.shape[-1]} componentes por vertice; as formas do lote tem {self.componentes}.')
+
+        self.formas.append((vertices, indices, modo, program_ref, cor, camada))
+
+        return len(self.formas) - 1
+
+    def build(self, var_in_program, var_cor = None):
+        '''
+        Envia todos os vertices (e indices) para a GPU e monta as tabelas de desenho.
+        Todos os shader programs do lote devem declarar var_in_program (e var_cor,
+        se informada) na mesma localizacao.
+        '''
+        if not self.formas:
+            raise RuntimeError('Lote vazio.')
+
+        componentes = self.componentes or 3 # formas apenas com arrays de uma dimensao: vec3
+
+        for vertices, *_ in self.formas:
+            if vertices.size % componentes != 0:
+                raise ValueError(f'Forma com {vertices.size} valores, que nao formam vertices de {componentes} componentes.')
+
+        lista_vertices = []
+        lista_cores = []
+        lista_indices = []
+        quant_vertices = 0
+        quant_indices = 0
+
+        sequencias = []
+
+        ordem = ordem_desenho([forma[5] for forma in self.formas],
+                              [(forma[3], forma[2], forma[1] is not None) for forma in self.formas])
+
+        for vertices, indices, modo, program_ref, cor, _ in (self.formas[indice] for indice in ordem):
+
+            vertices = vertices.reshape(-1, componentes)
+            lista_vertices.append(vertices)
+            lista_cores.append(np.broadcast_to(np.asarray(cor, dtype=np.float32), (len(vertices), 4)))
+
+            # Uma nova sequencia sempre que o estado muda em relacao a forma anterior
+            chave = (program_ref, modo, indices is not None)
+            if not sequencias or sequencias[-1][:3] != chave:
+                sequencias.append(chave + ([], []))
+
+            if indices is None:
+                firsts, counts = sequencias[-1][3:]
+                firsts.append(quant_vertices)
+                counts.append(len(vertices))
+            else:
+                # Indices deslocados para o inicio da forma no VBO compartilhado
+                lista_indices.append(indices + quant_vertices)
+                counts, offsets = sequencias[-1][3:]
+                counts.append(len(indices))
+                offsets.append(quant_indices * 4) # GL_UNSIGNED_INT: 4 bytes por indice
+                quant_indices += len(indices)
+
+            quant_vertices += len(vertices)
+
+        atributos = [(var_in_program, layout_vertice.tipo_float(componentes))]
+        if var_cor is not None:
+            atributos.append((var_cor, 'vec4'))
+        for nome, _ in atributos:
+            self._local(nome)
+        formato = layout_vertice.get_layout(atributos)
+
+        if var_cor is None:
+            dados = _concatena(lista_vertices, componentes)
+        else:
+            # Posicao e cor de cada vertice intercaladas (a cor da forma repetida em todos os
+            # seus vertices), escritas direto nos campos do array, sem arrays intermediarios
+            dados = np.empty(quant_vertices, dtype=formato.dtype)
+            np.concatenate(lista_vertices, out=dados[var_in_program])
+            np.concatenate(lista_cores, out=dados[var_cor])
+
+        self.VAO = estado_gl.gen_vertex_arrays(1)
+        estado_gl.bind_vertex_array(self.VAO)
+
+        # Um unico VBO com os vertices de todas as formas
+        self.VBO = estado_gl.gen_buffers(1)
+        estado_gl.bind_buffer(gl.GL_ARRAY_BUFFER, self.VBO)
+        upload.buffer_data(gl.GL_ARRAY_BUFFER, dados, gl.GL_STATIC_DRAW, dtype=dados.dtype)
+        formato.configura(self.formas[0][3], self.VBO)
+
+        # Um unico EBO com os indices de todas as formas indexadas
+        if lista_indices:
+            self.EBO = estado_gl.gen_buffers(1)
+            estado_gl.bind_buffer(gl.GL_ELEMENT_ARRAY_BUFFER, self.EBO)
+            upload.buffer_data(gl.GL_ELEMENT_ARRAY_BUFFER, np.concatenate(lista_indices), gl.GL_STATIC_DRAW, dtype=np.uint32)
+
+        estado_gl.bind_vertex_array(0) # Importante: Unbind do VAO primeiro
+        estado_gl.bind_buffer(gl.GL_ARRAY_BUFFER, 0)
+        estado_gl.bind_buffer(gl.GL_ELEMENT_ARRAY_BUFFER, 0)
+
+        # Tabelas prontas para o glMultiDraw*, convertidas uma unica vez
+        for program_ref, modo, indexada, a, b in sequencias:
+            if indexada:
+                tabela = (np.array(a, dtype=np.int32), (ctypes.c_void_p * len(b))(*b))
+            else:
+                tabela = (np.array(a, dtype=np.int32), np.array(b, dtype=np.int32))
+            self.sequencias.append((program_ref, modo, indexada) + tabela)
+
+        # Os dados ja estao na GPU
+        self.formas = []
+
+    def _local(self, var_in_program):
+        '''
+        Localizacao da variavel do shader, que deve ser a mesma em todos os programs do lote.
+        '''
+        locais = {programa.get_programa(forma[3]).atributo(var_in_program) for forma in self.formas}
+        if len(locais) > 1:
+            raise Exception(f'\n\nErro Shader : Variavel {var_in_program} em localizacoes diferentes entre os shader programs do lote.\n')
+        return locais.pop()
+
+    def draw(self):
+        '''
+        Desenha todas as formas, na ordem de ordem_desenho: uma chamada por sequencia de
+        formas consecutivas com o mesmo shader program e modo de primitiva.
+        '''
+        estado_gl.bind_vertex_array(self.VAO)
+
+        for program_ref, modo, indexada, a, b in self.sequencias:
+
+            estado_gl.use_program(program_ref) # so chama glUseProgram se o program mudar
+
+            if indexada:
+                gl.glMultiDrawElements(modo, a, gl.GL_UNSIGNED_INT, b, len(a))
+            else:
+                gl.glMultiDrawArrays(modo, a, b, len(b))
+
+    def delete(self):
+
+        estado_gl.delete_vertex_arrays([self.VAO])
+        for buffer in (self.VBO, self.EBO):
+            if buffer is not None:
+                estado_gl.delete_buffers([buffer])
+        self.VAO = self.VBO = self.EBO = None
@@ -0,0 +1,146 @@
+import numpy as np
+import OpenGL.GL as gl # Funcoes da API OpenGL
+import formas
+import upload
+import estado_gl
+import layout_vertice
+
+
+def index_type_gl(quant_vertices):
+    '''
+    Retorna (dtype NumPy, tipo OpenGL) dos indices para quant_vertices vertices:
+    GL_UNSIGNED_SHORT (2 bytes) quando possivel, senao GL_UNSIGNED_INT (4 bytes).
+    '''
+    dtype = formas.index_dtype(quant_vertices)
+
+    if dtype == np.uint16:
+        return dtype, gl.GL_UNSIGNED_SHORT
+    return dtype, gl.GL_UNSIGNED_INT
+
+
+def _hash_vertices(palavras):
+    '''
+    Hash de 64 bits de cada linha de palavras (quant_vertices, componentes) uint32.
+    Com ate 2 componentes o valor e exato (as duas palavras lado a lado).
+    '''
+    palavras = palavras.astype(np.uint64)
+
+    if palavras.shape[1] <= 2:
+        h = palavras[:, 0].copy()
+        if palavras.shape[1] == 2:
+            h |= palavras[:, 1] << np.uint64(32)
+        return h
+
+    # FNV-1a por palavra (a multiplicacao em uint64 descarta o excesso, como esperado)
+    h = np.full(len(palavras), 0xCBF29CE484222325, dtype=np.uint64)
+    primo = np.uint64(0x100000001B3)
+    for c in range(palavras.shape[1]):
+        h ^= palavras[:, c]
+        h *= primo
+    return h
+
+
+def _agrupa(chave):
+    '''
+    Agrupa valores iguais de chave (1D). Retorna (primeiro, inverso):
+    primeiro[g] e a primeira posicao do grupo g e inverso[i] o grupo da posicao i.
+    Equivale a np.unique(return_index, return_inverse), mas com argsort nao estavel,
+    que e varias vezes mais rapido para milhoes de valores.
+    '''
+    ordem = np.argsort(chave)
+    ordenada = chave[ordem]
+
+    inicio_grupo = np.empty(len(chave), dtype=bool)
+    inicio_grupo[:1] = True
+    np.not_equal(ordenada[1:], ordenada[:-1], out=inicio_grupo[1:])
+
+    inverso = np.empty(len(chave), dtype=np.intp)
+    inverso[ordem] = np.cumsum(inicio_grupo) - 1
+
+    # Sem ordenacao estavel, a primeira ocorrencia e o menor indice de cada grupo
+    primeiro = np.minimum.reduceat(ordem, np.flatnonzero(inicio_grupo))
+
+    return primeiro, inverso
+
+
+def build_indexed(triangulos, tolerancia = None):
+    '''
+    Converte uma lista de triangulos (triangle soup), em que vertices compartilhados
+    aparecem repetidos, em vertices unicos + indices.
+        triangulos: (quant_triangulos * 3, componentes) ou (quant_triangulos, 3, componentes)
+        tolerancia: se informada, cada componente e arredondado para o multiplo de
+                    "tolerancia" mais proximo (uma grade), e vertices que caem no mesmo
+                    ponto da grade sao considerados iguais. Nao e uma busca de vizinhos:
+                    dois vertices muito proximos mas arredondados para pontos vizinhos da
+                    grade (e.g. 0.49 e 0.51 com tolerancia 1) continuam separados
+    Retorna (vertices (quant_unicos, componentes) float32, indices uint16/uint32).
+    Os vertices unicos ficam na ordem em que aparecem pela primeira vez.
+    '''
+    vertices = np.ascontiguousarray(triangulos, dtype=np.float32)
+    componentes = vertices.shape[-1]
+    vertices = vertices.reshape(-1, componentes)
+
+    if tolerancia is None:
+        # + 0.0 transforma -0.0 em 0.0, que tem outra representacao em bytes
+        chave = vertices + np.float32(0.0)
+    else:
+        # Indice do ponto da grade de cada componente
+        chave = np.round(vertices / tolerancia).astype(np.int32)
+
+    chave = np.ascontiguousarray(chave)
+    palavras = chave.view(np.uint32).reshape(-1, componentes)
+
+    # Cada vertice vira um hash de 64 bits: ordenar inteiros e bem mais rapido que
+    # comparar linhas (np.unique com axis=0)
+    primeiro, inverso = _agrupa(_hash_vertices(palavras))
+
+    # Confere se vertices diferentes cairam no mesmo hash (colisao); nesse caso usa os bytes completos
+    if not np.array_equal(palavras[primeiro[inverso]], palavras):
+        chave_bytes = chave.view(np.dtype((np.void, chave.dtype.itemsize * componentes))).ravel()
+        _, primeiro, inverso = np.unique(chave_bytes, return_index=True, return_inverse=True)
+        inverso = inverso.ravel()
+
+    # Os grupos saem na ordem dos valores; renumera pela primeira ocorrencia para manter
+    # a localidade dos vertices (sem ordenar: a mascara ja esta na ordem original)
+    eh_primeiro = np.zeros(len(vertices), dtype=bool)
+    eh_primeiro[primeiro] = True
+    nova_posicao = (np.cumsum(eh_primeiro) - 1)[primeiro]
+
+    unicos = vertices[eh_primeiro]
+    dtype, _ = index_type_gl(len(unicos))
+    indices = nova_posicao[inverso].astype(dtype)
+
+    return unicos, indices
+
+
+def upload_indexed(vertices, indices, program_ref, var_in_program):
+    '''
+    Cria VAO, VBO e EBO para uma malha indexada e associa os vertices a variavel do shader.
+    Retorna (VAO, VBO, EBO, quant_indices, tipo_indice_gl), prontos para:
+        estado_gl.bind_vertex_array(VAO)
+        gl.glDrawElements(gl.GL_TRIANGLES, quant_indices, tipo_indice_gl, None)
+    '''
+    vertices = upload.as_array(vertices)
+    dtype, tipo_indice = index_type_gl(len(vertices))
+    indices = upload.as_array(indices, dtype).ravel()
+
+    formato = layout_vertice.get_layout(((var_in_program, layout_vertice.tipo_float(vertices.shape[-1])),))
+
+    VAO = estado_gl.gen_vertex_arrays(1)
+    estado_gl.bind_vertex_array(VAO)
+
+    VBO = estado_gl.gen_buffers(1)
+    estado_gl.bind_buffer(gl.GL_ARRAY_BUFFER, VBO)
+    upload.buffer_data(gl.GL_ARRAY_BUFFER, vertices, gl.GL_STATIC_DRAW)
+    formato.configura(program_ref, VBO)
+
+    # O EBO fica registrado no VAO
+    EBO = estado_gl.gen_buffers(1)
+    estado_gl.bind_buffer(gl.GL_ELEMENT_ARRAY_BUFFER, EBO)
+    upload.buffer_data(gl.GL_ELEMENT_ARRAY_BUFFER, indices, gl.GL_STATIC_DRAW, dtype=dtype)
+
+    estado_gl.bind_vertex_array(0) # Importante: Unbind do VAO primeiro
+    estado_gl.bind_buffer(gl.GL_ARRAY_BUFFER, 0)
+    estado_gl.bind_buffer(gl.GL_ELEMENT_ARRAY_BUFFER, 0)
+
+    return VAO, VBO, EBO, len(indices), tipo_indice
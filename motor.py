@@ -0,0 +1,413 @@
+import os
+import sys
+import json
+import logging
+import numpy as np
+import OpenGL.GL as gl # Funcoes da API OpenGL
+import cache_shader # Cache em disco dos shader programs ja linkados
+import instrumentacao # Tempo de CPU/GPU de cada frame
+import lote # Varias formas em um unico VBO e uma chamada de desenho
+import estado_gl # Cache do estado OpenGL (evita vinculos repetidos)
+import programa # Atributos e uniforms do shader program enumerados uma unica vez
+
+
+# Diretorio com as descricoes das cenas de exemplo
+diretorio_cenas = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cenas')
+
+# Extensoes aceitas para arquivos de cena
+extensoes_cena = ('.json', '.toml')
+
+# Versao GLSL adicionada aos shaders que nao declaram #version
+versao_glsl_padrao = '#version 330\n'
+
+# Geradores de formas.py que podem ser usados como fonte de vertices.
+# formas e importador so sao importados pelas cenas que os usam
+geradores = ('regular_polygons', 'circles', 'rectangles', 'rings')
+
+
+def eh_arquivo_cena(nome):
+
+    return isinstance(nome, str) and os.path.splitext(nome)[1].lower() in extensoes_cena
+
+
+def arquivo_cena(nome):
+    '''
+    Arquivo de uma cena de exemplo pelo nome (e.g. 'tarefa' -> cenas/tarefa.json).
+    Um arquivo de cena e retornado como esta.
+    '''
+    if eh_arquivo_cena(nome):
+        return nome
+    return os.path.join(diretorio_cenas, nome + '.json')
+
+
+def read_descricao(caminho):
+    '''
+    Le a descricao da cena (JSON, ou TOML a partir do Python 3.11) como dict.
+    '''
+    if os.path.splitext(caminho)[1].lower() == '.toml':
+        import tomllib # so no Python 3.11+, e apenas para cenas TOML
+        with open(caminho, 'rb') as arquivo:
+            return tomllib.load(arquivo)
+
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def _codigo(fonte):
+    '''
+    Codigo GLSL em uma string ou em uma lista de linhas (mais legivel em JSON).
+    '''
+    return fonte if isinstance(fonte, str) else '\n'.join(fonte) + '\n'
+
+
+def _modo(nome):
+
+    modo = getattr(gl, nome, None) if isinstance(nome, str) and nome.startswith('GL_') else None
+    if modo is None:
+        raise ValueError(f'Modo de primitiva desconhecido = {nome}. Use GL_TRIANGLES, GL_LINE_LOOP, ...')
+    return modo
+
+
+def init_shader(codigo_shader, tipo_shader):
+    '''
+    Compila um shader; em caso de erro relanca a mensagem do driver.
+    '''
+    shader_object = gl.glCreateShader(tipo_shader)
+    gl.glShaderSource(shader_object, codigo_shader)
+    gl.glCompileShader(shader_object)
+
+    if not gl.glGetShaderiv(shader_object, gl.GL_COMPILE_STATUS):
+        mensagem_erro = gl.glGetShaderInfoLog(shader_object).decode('utf-8')
+        gl.glDeleteShader(shader_object)
+        raise RuntimeError(mensagem_erro)
+
+    return shader_object
+
+
+def init_shader_program(vertex_shader_codigo, fragment_shader_codigo, glsl_version_str = versao_glsl_padrao):
+    '''
+    Retorna o shader program dos dois codigos, recuperado do cache em disco
+    (cache_shader) ou compilado e linkado uma unica vez e entao guardado no cache.
+    '''
+    # Codigos que ja declaram a versao (#version 330 core) sao usados como estao
+    if vertex_shader_codigo.lstrip().startswith('#version'):
+        glsl_version_str = ''
+
+    chave = cache_shader.chave_programa(vertex_shader_codigo, fragment_shader_codigo, glsl_version_str)
+    shaderProgram = cache_shader.load_program(chave)
+
+    if shaderProgram is None:
+        vertex_shader_object = init_shader(glsl_version_str + vertex_shader_codigo, gl.GL_VERTEX_SHADER)
+        fragment_shader_object = init_shader(glsl_version_str + fragment_shader_codigo, gl.GL_FRAGMENT_SHADER)
+
+        shaderProgram = gl.glCreateProgram()
+        gl.glAttachShader(shaderProgram, vertex_shader_object)
+        gl.glAttachShader(shaderProgram, fragment_shader_object)
+
+        # Permite recuperar o binario do programa apos o link
+        gl.glProgramParameteri(shaderProgram, gl.GL_PROGRAM_BINARY_RETRIEVABLE_HINT, gl.GL_TRUE)
+        gl.glLinkProgram(shaderProgram)
+
+        gl.glDeleteShader(vertex_shader_object)
+        gl.glDeleteShader(fragment_shader_object)
+
+        if not gl.glGetProgramiv(shaderProgram, gl.GL_LINK_STATUS):
+            mensagem_erro = gl.glGetProgramInfoLog(shaderProgram).decode('utf-8')
+            gl.glDeleteProgram(shaderProgram)
+            raise RuntimeError(mensagem_erro)
+
+        cache_shader.save_program(chave, shaderProgram)
+
+    # Enumera atributos e uniforms uma unica vez
+    programa.get_programa(shaderProgram)
+
+    return shaderProgram
+
+
+class Cena:
+    '''
+    Cena descrita por dados (JSON ou TOML) em vez de um script:
+
+        {
+          "titulo": "HEXAGONO",
+          "janela": [400, 400],
+          "fundo": [0.5, 0.5, 0.5, 1.0],
+          "atributos": {"posicao": "position", "cor": null},
+          "shaders": {
+            "vermelho": {"vertex": [...linhas GLSL...], "fragment": [...], "uniforms": {"muda_cor": 0}}
+          },
+          "formas": [
+            {"shader": "vermelho", "modo": "GL_LINE_LOOP", "vertices": [[0.5, 0.5, 0.0], ...]},
+            {"shader": "vermelho", "modo": "GL_TRIANGLES", "gerador": {"funcao": "circles", "centros": [[0, 0]], "raios": 0.2}},
+            {"shader": "vermelho", "modo": "GL_TRIANGLES", "arquivo": "malha.obj", "cor": [1, 0, 0, 1]}
+          ],
+          "teclas": {"a": {"vermelho": {"muda_cor": 1}}},
+          "animacao": {"uniform": "tempo", "passo": 0.008333, "fps": 60, "vsync": true}
+        }
+
+    Fontes de vertices de cada forma: "vertices" (e "indices") no proprio arquivo, "gerador"
+    (uma funcao de formas.py com os seus argumentos) ou "arquivo" (malha OBJ/PLY, relativo ao
+    arquivo da cena). "cor" vira atributo de vertice se "atributos.cor" for informado.
+    "camada" (opcional) marca formas consecutivas que podem ser desenhadas em qualquer ordem
+    entre si (e.g. que nao se sobrepoem); elas sao agrupadas por shader e modo de primitiva
+    para reduzir as trocas de shader program (lote.ordem_desenho).
+    "teclas" altera uniforms de um shader quando a tecla e pressionada na janela.
+    "cor_software" (opcional) e a cor RGBA que o fragment shader produz, usada apenas
+    por render_software().
+    "animacao" (opcional) anima a cena na janela com animacao.LoopAnimacao: a cada passo
+    da simulacao o tempo simulado, em segundos, vai para o uniform float "uniform" dos
+    shaders que o declaram.
+
+    init_scene() compila cada shader uma unica vez e envia todas as formas para um unico
+    lote.LoteGeometria: um VBO (e um EBO) para a cena inteira, e em render() uma chamada
+    glMultiDraw* por sequencia de formas consecutivas com o mesmo shader e modo de
+    primitiva, na ordem das formas (exceto dentro de uma "camada").
+    Tem a mesma interface dos modulos de cena (init_scene, render), entao pode ser usada
+    por offscreen.render_frames e pelo benchmark.
+    '''
+
+    def __init__(self, descricao, diretorio = '.', nome = 'cena'):
+
+        self.descricao = descricao
+        self.diretorio = diretorio
+        self.nome = descricao.get('nome', nome)
+        self.titulo = descricao.get('titulo', self.nome)
+        self.largura, self.altura = descricao.get('janela', (400, 400))
+        self.fundo = tuple(descricao.get('fundo', (0.5, 0.5, 0.5, 1.0)))
+
+        atributos = descricao.get('atributos', {})
+        self.var_posicao = atributos.get('posicao', 'position')
+        self.var_cor = atributos.get('cor')
+
+        for indice, forma in enumerate(descricao.get('formas', [])):
+            if forma.get('shader') not in descricao.get('shaders', {}):
+                raise ValueError(f'{self.nome}: forma {indice} usa o shader desconhecido {forma.get("shader")}.')
+            _modo(forma.get('modo', 'GL_TRIANGLES'))
+
+        self.programas = {} # nome do shader -> program_ref
+        self.loteRef = None
+        self.formas_software = None # (vertices, indices, modo, cor) de cada forma, para render_software
+
+        self.animacao = descricao.get('animacao')
+        self.tempo = 0.0 # tempo simulado da animacao, em segundos
+
+    def _vertices(self, forma):
+        '''
+        (vertices, indices ou None) de uma forma a partir da sua fonte.
+        '''
+        if 'vertices' in forma:
+            indices = forma.get('indices')
+            return np.asarray(forma['vertices'], dtype=np.float32), None if indices is None else np.asarray(indices, dtype=np.uint32)
+
+        if 'gerador' in forma:
+            import formas # Geradores vetorizados de formas
+            argumentos = dict(forma['gerador'])
+            funcao = argumentos.pop('funcao')
+            if funcao not in geradores:
+                raise ValueError(f'{self.nome}: gerador desconhecido = {funcao}. Use um de {list(geradores)}.')
+            return getattr(formas, funcao)(**argumentos)
+
+        if 'arquivo' in forma:
+            import importador # Leitura de malhas OBJ/PLY
+            blocos = list(importador.read_malha(os.path.join(self.diretorio, forma['arquivo'])))
+            return np.concatenate([v for v, _ in blocos]), np.concatenate([i for _, i in blocos])
+
+        raise ValueError(f'{self.nome}: forma sem vertices (use "vertices", "gerador" ou "arquivo").')
+
+    def init_scene(self):
+        '''
+        Cria os recursos OpenGL da cena. Requer um contexto OpenGL ativo,
+        seja de uma janela GLUT ou do backend offscreen.
+        '''
+        self.init_shaders()
+        self.init_buffers()
+
+    def init_shaders(self):
+
+        shaders = self.descricao.get('shaders', {})
+
+        # Cada shader e compilado uma unica vez, mesmo se usado por varias formas
+        self.programas = {}
+        for nome, shader in shaders.items():
+            self.programas[nome] = init_shader_program(_codigo(shader['vertex']), _codigo(shader['fragment']),
+                                                       shader.get('versao', versao_glsl_padrao))
+            self.set_uniforms(nome, shader.get('uniforms', {}))
+
+    def init_buffers(self):
+
+        # Todas as formas em um unico VBO; a ordem das formas e a ordem de desenho
+        self.loteRef = lote.LoteGeometria()
+        for forma in self.descricao.get('formas', []):
+            vertices, indices = self._vertices(forma)
+            self.loteRef.add(vertices, _modo(forma.get('modo', 'GL_TRIANGLES')), self.programas[forma['shader']],
+                             indices=indices, cor=tuple(forma.get('cor', (1.0, 1.0, 1.0, 1.0))), camada=forma.get('camada'))
+        self.loteRef.build(self.var_posicao, var_cor=self.var_cor)
+
+    def set_uniforms(self, shader, uniforms):
+        '''
+        Envia os valores {nome: valor} aos uniforms do shader (valores repetidos sao ignorados
+        por programa.Programa.set_uniform).
+        '''
+        reflexao = programa.get_programa(self.programas[shader])
+        for nome, valor in uniforms.items():
+            variavel = reflexao.uniforms.get(nome)
+            matriz = variavel is not None and variavel.tipo in programa.funcoes_uniform_matriz
+            if isinstance(valor, (list, tuple)) and not matriz:
+                reflexao.set_uniform(nome, *valor)
+            else:
+                reflexao.set_uniform(nome, valor)
+
+    def render(self):
+        '''
+        Desenha a cena no framebuffer atual, sem trocar os buffers da janela.
+        '''
+        gl.glClearColor(*self.fundo)
+        gl.glClear(gl.GL_COLOR_BUFFER_BIT)
+
+        estado_gl.inicio_frame()
+
+        self.loteRef.draw()
+
+    def atualiza(self, passo):
+        '''
+        Avanca a animacao em passo segundos (chamada por animacao.LoopAnimacao).
+        '''
+        self.tempo += passo
+
+        nome = self.animacao['uniform']
+        for shader, program_ref in self.programas.items():
+            if nome in programa.get_programa(program_ref).uniforms:
+                self.set_uniforms(shader, {nome: self.tempo})
+
+    def render_software(self, raster):
+        '''
+        Desenha a cena em um rasterizador.Rasterizador, sem OpenGL. Cada forma tem uma unica
+        cor: a "cor" da forma, se a cena usa atributos.cor, ou a "cor_software" do seu shader.
+        '''
+        if self.formas_software is None:
+            shaders = self.descricao.get('shaders', {})
+            formas = self.descricao.get('formas', [])
+            software = []
+            for indice, forma in enumerate(formas):
+                cor = forma.get('cor') if self.var_cor is not None else None
+                if cor is None:
+                    cor = shaders[forma['shader']].get('cor_software')
+                if cor is None:
+                    raise ValueError(f'{self.nome}: forma {indice} sem cor para o rasterizador (use "cor_software" no shader {forma["shader"]}).')
+                vertices, indices = self._vertices(forma)
+                software.append((vertices, indices, _modo(forma.get('modo', 'GL_TRIANGLES')), cor))
+
+            # A mesma ordem de desenho do lote, para o mesmo resultado nas formas sobrepostas
+            ordem = lote.ordem_desenho([forma.get('camada') for forma in formas],
+                                       [(forma['shader'], modo, indices is not None)
+                                        for forma, (_, indices, modo, _) in zip(formas, software)])
+            self.formas_software = [software[indice] for indice in ordem]
+
+        raster.clear(self.fundo)
+        for vertices, indices, modo, cor in self.formas_software:
+            raster.draw(vertices, modo, cor, indices=indices)
+
+    def keyboard(self, key):
+        '''
+        Aplica os uniforms associados a tecla. Retorna True se a cena mudou.
+        '''
+        acao = self.descricao.get('teclas', {}).get(key.decode('utf-8', 'replace'))
+        if acao is None:
+            return False
+
+        for shader, uniforms in acao.items():
+            self.set_uniforms(shader, uniforms)
+        return True
+
+    def delete(self):
+
+        if self.loteRef is not None:
+            self.loteRef.delete()
+            self.loteRef = None
+
+
+def load_cena(caminho):
+    '''
+    Cria a Cena a partir do arquivo (e.g. 'cenas/tarefa.json').
+    '''
+    nome = os.path.splitext(os.path.basename(caminho))[0]
+    return Cena(read_descricao(caminho), os.path.dirname(os.path.abspath(caminho)), nome)
+
+
+def main_opengl(caminho, fases = None):
+    '''
+    Abre a cena em uma janela GLUT: o mesmo laco de todos os scripts, para qualquer cena.
+    fases (opcional, producao.Fases) recebe o tempo de cada etapa ate o primeiro frame.
+    '''
+    import OpenGL.GLUT as glut # so e necessario com janela
+    import redesenho # Redesenho sob demanda
+
+    cena = load_cena(caminho)
+
+    glut.glutInit()
+    glut.glutInitDisplayMode(glut.GLUT_DOUBLE | glut.GLUT_RGBA)
+    glut.glutInitWindowSize(cena.largura, cena.altura)
+    glut.glutCreateWindow(cena.titulo)
+
+    if fases is not None:
+        fases.marca('janela')
+    cena.init_shaders()
+    if fases is not None:
+        fases.marca('shaders')
+    cena.init_buffers()
+    if fases is not None:
+        fases.marca('buffers')
+
+    loop = None # animacao.LoopAnimacao das cenas animadas
+
+    def display():
+        cena.render()
+        if loop is not None:
+            loop.swap() # registra o frame apresentado
+        else:
+            glut.glutSwapBuffers()
+
+        nonlocal fases
+        if fases is not None:
+            gl.glFinish() # apenas no primeiro frame: o tempo inclui o trabalho da GPU
+            fases.marca('primeiro frame')
+            fases.relatorio()
+            fases = None
+
+    def reshape(width, height):
+        gl.glViewport(0, 0, width, height)
+
+    def keyboard(key, x, y):
+        print("TECLA PRESSIONADA: {}".format(key))
+        if key == b'\x1b': # ESC
+            sys.exit()
+        if cena.keyboard(key):
+            agendador.invalida()
+
+    glut.glutReshapeFunc(reshape)
+    # display() instrumentado: estatisticas de tempo por frame a cada 120 frames no log
+    logging.basicConfig(level=logging.INFO)
+    # Redesenha apenas quando a cena muda (invalida), no maximo 60 vezes por segundo.
+    # Nas cenas animadas o ritmo e dado pelo laco de animacao
+    agendador = redesenho.Agendador(instrumentacao.instrumentar(display, cena.nome),
+                                    fps_maximo=None if cena.animacao is not None else 60)
+    glut.glutDisplayFunc(agendador.display)
+    glut.glutKeyboardFunc(keyboard)
+
+    if cena.animacao is not None:
+        import animacao # Laco de animacao com passo fixo, apenas para cenas animadas
+        # Cada tick do laco simula os passos pendentes e invalida a cena
+        loop = animacao.LoopAnimacao(cena.atualiza, agendador.invalida, passo=cena.animacao.get('passo', 1.0 / 120.0),
+                                     fps_alvo=cena.animacao.get('fps', 60), vsync=cena.animacao.get('vsync'))
+        loop.start()
+
+    glut.glutMainLoop()
+
+
+if __name__ == '__main__':
+
+    if len(sys.argv) != 2:
+        print("Uso: python motor.py cenas/<cena>.json")
+        sys.exit(1)
+
+    main_opengl(sys.argv[1])
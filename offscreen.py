@@ -0,0 +1,285 @@
+import os
+import sys
+import ctypes
+import argparse
+
+# O PyOpenGL escolhe a plataforma (GLX, EGL ou OSMesa) no primeiro import de OpenGL.
+# Por isso este modulo deve ser importado antes de qualquer modulo que importe OpenGL.
+# Sem janela, o padrao e EGL; PYOPENGL_PLATFORM=osmesa seleciona o OSMesa.
+os.environ.setdefault('PYOPENGL_PLATFORM', 'egl')
+
+import numpy as np
+import OpenGL.GL as gl # Funcoes da API OpenGL
+import motor
+import estado_gl
+import programa
+
+
+# Extensao EGL_MESA_platform_surfaceless: display EGL sem servidor de janelas
+EGL_PLATFORM_SURFACELESS_MESA = 0x31DD
+
+# Cenas de exemplo (cenas/<nome>.json, abertas em janela pelo script <nome>.py)
+cenas = ['tarefa', 'hexagono_triangulo', 'quadrado_triangulo', 'dois_triangulos', 'quadrado_com_EBO']
+
+
+class ContextoOffscreen:
+    '''
+    Contexto OpenGL sem janela com um framebuffer object (FBO) de cor
+    do tamanho largura x altura, usado no lugar da janela GLUT.
+
+    EGL e OSMesa criam o mesmo contexto: OpenGL 3.3 com perfil de compatibilidade, o mesmo
+    da janela GLUT (que nao pede um perfil). Assim o codigo que funciona na janela funciona
+    sem janela, inclusive funcoes que o perfil core removeu.
+    '''
+
+    def __init__(self, largura, altura, backend = None):
+
+        self.largura = largura
+        self.altura = altura
+        self.backend = backend or os.environ['PYOPENGL_PLATFORM']
+
+        if self.backend == 'egl':
+            self._init_egl()
+        elif self.backend == 'osmesa':
+            self._init_osmesa()
+        else:
+            raise RuntimeError(f'Backend offscreen desconhecido = {self.backend}. Use egl ou osmesa.')
+
+        self._init_framebuffer()
+
+        # Contexto novo: nada do estado guardado vale para ele
+        estado_gl.invalida()
+        programa.invalida()
+
+    def _init_egl(self):
+        from OpenGL import EGL
+        from OpenGL.EGL.EXT.platform_base import eglGetPlatformDisplayEXT
+
+        self.egl = EGL
+        self.display = eglGetPlatformDisplayEXT(EGL_PLATFORM_SURFACELESS_MESA, None, None)
+
+        if not self.display or not EGL.eglInitialize(self.display, None, None):
+            raise RuntimeError('Nao foi possivel inicializar o display EGL surfaceless.')
+
+        atributos = (EGL.EGLint * 5)(EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+                                     EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+                                     EGL.EGL_NONE)
+        config = EGL.EGLConfig()
+        quant_configs = EGL.EGLint()
+        EGL.eglChooseConfig(self.display, atributos, ctypes.pointer(config), 1, ctypes.pointer(quant_configs))
+
+        if quant_configs.value == 0:
+            raise RuntimeError('Nenhuma configuracao EGL com suporte a OpenGL.')
+
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+
+        # Mesma versao usada pelos shaders das cenas (#version 330), perfil de compatibilidade
+        atributos_contexto = (EGL.EGLint * 7)(EGL.EGL_CONTEXT_MAJOR_VERSION, 3,
+                                              EGL.EGL_CONTEXT_MINOR_VERSION, 3,
+                                              EGL.EGL_CONTEXT_OPENGL_PROFILE_MASK, EGL.EGL_CONTEXT_OPENGL_COMPATIBILITY_PROFILE_BIT,
+                                              EGL.EGL_NONE)
+        self.contexto = EGL.eglCreateContext(self.display, config, EGL.EGL_NO_CONTEXT, atributos_contexto)
+
+        if not self.contexto:
+            raise RuntimeError('Nao foi possivel criar o contexto EGL.')
+
+        # Sem superficie: todo o desenho acontece no FBO
+        EGL.eglMakeCurrent(self.display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, self.contexto)
+
+    def _init_osmesa(self):
+        from OpenGL import osmesa
+        from OpenGL import arrays
+
+        self.osmesa = osmesa
+
+        # Mesma versao e perfil do contexto EGL
+        atributos = [osmesa.OSMESA_FORMAT, osmesa.OSMESA_RGBA,
+                     osmesa.OSMESA_PROFILE, osmesa.OSMESA_COMPAT_PROFILE,
+                     osmesa.OSMESA_CONTEXT_MAJOR_VERSION, 3,
+                     osmesa.OSMESA_CONTEXT_MINOR_VERSION, 3,
+                     0]
+        self.contexto = osmesa.OSMesaCreateContextAttribs(atributos, None)
+
+        if not self.contexto:
+            raise RuntimeError('Nao foi possivel criar o contexto OSMesa.')
+
+        # O OSMesa exige um buffer em memoria, mesmo que o desenho seja feito no FBO
+        self.buffer_osmesa = arrays.GLubyteArray.zeros((self.altura, self.largura, 4))
+        osmesa.OSMesaMakeCurrent(self.contexto, self.buffer_osmesa, gl.GL_UNSIGNED_BYTE, self.largura, self.altura)
+
+    def _init_framebuffer(self):
+
+        # Renderbuffer de cor onde as cenas desenham no lugar da janela
+        self.fbo = gl.glGenFramebuffers(1)
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, self.fbo)
+
+        self.rbo_cor = gl.glGenRenderbuffers(1)
+        gl.glBindRenderbuffer(gl.GL_RENDERBUFFER, self.rbo_cor)
+        gl.glRenderbufferStorage(gl.GL_RENDERBUFFER, gl.GL_RGBA8, self.largura, self.altura)
+        gl.glFramebufferRenderbuffer(gl.GL_FRAMEBUFFER, gl.GL_COLOR_ATTACHMENT0, gl.GL_RENDERBUFFER, self.rbo_cor)
+
+        status = gl.glCheckFramebufferStatus(gl.GL_FRAMEBUFFER)
+        if status != gl.GL_FRAMEBUFFER_COMPLETE:
+            raise RuntimeError(f'Framebuffer offscreen incompleto: {status}')
+
+        gl.glViewport(0, 0, self.largura, self.altura)
+
+    def read_pixels(self):
+        '''
+        Retorna o buffer de cor como um array NumPy (altura, largura, 4) uint8,
+        com a primeira linha correspondendo ao topo da imagem.
+        '''
+        gl.glBindFramebuffer(gl.GL_READ_FRAMEBUFFER, self.fbo)
+        gl.glPixelStorei(gl.GL_PACK_ALIGNMENT, 1)
+        pixels = gl.glReadPixels(0, 0, self.largura, self.altura, gl.GL_RGBA, gl.GL_UNSIGNED_BYTE)
+        imagem = np.frombuffer(pixels, dtype=np.uint8).reshape(self.altura, self.largura, 4)
+
+        # O OpenGL armazena as linhas de baixo para cima
+        return np.flipud(imagem).copy()
+
+    def destroy(self):
+
+        gl.glDeleteRenderbuffers(1, np.array([self.rbo_cor], dtype=np.uint32))
+        gl.glDeleteFramebuffers(1, np.array([self.fbo], dtype=np.uint32))
+
+        if self.backend == 'egl':
+            EGL = self.egl
+            EGL.eglMakeCurrent(self.display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, EGL.EGL_NO_CONTEXT)
+            EGL.eglDestroyContext(self.display, self.contexto)
+            EGL.eglTerminate(self.display)
+        else:
+            self.osmesa.OSMesaDestroyContext(self.contexto)
+
+        estado_gl.invalida()
+        programa.invalida()
+
+
+def load_cena(cena):
+    '''
+    Retorna a motor.Cena de uma cena de exemplo (e.g. 'tarefa') ou de um arquivo de cena
+    (e.g. 'cenas/hexagono_girando.json'). Outros objetos com init_scene() e render() sao
+    usados como estao.
+    '''
+    if isinstance(cena, str):
+        return motor.load_cena(motor.arquivo_cena(cena))
+    return cena
+
+
+def render_frames(cena, frames = 1, largura = 400, altura = 400, backend = None, captura = None, formato = 'png', video = None):
+    '''
+    Executa init_scene() e render() da cena por "frames" vezes sem janela
+    e retorna o buffer de cor do ultimo frame como array NumPy (altura, largura, 4).
+    Com captura (um diretorio), todos os frames sao gravados por captura.CapturaAssincrona.
+    Com video (um exportador.ExportadorFrames), todos os frames sao enviados a ele.
+    backend='software' desenha com o rasterizador em NumPy, sem contexto OpenGL.
+    '''
+    if backend == 'software':
+        return render_frames_software(cena, frames, largura, altura, captura, formato, video)
+
+    cena = load_cena(cena)
+
+    contexto = ContextoOffscreen(largura, altura, backend)
+    capturador = None
+
+    try:
+        cena.init_scene()
+
+        if captura:
+            import captura as captura_frames # PBOs e gravacao dos frames, so com captura
+            capturador = captura_frames.CapturaAssincrona(largura, altura, captura, formato)
+
+        for _ in range(frames):
+            cena.render()
+            if capturador is not None:
+                capturador.captura()
+            if video is not None:
+                video.put(contexto.read_pixels())
+
+        gl.glFinish()
+
+        return contexto.read_pixels()
+    finally:
+        # Recursos da captura e da cena apagados ainda com o contexto ativo, mesmo com erro
+        if capturador is not None:
+            capturador.destroy()
+        if hasattr(cena, 'delete'):
+            cena.delete()
+        contexto.destroy()
+
+
+def render_frames_software(cena, frames = 1, largura = 400, altura = 400, captura = None, formato = 'png', video = None):
+    '''
+    render_frames sem OpenGL: a cena (como em load_cena) e desenhada por
+    motor.Cena.render_software em um rasterizador.Rasterizador. Os frames de captura
+    sao gravados na propria thread.
+    '''
+    import rasterizador # Rasterizador em NumPy, so no backend software
+
+    cena = load_cena(cena)
+
+    raster = rasterizador.Rasterizador(largura, altura)
+
+    if captura:
+        import captura as captura_frames # Gravacao dos frames, so com captura
+        os.makedirs(captura, exist_ok=True)
+
+    for frame in range(frames):
+        cena.render_software(raster)
+        if captura:
+            nome = 'frame_{:06d}.{}'.format(frame, captura_frames.extensoes[formato])
+            captura_frames.salva_imagem(os.path.join(captura, nome), raster.read_pixels(), formato)
+        if video is not None:
+            video.put(raster.read_pixels())
+
+    return raster.read_pixels()
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Renderiza uma cena sem janela (EGL surfaceless ou OSMesa).')
+    parser.add_argument('cena', help='uma das cenas ({}) ou um arquivo de cena .json/.toml'.format(', '.join(cenas)))
+    parser.add_argument('--frames', type=int, default=1)
+    parser.add_argument('--largura', type=int, default=400)
+    parser.add_argument('--altura', type=int, default=400)
+    parser.add_argument('--software', action='store_true', help='sem OpenGL: desenha com o rasterizador em NumPy')
+    parser.add_argument('--saida', default=None, help='arquivo .npy com o buffer de cor do ultimo frame')
+    parser.add_argument('--captura', default=None, help='diretorio onde todos os frames sao gravados')
+    parser.add_argument('--formato', default='png', help='formato dos frames de --captura: png ou raw')
+    parser.add_argument('--video', default=None, help='arquivo .y4m ou .rgba, ou diretorio de PNGs, com todos os frames')
+    parser.add_argument('--fps', type=int, default=60, help='frames por segundo do video')
+    args = parser.parse_args()
+
+    if args.cena not in cenas and not motor.eh_arquivo_cena(args.cena):
+        parser.error('cena desconhecida: {}'.format(args.cena))
+
+    if args.captura:
+        import captura as captura_frames # so para validar o formato
+        if args.formato not in captura_frames.extensoes:
+            parser.error('formato desconhecido: {}. Use um de {}.'.format(args.formato, sorted(captura_frames.extensoes)))
+
+    video = None
+    if args.video:
+        import exportador # Gravacao dos frames em video, so com --video
+        video = exportador.ExportadorFrames(args.video, args.largura, args.altura, fps=args.fps)
+
+    try:
+        imagem = render_frames(args.cena, args.frames, args.largura, args.altura, 'software' if args.software else None,
+                               captura=args.captura, formato=args.formato, video=video)
+    finally:
+        if video is not None:
+            video.close()
+
+    print("Cena: {} | frames: {} | imagem: {}".format(args.cena, args.frames, imagem.shape))
+
+    if video is not None:
+        est = video.estatisticas()
+        print("Video: {} | gravados: {} | codificacao media {:.3f} ms | espera {:.3f} ms | fila media {:.2f} max {}".format(
+            args.video, est['gravados'], est['codificacao']['media'] if est['codificacao'] else 0.0,
+            est['espera_put'], est['fila_media'], est['fila_maxima']))
+
+    if args.saida:
+        np.save(args.saida, imagem)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,130 @@
+import os
+import sys
+import time
+import argparse
+import importlib
+
+# Inicio da medicao: o tempo ate o primeiro frame e contado a partir daqui
+inicio = time.perf_counter()
+
+
+def configura(verificacao = False):
+    '''
+    Modo de producao do PyOpenGL. Deve ser chamada antes do primeiro import de OpenGL.GL,
+    pois o PyOpenGL le estas opcoes ao criar as funcoes:
+        ERROR_CHECKING = False: sem glGetError depois de cada chamada
+        ERROR_LOGGING = False: sem o registro de cada chamada com erro
+        ERROR_ON_COPY = True: listas e arrays que precisariam ser convertidos (copiados)
+            a cada chamada viram erro, em vez de uma copia silenciosa
+    verificacao=True mantem o ERROR_CHECKING (e.g. para depurar em producao).
+    '''
+    if 'OpenGL.GL' in sys.modules:
+        raise RuntimeError('producao.configura() deve ser chamada antes de importar OpenGL.GL.')
+
+    import OpenGL
+
+    OpenGL.ERROR_CHECKING = verificacao
+    OpenGL.ERROR_LOGGING = False
+    OpenGL.ERROR_ON_COPY = True
+
+    if not verificacao and os.environ.get('PYOPENGL_PLATFORM') == 'egl':
+        # O PyOpenGL 3.1 so define o verificador de erros EGL com ERROR_CHECKING ativo,
+        # mas as funcoes EGL o referenciam sempre: None desativa a verificacao
+        from OpenGL.raw.EGL import _errors
+        if not hasattr(_errors, '_error_checker'):
+            _errors._error_checker = None
+
+
+class Fases:
+    '''
+    Tempo de cada import e de cada etapa da inicializacao ate o primeiro frame.
+
+    Uso:
+        fases = Fases()
+        gl = fases.importa('OpenGL.GL')
+        ...                       # cria a janela
+        fases.marca('janela')     # tempo desde a marca (ou import) anterior
+        ...
+        fases.relatorio()
+    '''
+
+    def __init__(self):
+
+        self.importacoes = [] # (modulo, ms)
+        self.etapas = [] # (nome, ms)
+        self.ultimo = time.perf_counter()
+
+    def importa(self, nome):
+        '''
+        importlib.import_module(nome), medindo o tempo do import
+        (inclui os modulos que ele importa e que ainda nao estavam carregados).
+        '''
+        modulo = importlib.import_module(nome)
+        agora = time.perf_counter()
+        self.importacoes.append((nome, (agora - self.ultimo) * 1000.0))
+        self.ultimo = agora
+        return modulo
+
+    def marca(self, nome):
+
+        agora = time.perf_counter()
+        self.etapas.append((nome, (agora - self.ultimo) * 1000.0))
+        self.ultimo = agora
+
+    def relatorio(self):
+
+        print(" ==== inicializacao ====")
+        for titulo, tempos in (('import', self.importacoes), ('etapa', self.etapas)):
+            for nome, ms in tempos:
+                print("{:<7} {:<20} {:>9.1f} ms".format(titulo, nome, ms))
+        print("{:<28} {:>9.1f} ms".format('ate o primeiro frame', (self.ultimo - inicio) * 1000.0))
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Abre uma cena (arquivo .json/.toml) em modo de producao e mostra o tempo ate o primeiro frame.')
+    parser.add_argument('cena', help='arquivo de cena, e.g. cenas/tarefa.json')
+    parser.add_argument('--offscreen', action='store_true', help='sem janela (EGL/OSMesa): mede e encerra apos o primeiro frame')
+    parser.add_argument('--largura', type=int, default=None)
+    parser.add_argument('--altura', type=int, default=None)
+    parser.add_argument('--verificacao', action='store_true', help='mantem a verificacao de erros do PyOpenGL')
+    args = parser.parse_args()
+
+    if args.offscreen:
+        # Mesma plataforma padrao do offscreen.py; precisa ser definida antes do import de OpenGL
+        os.environ.setdefault('PYOPENGL_PLATFORM', 'egl')
+
+    configura(args.verificacao)
+
+    fases = Fases()
+    fases.importa('numpy')
+    gl = fases.importa('OpenGL.GL')
+    motor = fases.importa('motor')
+
+    if not args.offscreen:
+        motor.main_opengl(args.cena, fases)
+        return 0
+
+    offscreen = fases.importa('offscreen')
+
+    cena = motor.load_cena(args.cena)
+    contexto = offscreen.ContextoOffscreen(args.largura or cena.largura, args.altura or cena.altura)
+    try:
+        fases.marca('janela')
+        cena.init_shaders()
+        fases.marca('shaders')
+        cena.init_buffers()
+        fases.marca('buffers')
+        cena.render()
+        gl.glFinish()
+        fases.marca('primeiro frame')
+        fases.relatorio()
+    finally:
+        cena.delete()
+        contexto.destroy()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,181 @@
+import OpenGL.GL as gl # Funcoes da API OpenGL
+import estado_gl
+import upload
+
+
+# Tipo GLSL (glGetActiveUniform) -> funcao glUniform* que recebe os valores
+#   escalares e vetores: glUniformNf/i/ui(local, *valores)
+#   matrizes: (glUniformMatrixNfv, floats por matriz), chamada com (local, quantidade, transposta, valores)
+funcoes_uniform = {
+    gl.GL_FLOAT: gl.glUniform1f,
+    gl.GL_FLOAT_VEC2: gl.glUniform2f,
+    gl.GL_FLOAT_VEC3: gl.glUniform3f,
+    gl.GL_FLOAT_VEC4: gl.glUniform4f,
+    gl.GL_INT: gl.glUniform1i,
+    gl.GL_INT_VEC2: gl.glUniform2i,
+    gl.GL_INT_VEC3: gl.glUniform3i,
+    gl.GL_INT_VEC4: gl.glUniform4i,
+    gl.GL_UNSIGNED_INT: gl.glUniform1ui,
+    gl.GL_UNSIGNED_INT_VEC2: gl.glUniform2ui,
+    gl.GL_UNSIGNED_INT_VEC3: gl.glUniform3ui,
+    gl.GL_UNSIGNED_INT_VEC4: gl.glUniform4ui,
+    gl.GL_BOOL: gl.glUniform1i,
+    gl.GL_BOOL_VEC2: gl.glUniform2i,
+    gl.GL_BOOL_VEC3: gl.glUniform3i,
+    gl.GL_BOOL_VEC4: gl.glUniform4i,
+    gl.GL_SAMPLER_1D: gl.glUniform1i,
+    gl.GL_SAMPLER_2D: gl.glUniform1i,
+    gl.GL_SAMPLER_3D: gl.glUniform1i,
+    gl.GL_SAMPLER_CUBE: gl.glUniform1i,
+}
+
+funcoes_uniform_matriz = {
+    gl.GL_FLOAT_MAT2: (gl.glUniformMatrix2fv, 4),
+    gl.GL_FLOAT_MAT3: (gl.glUniformMatrix3fv, 9),
+    gl.GL_FLOAT_MAT4: (gl.glUniformMatrix4fv, 16),
+    gl.GL_FLOAT_MAT2x3: (gl.glUniformMatrix2x3fv, 6),
+    gl.GL_FLOAT_MAT2x4: (gl.glUniformMatrix2x4fv, 8),
+    gl.GL_FLOAT_MAT3x2: (gl.glUniformMatrix3x2fv, 6),
+    gl.GL_FLOAT_MAT3x4: (gl.glUniformMatrix3x4fv, 12),
+    gl.GL_FLOAT_MAT4x2: (gl.glUniformMatrix4x2fv, 8),
+    gl.GL_FLOAT_MAT4x3: (gl.glUniformMatrix4x3fv, 12),
+}
+
+# program_ref -> Programa, preenchido por get_programa()
+programas = {}
+
+
+class Variavel:
+    '''
+    Atributo ou uniform ativo do programa.
+        local: localizacao (glGetAttribLocation/glGetUniformLocation)
+        tipo: tipo GLSL (gl.GL_FLOAT_VEC3, gl.GL_FLOAT_MAT4, ...)
+        tamanho: quantidade de elementos (1, ou o tamanho do array)
+    '''
+
+    def __init__(self, nome, local, tipo, tamanho):
+
+        self.nome = nome
+        self.local = local
+        self.tipo = tipo
+        self.tamanho = tamanho
+
+
+class Programa:
+    '''
+    Reflexao de um shader program ja linkado: todos os atributos e uniforms ativos sao
+    enumerados uma unica vez (glGetActiveAttrib/glGetActiveUniform), com tipo e localizacao.
+    Depois disso, localizar um atributo ou alterar um uniform e apenas uma consulta ao
+    dicionario, sem chamadas glGet* ao driver.
+
+    Arrays de uniforms ficam registrados pelo nome com e sem o sufixo "[0]".
+    '''
+
+    def __init__(self, program_ref):
+
+        self.program_ref = program_ref
+        self.atributos = {}
+        self.uniforms = {}
+
+        # Ultimo valor enviado a cada uniform (o valor fica guardado no programa)
+        self.valores = {}
+
+        # Chamadas glVertexAttrib*Pointer ja resolvidas para este programa (ver layout_vertice.py)
+        self.layouts = {}
+
+        for indice in range(gl.glGetProgramiv(program_ref, gl.GL_ACTIVE_ATTRIBUTES)):
+            nome, tamanho, tipo = gl.glGetActiveAttrib(program_ref, indice)
+            nome = nome.decode('utf-8')
+            if nome.startswith('gl_'): # variaveis embutidas nao tem localizacao
+                continue
+            local = gl.glGetAttribLocation(program_ref, nome)
+            self.atributos[nome] = Variavel(nome, local, int(tipo), int(tamanho))
+
+        for indice in range(gl.glGetProgramiv(program_ref, gl.GL_ACTIVE_UNIFORMS)):
+            nome, tamanho, tipo = gl.glGetActiveUniform(program_ref, indice)
+            nome = nome.decode('utf-8')
+            local = gl.glGetUniformLocation(program_ref, nome)
+            if local == -1: # uniforms de blocos (UBO) nao tem localizacao
+                continue
+            variavel = Variavel(nome, local, int(tipo), int(tamanho))
+            self.uniforms[nome] = variavel
+            if nome.endswith('[0]'):
+                self.uniforms[nome[:-3]] = variavel
+
+    def atributo(self, var_in_program):
+        '''
+        Localizacao do atributo (variavel com qualificador in do vertex shader).
+        '''
+        variavel = self.atributos.get(var_in_program)
+
+        # Se a variavel nao foi encontrada no shader
+        if variavel is None:
+            raise Exception(f'\n\nErro Shader : Variavel {var_in_program} nao encontrada no shader.\n')
+
+        return variavel.local
+
+    def uniform(self, var_in_program):
+        '''
+        Localizacao do uniform.
+        '''
+        variavel = self.uniforms.get(var_in_program)
+
+        if variavel is None:
+            raise Exception(f'\n\nErro Shader : Uniform {var_in_program} nao encontrado no shader.\n')
+
+        return variavel.local
+
+    def use(self):
+
+        estado_gl.use_program(self.program_ref)
+
+    def set_uniform(self, var_in_program, *valores):
+        '''
+        Altera o valor do uniform, escolhendo a funcao glUniform* pelo tipo declarado no shader.
+        Escalares e vetores recebem os componentes (set_uniform('cor', 1.0, 0.0, 0.0)); matrizes
+        recebem a matriz GLM ou um array (set_uniform('modelo', matriz)).
+        O programa e ativado se necessario; valores iguais ao ultimo enviado nao sao reenviados.
+        '''
+        variavel = self.uniforms.get(var_in_program)
+
+        if variavel is None:
+            raise Exception(f'\n\nErro Shader : Uniform {var_in_program} nao encontrado no shader.\n')
+
+        funcao_matriz, elementos = funcoes_uniform_matriz.get(variavel.tipo, (None, 0))
+        if funcao_matriz is not None:
+            # upload.as_array mantem as matrizes GLM em column-major, como o OpenGL espera
+            matriz = upload.as_array(valores[0])
+            chave = matriz.tobytes()
+        else:
+            funcao = funcoes_uniform.get(variavel.tipo)
+            if funcao is None:
+                raise Exception(f'\n\nErro Shader : Uniform {var_in_program} com tipo nao suportado = {variavel.tipo}.\n')
+            chave = valores
+
+        if self.valores.get(variavel.local) == chave:
+            return
+
+        self.use()
+        if funcao_matriz is not None:
+            funcao_matriz(variavel.local, matriz.size // elementos, False, matriz)
+        else:
+            funcao(variavel.local, *valores)
+        self.valores[variavel.local] = chave
+
+
+def get_programa(program_ref):
+    '''
+    Retorna a reflexao do programa, criando-a na primeira chamada.
+    Deve ser chamada logo apos o link (ou a leitura do cache de shaders).
+    '''
+    if program_ref not in programas:
+        programas[program_ref] = Programa(program_ref)
+    return programas[program_ref]
+
+
+def invalida():
+    '''
+    Esquece todos os programas. Deve ser chamada ao trocar de contexto OpenGL,
+    pois as referencias dos programas podem ser reutilizadas pelo novo contexto.
+    '''
+    programas.clear()
@@ -0,0 +1,473 @@
+import numpy as np
+
+
+# Modos de primitiva, com os mesmos valores das constantes OpenGL: gl.GL_TRIANGLES e
+# gl.GL_LINE_LOOP podem ser passados diretamente, sem importar o OpenGL
+LINES = 0x0001
+LINE_LOOP = 0x0002
+LINE_STRIP = 0x0003
+TRIANGLES = 0x0004
+
+# Lado (em pixels) dos tiles em que a tela e dividida
+tamanho_tile_padrao = 8
+
+# Lado (em tiles) dos blocos do nivel grosso: com tiles de 8 pixels, blocos de 64 pixels
+tiles_por_bloco = 8
+
+# Bits de subpixel: as coordenadas de janela sao arredondadas para 1/256 de pixel,
+# como nos rasterizadores de ponto fixo das GPUs e do Mesa
+bits_subpixel = 8
+
+# Pares (triangulo, tile) avaliados de uma vez, pixel a pixel e na classificacao dos tiles:
+# limita a memoria dos arrays temporarios
+pares_por_lote = 4096
+pares_por_classificacao = 1 << 18
+
+# Planos do volume de visualizacao, na ordem em que o Mesa recorta: (eixo, sinal) do plano
+# sinal * coordenada + w >= 0 (esquerda, direita, baixo, cima, perto, longe)
+planos_recorte = ((0, 1.0), (0, -1.0), (1, 1.0), (1, -1.0), (2, 1.0), (2, -1.0))
+
+
+def _cor_uint8(cor):
+    '''
+    RGBA float (0 a 1) -> uint8, com o mesmo arredondamento da conversao do OpenGL.
+    '''
+    return np.clip(np.rint(np.asarray(cor, dtype=np.float64) * 255.0), 0, 255).astype(np.uint8)
+
+
+class Rasterizador:
+    '''
+    Rasterizador de triangulos e linhas em NumPy, sem OpenGL: desenha as mesmas
+    geometrias das cenas (arrays de vertices, matrizes GLM, indices) em um buffer RGBA.
+    Serve para renderizar onde nao ha contexto OpenGL e como referencia para a
+    imagem gerada pelo driver.
+
+    Segue as regras de rasterizacao do OpenGL: coordenadas normalizadas (-1 a 1) viram
+    pixels como no glViewport(0, 0, largura, altura), um pixel e coberto quando o seu
+    centro esta dentro do triangulo, e pixels exatamente sobre uma aresta compartilhada
+    sao desenhados por um unico triangulo (regra top-left). Sem profundidade nem blending:
+    cada primitiva sobrescreve as anteriores, na ordem de desenho.
+
+    Triangulos que saem do volume de visualizacao (-1 a 1 em x, y e z) sao recortados antes
+    da rasterizacao, com as mesmas contas em float32 do recorte do Mesa (draw_pipe_clip):
+    os vertices criados no recorte movem as arestas em fracoes de subpixel, e sem eles os
+    pixels vizinhos dessas arestas podem diferir do driver.
+
+    Triangulos sao testados em dois niveis: blocos de tiles_por_bloco x tiles_por_bloco
+    tiles e tiles de tamanho_tile x tamanho_tile pixels. Em cada nivel as funcoes de aresta
+    nos cantos classificam cada par (triangulo, tile) como fora, cheio ou parcial; so os
+    blocos parciais sao divididos em tiles, e so os tiles parciais sao avaliados pixel a
+    pixel. Pares cobertos por um triangulo posterior que enche o mesmo bloco ou tile sao
+    descartados antes do nivel seguinte, pois nao mudam a imagem.
+
+    offscreen.render_frames(cena, backend='software') desenha as cenas (motor.Cena) com
+    este rasterizador.
+
+    Linhas seguem a regra diamond-exit; extremos exatamente sobre a borda de um pixel
+    podem diferir em um pixel do driver.
+
+    Uso:
+        raster = Rasterizador(400, 400)
+        raster.clear((0.5, 0.5, 0.5, 1.0))
+        raster.draw(vertices_triangulo, TRIANGLES, (0.92, 0.10, 0.14, 1.0))
+        raster.draw(vertices_quadrado, TRIANGLES, cor, indices=indices_quadrado)
+        imagem = raster.read_pixels()   # (altura, largura, 4) uint8, linha de cima primeiro
+    '''
+
+    def __init__(self, largura, altura, tamanho_tile = tamanho_tile_padrao):
+
+        self.largura = largura
+        self.altura = altura
+        self.tamanho_tile = tamanho_tile
+
+        # Como no framebuffer OpenGL, a linha 0 e a de baixo
+        self.cor = np.zeros((altura, largura, 4), dtype=np.uint8)
+
+        # Pixels (x, y) de um tile, relativos ao seu canto
+        ty, tx = np.divmod(np.arange(tamanho_tile * tamanho_tile), tamanho_tile)
+        self.tile_x = tx.astype(np.int32)
+        self.tile_y = ty.astype(np.int32)
+
+    def clear(self, cor):
+
+        self.cor[...] = _cor_uint8(cor)
+
+    def read_pixels(self):
+        '''
+        Buffer de cor (altura, largura, 4) uint8 com a linha de cima primeiro,
+        como offscreen.ContextoOffscreen.read_pixels.
+        '''
+        return np.flipud(self.cor).copy()
+
+    def _janela(self, vertices):
+        '''
+        Coordenadas normalizadas -> coordenadas de janela (pixels), como o glViewport
+        (x * escala + translacao), calculadas em float32 e arredondadas para a grade de subpixels.
+        '''
+        vertices = vertices.astype(np.float32, copy=False)
+        janela = np.empty((len(vertices), 2), dtype=np.float32)
+        janela[:, 0] = vertices[:, 0] * np.float32(0.5 * self.largura) + np.float32(0.5 * self.largura)
+        janela[:, 1] = vertices[:, 1] * np.float32(0.5 * self.altura) + np.float32(0.5 * self.altura)
+
+        # Na grade de subpixels as funcoes de aresta em float64 sao exatas
+        escala = 1 << bits_subpixel
+        return np.rint(janela.astype(np.float64) * escala) / escala
+
+    def draw(self, vertices, modo, cor, indices = None):
+        '''
+        Desenha os vertices (ou os vertices indicados por indices) no modo de primitiva.
+            vertices: (N, 2 ou 3) em coordenadas normalizadas, ou matriz GLM
+            modo: TRIANGLES, LINES, LINE_STRIP ou LINE_LOOP (ou as constantes gl.GL_*)
+            cor: RGBA (4,) para todas as primitivas, ou (quant_primitivas, 4)
+        '''
+        vertices = _como_linhas(vertices)
+        janela = self._janela(vertices)
+
+        if indices is not None:
+            indices = _como_linhas(indices).ravel().astype(np.intp)
+            janela = janela[indices]
+
+        if modo == TRIANGLES:
+            quant = len(janela) // 3
+            posicoes = vertices if indices is None else vertices[indices]
+            janela, cores = self._recorta(posicoes[:quant * 3].reshape(quant, 3, -1),
+                                          janela[:quant * 3].reshape(quant, 3, 2), self._cores(cor, quant))
+            self._triangulos(janela, cores)
+        elif modo in (LINES, LINE_STRIP, LINE_LOOP):
+            if modo == LINES:
+                quant = len(janela) // 2
+                inicios, fins = janela[0:quant * 2:2], janela[1:quant * 2:2]
+            else:
+                inicios, fins = janela[:-1], janela[1:]
+                if modo == LINE_LOOP and len(janela) > 1:
+                    inicios = np.concatenate([inicios, janela[-1:]])
+                    fins = np.concatenate([fins, janela[:1]])
+            self._linhas(inicios, fins, self._cores(cor, len(inicios)))
+        else:
+            raise ValueError(f'Modo de primitiva nao suportado pelo rasterizador: {modo}.')
+
+    def _cores(self, cor, quant):
+
+        cores = _cor_uint8(cor).reshape(-1, 4)
+        return np.broadcast_to(cores, (quant, 4)) if len(cores) == 1 else cores[:quant]
+
+    def _recorta(self, posicoes, janela, cores):
+        '''
+        Recorta os triangulos com algum vertice fora do volume de visualizacao.
+            posicoes: (T, 3, 2 ou 3) coordenadas normalizadas (w = 1)
+            janela: (T, 3, 2) coordenadas de janela dos mesmos vertices
+        Cada triangulo recortado e substituido pelo leque de triangulos do poligono que sobra,
+        na mesma posicao da ordem de desenho. Retorna (janela, cores) dos triangulos finais.
+        '''
+        posicoes = posicoes.astype(np.float32, copy=False)
+        fora = np.any(np.abs(posicoes) > 1.0, axis=(1, 2))
+        if not np.any(fora):
+            return janela, cores
+
+        recortados = np.flatnonzero(fora)
+        poligonos, quant = _recorta_poligonos(posicoes[recortados])
+
+        # Leque a partir do primeiro vertice de cada poligono, como o Mesa
+        leques = np.maximum(quant - 2, 0)
+        poligono = np.repeat(np.arange(len(recortados)), leques)
+        segundo = 1 + np.arange(len(poligono)) - np.repeat(np.cumsum(leques) - leques, leques)
+        vertices = self._janela(poligonos.reshape(-1, 3)).reshape(poligonos.shape[0], -1, 2)
+        novos = np.stack([vertices[poligono, 0], vertices[poligono, segundo], vertices[poligono, segundo + 1]], axis=1)
+
+        mantidos = np.flatnonzero(~fora)
+        origem = np.concatenate([mantidos, recortados[poligono]])
+        triangulos = np.concatenate([janela[mantidos], novos])
+
+        # Ordem de desenho original; os triangulos de um mesmo leque ficam juntos
+        ordem = np.argsort(origem, kind='stable')
+        return triangulos[ordem], cores[origem[ordem]]
+
+    def _escreve(self, pixels, primitivas, cores):
+        '''
+        Escreve em cada pixel a cor da ultima primitiva (na ordem de desenho) que o cobre.
+        pixels: indices y * largura + x; primitivas: indice da primitiva de cada pixel.
+        '''
+        if len(pixels) == 0:
+            return
+
+        ultima = np.full(self.largura * self.altura, -1, dtype=np.int64)
+        np.maximum.at(ultima, pixels, primitivas)
+
+        cobertos = np.flatnonzero(ultima >= 0)
+        self.cor.reshape(-1, 4)[cobertos] = cores[ultima[cobertos]]
+
+    def _triangulos(self, janela, cores):
+
+        a, b, c = janela[:, 0], janela[:, 1], janela[:, 2]
+
+        # Orienta todos os triangulos no sentido anti-horario; triangulos degenerados sao descartados
+        area = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+        horario = area < 0
+        b, c = np.where(horario[:, None], c, b), np.where(horario[:, None], b, c)
+
+        # Pixels cujo centro (x + 0.5) cai no retangulo envolvente, limitados a tela
+        minimo = np.minimum(np.minimum(a, b), c)
+        maximo = np.maximum(np.maximum(a, b), c)
+        x0 = np.maximum(np.ceil(minimo[:, 0] - 0.5), 0).astype(np.int64)
+        y0 = np.maximum(np.ceil(minimo[:, 1] - 0.5), 0).astype(np.int64)
+        x1 = np.minimum(np.floor(maximo[:, 0] - 0.5), self.largura - 1).astype(np.int64)
+        y1 = np.minimum(np.floor(maximo[:, 1] - 0.5), self.altura - 1).astype(np.int64)
+
+        validos = np.flatnonzero((area != 0) & (x0 <= x1) & (y0 <= y1))
+        if len(validos) == 0:
+            return
+
+        # Funcoes de aresta E(x, y) = A x + B y + C das arestas a->b, b->c, c->a: (3, T).
+        # E > 0 dentro do triangulo. Na grade de subpixels E e multiplo de 2^-16 e as contas
+        # em float64 sao exatas; nas arestas da regra de preenchimento (esquerdas e horizontais
+        # de baixo, como no Mesa) um meio passo em C inclui os pixels com E == 0
+        origens = np.stack([a, b, c])[:, validos]
+        direcoes = np.stack([b - a, c - b, a - c])[:, validos]
+        A = -direcoes[..., 1]
+        B = direcoes[..., 0]
+        C = direcoes[..., 1] * origens[..., 0] - direcoes[..., 0] * origens[..., 1]
+        inclui = (direcoes[..., 1] < 0) | ((direcoes[..., 1] == 0) & (direcoes[..., 0] > 0))
+        C += np.where(inclui, 2.0 ** -(2 * bits_subpixel + 1), 0.0)
+
+        # Dois niveis de tiles: blocos de (tiles_por_bloco * s) pixels e tiles de s pixels.
+        # Cada nivel classifica os pares (triangulo, tile) como fora, cheio ou parcial; so os
+        # blocos parciais sao divididos em tiles, e so os tiles parciais sao avaliados por pixel
+        s = self.tamanho_tile
+        f = tiles_por_bloco
+        g = s * f
+        colunas_blocos = -(-self.largura // g)
+        linhas_blocos = -(-self.altura // g)
+
+        # Ultima primitiva (na ordem de desenho) que cobre cada bloco cheio, cada tile cheio e
+        # cada pixel dos tiles parciais; no final vale o maior dos tres niveis
+        ultima_bloco = np.full((linhas_blocos, colunas_blocos), -1, dtype=np.int64)
+        ultima_tile = np.full((linhas_blocos * f, colunas_blocos * f), -1, dtype=np.int64)
+        ultima = np.full((linhas_blocos * g, colunas_blocos * g), -1, dtype=np.int64)
+        primitivas = validos
+
+        # Tiles (de s pixels) do retangulo envolvente de cada triangulo
+        tx0, ty0 = x0[validos] // s, y0[validos] // s
+        tx1, ty1 = x1[validos] // s, y1[validos] // s
+
+        # Blocos: os cheios sao marcados, os parciais guardados para a divisao em tiles
+        parciais = []
+        for tri, bx, by in _retangulos(tx0 // f, ty0 // f, tx1 // f, ty1 // f):
+            cheio, parcial, _ = _classifica(A, B, C, tri, bx, by, g)
+            np.maximum.at(ultima_bloco.ravel(), by[cheio] * colunas_blocos + bx[cheio], primitivas[tri[cheio]])
+            parciais.append((tri[parcial], bx[parcial], by[parcial]))
+        tri, bx, by = (np.concatenate(p) for p in zip(*parciais))
+
+        # Um par coberto por uma primitiva posterior cheia no mesmo bloco nao muda a imagem
+        visivel = primitivas[tri] > ultima_bloco[by, bx]
+        tri, bx, by = tri[visivel], bx[visivel], by[visivel]
+
+        # Tiles dos blocos parciais, limitados ao retangulo envolvente do triangulo
+        parciais = []
+        for par, tx, ty in _retangulos(np.maximum(bx * f, tx0[tri]), np.maximum(by * f, ty0[tri]),
+                                       np.minimum(bx * f + f - 1, tx1[tri]), np.minimum(by * f + f - 1, ty1[tri])):
+            cheio, parcial, _ = _classifica(A, B, C, tri[par], tx, ty, s)
+            np.maximum.at(ultima_tile.ravel(), ty[cheio] * colunas_blocos * f + tx[cheio], primitivas[tri[par[cheio]]])
+            parciais.append((tri[par[parcial]], tx[parcial], ty[parcial]))
+        tri, tile_x, tile_y = (np.concatenate(p) for p in zip(*parciais))
+
+        visivel = primitivas[tri] > np.maximum(ultima_tile[tile_y, tile_x], ultima_bloco[tile_y // f, tile_x // f])
+        tri, tile_x, tile_y = tri[visivel], tile_x[visivel], tile_y[visivel]
+
+        largura_pixels = colunas_blocos * g
+        lx = self.tile_x.astype(np.float64)
+        ly = self.tile_y.astype(np.float64)
+        deslocamento_pixel = self.tile_y * largura_pixels + self.tile_x
+
+        for inicio in range(0, len(tri), pares_por_lote):
+            lote = slice(inicio, inicio + pares_por_lote)
+            t = tri[lote]
+
+            # Funcoes de aresta nos s * s pixels de cada tile: (pares, s * s)
+            _, _, e_canto = _classifica(A, B, C, t, tile_x[lote], tile_y[lote], s)
+            dentro = None
+            for aresta in range(3):
+                e = e_canto[aresta, :, None] + A[aresta, t, None] * lx + B[aresta, t, None] * ly
+                dentro = e > 0 if dentro is None else dentro & (e > 0)
+
+            par, pixel = np.nonzero(dentro)
+            base = tile_y[lote] * s * largura_pixels + tile_x[lote] * s
+            np.maximum.at(ultima.ravel(), base[par] + deslocamento_pixel[pixel], primitivas[t[par]])
+
+        # Blocos e tiles cheios valem para todos os seus pixels
+        por_tile = ultima.reshape(linhas_blocos * f, s, colunas_blocos * f, s)
+        np.maximum(por_tile, ultima_tile[:, None, :, None], out=por_tile)
+        por_bloco = ultima.reshape(linhas_blocos, g, colunas_blocos, g)
+        np.maximum(por_bloco, ultima_bloco[:, None, :, None], out=por_bloco)
+
+        # Os tiles podem passar da borda da tela
+        ultima = ultima[:self.altura, :self.largura]
+        cobertos = ultima >= 0
+        self.cor[cobertos] = cores[ultima[cobertos]]
+
+    def _linhas(self, inicios, fins, cores):
+        '''
+        Segmentos de largura 1: em cada coluna (ou linha, se o segmento e mais vertical)
+        cujo centro esta no intervalo [inicio, fim), o pixel cruzado pelo segmento,
+        com os extremos ajustados pela regra diamond-exit do OpenGL.
+        '''
+        delta = fins - inicios
+        eixo_x = np.abs(delta[:, 0]) >= np.abs(delta[:, 1]) # eixo principal de cada segmento
+
+        # Coordenadas no eixo principal (p) e no secundario (q)
+        p0 = np.where(eixo_x, inicios[:, 0], inicios[:, 1])
+        p1 = np.where(eixo_x, fins[:, 0], fins[:, 1])
+        q0 = np.where(eixo_x, inicios[:, 1], inicios[:, 0])
+        q1 = np.where(eixo_x, fins[:, 1], fins[:, 0])
+
+        # Centros i + 0.5 em [p0, p1) (ou (p1, p0], no sentido contrario)
+        crescente = p1 >= p0
+        primeiro = np.where(crescente, np.ceil(p0 - 0.5), np.floor(p1 - 0.5) + 1)
+        ultimo = np.where(crescente, np.ceil(p1 - 0.5) - 1, np.floor(p0 - 0.5))
+        quant = np.maximum(ultimo - primeiro + 1, 0).astype(np.int64)
+
+        segmentos = np.repeat(np.arange(len(inicios)), quant)
+        passo = np.arange(len(segmentos)) - np.repeat(np.cumsum(quant) - quant, quant)
+
+        p = primeiro[segmentos] + passo
+        inclinacao = (q1 - q0) / np.where(p1 != p0, p1 - p0, 1.0)
+        # Segmento exatamente entre dois pixels: como a regra de preenchimento dos triangulos,
+        # fica com o de baixo (ou da esquerda), exceto linhas mais horizontais subindo
+        qc = q0[segmentos] + (p + 0.5 - p0[segmentos]) * inclinacao[segmentos]
+        sobe = (eixo_x & (inclinacao > 0))[segmentos]
+        q = np.where(sobe, np.floor(qc), np.ceil(qc) - 1)
+
+        x = np.where(eixo_x[segmentos], p, q).astype(np.int64)
+        y = np.where(eixo_x[segmentos], q, p).astype(np.int64)
+
+        # Extremos (diamond-exit): o pixel cujo losango contem o fim nao e desenhado, pois o
+        # segmento nao sai dele; o que contem o inicio e desenhado mesmo com o centro antes
+        # do inicio (entradas repetidas nao mudam o resultado)
+        pixel_inicio, inicio_dentro = _losango(inicios)
+        pixel_fim, fim_dentro = _losango(fins)
+        sai_do_inicio = inicio_dentro & ~(fim_dentro & np.all(pixel_inicio == pixel_fim, axis=1))
+
+        mantidos = ~(fim_dentro[segmentos] & (x == pixel_fim[segmentos, 0]) & (y == pixel_fim[segmentos, 1]))
+        extras = np.flatnonzero(sai_do_inicio)
+        x = np.concatenate([x[mantidos], pixel_inicio[extras, 0]])
+        y = np.concatenate([y[mantidos], pixel_inicio[extras, 1]])
+        segmentos = np.concatenate([segmentos[mantidos], extras])
+
+        na_tela = (x >= 0) & (x < self.largura) & (y >= 0) & (y < self.altura)
+        self._escreve(y[na_tela] * self.largura + x[na_tela], segmentos[na_tela], cores)
+
+
+def _retangulos(x0, y0, x1, y1):
+    '''
+    Pares (retangulo, x, y) de todos os tiles dos retangulos [x0, x1] x [y0, y1],
+    em lotes de cerca de pares_por_classificacao pares (sempre ao menos um lote).
+    '''
+    quant = np.maximum(x1 - x0 + 1, 0) * np.maximum(y1 - y0 + 1, 0)
+    acumulado = np.cumsum(quant)
+
+    inicio = 0
+    while True:
+        base = acumulado[inicio - 1] if inicio else 0
+        fim = max(int(np.searchsorted(acumulado, base + pares_por_classificacao, side='right')), inicio + 1)
+        fim = min(fim, len(quant))
+
+        q = quant[inicio:fim]
+        item = np.repeat(np.arange(inicio, fim), q)
+        local = np.arange(len(item)) - np.repeat(np.cumsum(q) - q, q)
+        linha, coluna = np.divmod(local, (x1 - x0 + 1)[item])
+        yield item, x0[item] + coluna, y0[item] + linha
+
+        if fim >= len(quant):
+            return
+        inicio = fim
+
+
+def _recorta_poligonos(triangulos):
+    '''
+    Recorte de Sutherland-Hodgman dos triangulos (T, 3, 2 ou 3) float32 pelos planos_recorte,
+    com as contas do Mesa: distancia ao plano d = sinal * coordenada + w, t = d_fora / (d_fora - d_dentro)
+    e o novo vertice interpolado a partir do vertice de fora.
+    Retorna (vertices (T, M, 3) dos poligonos recortados, quantidade de vertices de cada um).
+    '''
+    quant_tri = len(triangulos)
+    poligonos = np.zeros((quant_tri, 3, 3), dtype=np.float32)
+    poligonos[:, :, :triangulos.shape[2]] = triangulos
+    quant = np.full(quant_tri, 3)
+
+    for eixo, sinal in planos_recorte:
+        d = np.float32(sinal) * poligonos[..., eixo] + np.float32(1.0)
+        colunas = np.arange(poligonos.shape[1])
+        valido = colunas < quant[:, None]
+        if not np.any(valido & (d < 0)):
+            continue
+
+        # Arestas na ordem do Mesa: do vertice k ao k + 1, e do ultimo ao primeiro
+        seguinte = np.where(colunas + 1 < quant[:, None], colunas + 1, 0)
+        v_seguinte = np.take_along_axis(poligonos, seguinte[..., None], axis=1)
+        d_seguinte = np.take_along_axis(d, seguinte, axis=1)
+
+        # Cada aresta emite o seu primeiro vertice, se dentro, e o ponto em que cruza o plano
+        mantem = valido & (d >= 0)
+        cruza = valido & (d * d_seguinte <= 0) & (d != d_seguinte)
+
+        sai = d_seguinte < 0
+        v_fora = np.where(sai[..., None], v_seguinte, poligonos)
+        v_dentro = np.where(sai[..., None], poligonos, v_seguinte)
+        d_fora = np.where(sai, d_seguinte, d)
+        d_dentro = np.where(sai, d, d_seguinte)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = np.where(cruza, d_fora / (d_fora - d_dentro), np.float32(0.0))
+        cruzamentos = v_fora + t[..., None] * (v_dentro - v_fora)
+
+        candidatos = np.stack([poligonos, cruzamentos], axis=2).reshape(quant_tri, -1, 3)
+        emite = np.stack([mantem, cruza], axis=2).reshape(quant_tri, -1)
+        quant = emite.sum(axis=1)
+
+        poligono, candidato = np.nonzero(emite)
+        posicao = np.cumsum(emite, axis=1)[poligono, candidato] - 1
+        poligonos = np.zeros((quant_tri, max(int(quant.max()), 3), 3), dtype=np.float32)
+        poligonos[poligono, posicao] = candidatos[poligono, candidato]
+
+    return poligonos, quant
+
+
+def _classifica(A, B, C, triangulos, tile_x, tile_y, lado):
+    '''
+    Classifica os pares (triangulo, tile de lado x lado pixels) pelas funcoes de aresta nos
+    centros dos pixels dos cantos do tile: cheio (todos os pixels dentro das tres arestas)
+    ou parcial (nem cheio, nem inteiramente fora de alguma aresta). Retorna tambem E no
+    centro do primeiro pixel de cada tile: (3, pares).
+    '''
+    a, b = A[:, triangulos], B[:, triangulos]
+    e_canto = a * (tile_x * lado + 0.5) + b * (tile_y * lado + 0.5) + C[:, triangulos]
+    e_max = e_canto + (np.maximum(a, 0) + np.maximum(b, 0)) * (lado - 1)
+    e_min = e_canto + (np.minimum(a, 0) + np.minimum(b, 0)) * (lado - 1)
+
+    cheio = np.all(e_min > 0, axis=0)
+    parcial = ~cheio & np.all(e_max > 0, axis=0)
+    return cheio, parcial, e_canto
+
+
+def _losango(pontos):
+    '''
+    Pixel que contem cada ponto e se o ponto esta dentro do losango |dx| + |dy| < 1/2
+    centrado no pixel (a regiao usada pela regra diamond-exit).
+    '''
+    pixel = np.floor(pontos)
+    dentro = np.abs(pontos - pixel - 0.5).sum(axis=1) < 0.5
+    return pixel.astype(np.int64), dentro
+
+
+def _como_linhas(dados):
+    '''
+    Array com um vertice (ou indice) por linha. Matrizes GLM guardam um vertice por
+    coluna: a memoria e lida na mesma ordem, como em upload.as_array.
+    '''
+    if not isinstance(dados, np.ndarray):
+        try:
+            memoria = memoryview(dados)
+        except TypeError:
+            memoria = None
+        if memoria is not None and not memoria.c_contiguous and memoria.f_contiguous:
+            return np.asarray(memoria).T
+
+    return np.asarray(dados)
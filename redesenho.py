@@ -0,0 +1,71 @@
+import math
+import time
+import OpenGL.GLUT as glut # Criacao de janelas acesso ao teclado
+
+
+class Agendador:
+    '''
+    Redesenho sob demanda: a cena so e desenhada quando algo muda.
+
+    Teclado, mouse ou alteracoes de dados chamam invalida(), que marca a cena como
+    alterada. Varias invalidacoes antes do proximo frame viram um unico
+    glutPostRedisplay, e sem invalidacoes nada e desenhado (a janela fica parada,
+    sem consumir CPU/GPU). O GLUT ainda chama display() quando a janela e exposta
+    ou redimensionada, pois o conteudo precisa ser refeito.
+
+    fps_maximo (opcional) limita a frequencia de redesenho: uma invalidacao que chega
+    antes do intervalo minimo e adiada com glutTimerFunc, e nao descartada.
+
+    Uso:
+        agendador = Agendador(display, fps_maximo=60)
+        glut.glutDisplayFunc(agendador.display)
+        ...
+        agendador.invalida()   # no keyboard(), em vez de chamar display()
+    '''
+
+    def __init__(self, display, fps_maximo = None):
+
+        self.display_cena = display
+        self.intervalo_minimo = 1.0 / fps_maximo if fps_maximo else 0.0
+
+        self.pendente = False # glutPostRedisplay (ou timer) ja agendado
+        self.ultimo_frame = -math.inf
+
+        # invalidacoes: chamadas de invalida(), coalescidas: invalidacoes absorvidas por um
+        # redesenho ja agendado, adiadas: esperaram o limite de fps, frames: display() executados
+        self.contador = {'invalidacoes': 0, 'coalescidas': 0, 'adiadas': 0, 'frames': 0}
+
+    def invalida(self):
+        '''
+        Marca a cena como alterada e agenda um unico redesenho.
+        '''
+        self.contador['invalidacoes'] += 1
+
+        if self.pendente:
+            self.contador['coalescidas'] += 1
+            return
+
+        self.pendente = True
+
+        espera = self.ultimo_frame + self.intervalo_minimo - time.perf_counter()
+        if espera > 0:
+            self.contador['adiadas'] += 1
+            glut.glutTimerFunc(math.ceil(espera * 1000), self._posta, 0)
+        else:
+            glut.glutPostRedisplay()
+
+    def _posta(self, valor):
+
+        # Se a janela ja foi redesenhada por outro motivo (e.g. exposicao), nao repete
+        if self.pendente:
+            glut.glutPostRedisplay()
+
+    def display(self):
+        '''
+        Callback do glutDisplayFunc.
+        '''
+        self.pendente = False
+        self.ultimo_frame = time.perf_counter()
+        self.contador['frames'] += 1
+
+        self.display_cena()
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import arquivo_malha
+
+
+def test_malha_vazia(tmp_path):
+
+    caminho = str(tmp_path / 'vazia.malha')
+    arquivo_malha.write_malha(caminho, np.empty((0, 3), dtype=np.float32), np.empty(0, dtype=np.uint32))
+
+    malha = arquivo_malha.load_malha(caminho)
+
+    assert malha.vertices.shape == (0, 3)
+    assert malha.indices.shape == (0,)
+
+
+def test_malha_com_indices(tmp_path):
+
+    caminho = str(tmp_path / 'triangulo.malha')
+    vertices = np.arange(9, dtype=np.float32).reshape(3, 3)
+    arquivo_malha.write_malha(caminho, vertices, [0, 1, 2])
+
+    malha = arquivo_malha.load_malha(caminho)
+
+    np.testing.assert_array_equal(malha.vertices, vertices)
+    np.testing.assert_array_equal(malha.indices, [0, 1, 2])
+    assert malha.indices.dtype == np.uint16
+
+
+def test_nome_de_atributo_longo(tmp_path):
+
+    caminho = str(tmp_path / 'longo.malha')
+
+    with pytest.raises(ValueError):
+        arquivo_malha.write_malha(caminho, np.zeros((1, 2), dtype=np.float32), layout=(('coordenada_de_textura', 2),))
+
+    assert not os.path.exists(caminho)
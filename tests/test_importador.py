@@ -0,0 +1,44 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import importador
+
+
+def _ply_binario(caminho, quant_faces, faces):
+
+    cabecalho = ('ply\nformat binary_little_endian 1.0\n'
+                 'element vertex 3\nproperty float x\nproperty float y\nproperty float z\n'
+                 'element face {}\nproperty list uchar int vertex_indices\nend_header\n').format(quant_faces)
+    with open(caminho, 'wb') as arquivo:
+        arquivo.write(cabecalho.encode('ascii'))
+        arquivo.write(np.eye(3, dtype='<f4').tobytes())
+        arquivo.write(faces)
+
+
+def test_ply_binario_completo(tmp_path):
+
+    caminho = str(tmp_path / 'triangulo.ply')
+    _ply_binario(caminho, 1, b'\x03' + np.array([0, 1, 2], dtype='<i4').tobytes())
+
+    blocos = list(importador.read_ply(caminho))
+    indices = np.concatenate([i for _, i in blocos])
+
+    np.testing.assert_array_equal(indices, [0, 1, 2])
+
+
+@pytest.mark.parametrize('faces', [
+    b'\x03' + np.array([0, 1, 2], dtype='<i4').tobytes(), # falta a segunda face inteira
+    b'\x03' + np.array([0, 1], dtype='<i4').tobytes(),    # face cortada no meio
+], ids=['sem_face', 'face_cortada'])
+def test_ply_binario_truncado(tmp_path, faces):
+
+    caminho = str(tmp_path / 'truncado.ply')
+    _ply_binario(caminho, 2, faces)
+
+    with pytest.raises(ValueError, match='arquivo PLY truncado'):
+        list(importador.read_ply(caminho))
@@ -0,0 +1,48 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lote
+
+
+GL_TRIANGLES = 0x0004
+
+
+def test_formas_com_componentes_diferentes():
+
+    geometria = lote.LoteGeometria()
+    geometria.add(np.zeros((3, 3), dtype=np.float32), GL_TRIANGLES, 1)
+
+    with pytest.raises(ValueError):
+        geometria.add(np.zeros((3, 2), dtype=np.float32), GL_TRIANGLES, 1)
+
+    assert len(geometria.formas) == 1
+
+
+def test_formas_com_mesmos_componentes():
+
+    geometria = lote.LoteGeometria()
+    geometria.add(np.zeros((3, 2), dtype=np.float32), GL_TRIANGLES, 1)
+    geometria.add([[0.0, 0.0], [1.0, 0.0], [0.0, 1.0]], GL_TRIANGLES, 1)
+
+    assert geometria.componentes == 2
+
+
+def test_ordem_desenho_sem_camada():
+
+    # Sem camada a ordem de add() e preservada, mesmo com programs intercalados
+    assert lote.ordem_desenho([None, None, None], [1, 2, 1]) == [0, 1, 2]
+
+
+def test_ordem_desenho_agrupa_por_estado_na_camada():
+
+    camadas = [None, 0, 0, 0, 0, None, 1, 1]
+    estados = [2, 1, 2, 1, 2, 1, 2, 1]
+
+    # Dentro de cada camada: estados na ordem da primeira forma, ordem original no mesmo estado
+    assert lote.ordem_desenho(camadas, estados) == [0, 1, 3, 2, 4, 5, 6, 7]
+
@@ -0,0 +1,67 @@
+import os
+import sys
+import json
+import subprocess
+
+import numpy as np
+import pytest
+
+diretorio = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, diretorio)
+
+import rasterizador
+
+
+def _cena_aleatoria(quant, semente):
+    '''
+    Triangulos aleatorios, varios saindo da tela, cada um com uma cor.
+    '''
+    gerador = np.random.default_rng(semente)
+    formas = []
+    for _ in range(quant):
+        vertices = np.c_[gerador.uniform(-1.2, 1.2, (3, 2)).round(3), np.zeros(3)]
+        cor = list(gerador.integers(0, 256, 3) / 255.0) + [1.0]
+        formas.append({'shader': 'cor', 'vertices': vertices.tolist(), 'cor': cor})
+
+    return {
+        'atributos': {'posicao': 'position', 'cor': 'vCor'},
+        'shaders': {'cor': {
+            'vertex': ['in vec3 position;', 'in vec4 vCor;', 'out vec4 cor;',
+                       'void main() { gl_Position = vec4(position, 1.0); cor = vCor; }'],
+            'fragment': ['in vec4 cor;', 'out vec4 FragColor;', 'void main() { FragColor = cor; }'],
+        }},
+        'formas': formas,
+    }
+
+
+def test_triangulo_maior_que_a_tela():
+
+    raster = rasterizador.Rasterizador(33, 21)
+    raster.clear((0.0, 0.0, 0.0, 1.0))
+    raster.draw(np.array([[-1.0, -1.0], [3.0, -1.0], [-1.0, 3.0]], dtype=np.float32), rasterizador.TRIANGLES, (1.0, 0.0, 0.0, 1.0))
+
+    assert np.all(raster.read_pixels() == [255, 0, 0, 255])
+
+
+def test_igual_ao_driver(tmp_path):
+    '''
+    Mesma imagem do OpenGL (offscreen EGL) em uma cena com triangulos recortados pela tela.
+    O driver roda em outro processo, que escolhe a plataforma EGL antes de importar o OpenGL.
+    '''
+    import motor
+    import offscreen
+
+    caminho = str(tmp_path / 'triangulos.json')
+    with open(caminho, 'w') as arquivo:
+        json.dump(_cena_aleatoria(300, 1), arquivo)
+
+    saida = str(tmp_path / 'driver.npy')
+    processo = subprocess.run([sys.executable, os.path.join(diretorio, 'offscreen.py'), caminho,
+                               '--largura', '333', '--altura', '217', '--saida', saida],
+                              capture_output=True, text=True, env=dict(os.environ, PYOPENGL_PLATFORM='egl'))
+    if processo.returncode != 0:
+        pytest.skip('OpenGL offscreen (EGL) indisponivel')
+
+    software = offscreen.render_frames(motor.load_cena(caminho), 1, 333, 217, backend='software')
+
+    np.testing.assert_array_equal(software, np.load(saida))
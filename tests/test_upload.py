@@ -0,0 +1,63 @@
+import os
+import sys
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import upload
+
+
+def test_bytes_reinterpretados_como_float32():
+
+    valores = np.array([1.0, -2.5, 3.25], dtype=np.float32)
+
+    array = upload.as_array(valores.tobytes())
+
+    assert array.dtype == np.float32
+    np.testing.assert_array_equal(array, valores)
+
+
+def test_bytes_com_tamanho_invalido():
+
+    with pytest.raises(ValueError):
+        upload.as_array(b'abc')
+
+
+def test_bytes_nao_contiguos():
+
+    valores = np.array([1.0, -2.5, 3.25], dtype=np.float32)
+    # Os bytes dos valores intercalados com bytes de preenchimento: memoryview com passo 2
+    intercalados = np.zeros(2 * valores.nbytes, dtype=np.uint8)
+    intercalados[::2] = np.frombuffer(valores.tobytes(), dtype=np.uint8)
+    memoria = memoryview(intercalados.tobytes())[::2]
+    assert not memoria.c_contiguous
+
+    upload.zera_contador()
+    array = upload.as_array(memoria)
+
+    assert array.dtype == np.float32
+    np.testing.assert_array_equal(array, valores)
+    assert upload.contador['bytes_copiados'] == valores.nbytes
+
+
+def test_shared_memory_sem_copia():
+
+    memoria = shared_memory.SharedMemory(create=True, size=6 * 4)
+    try:
+        origem = np.ndarray((2, 3), dtype=np.float32, buffer=memoria.buf)
+        origem[...] = [[0.0, 1.0, 2.0], [3.0, 4.0, 5.0]]
+
+        upload.zera_contador()
+        array = upload.as_array(memoria.buf)
+
+        np.testing.assert_array_equal(array.reshape(2, 3), origem)
+        assert np.shares_memory(array, origem)
+        assert upload.contador['bytes_copiados'] == 0
+
+        del array, origem # o mapeamento so fecha sem views abertas
+    finally:
+        memoria.close()
+        memoria.unlink()
@@ -0,0 +1,84 @@
+import numpy as np
+import OpenGL.GL as gl # Funcoes da API OpenGL
+
+
+# Bytes enviados para a GPU (glBufferData/glBufferSubData) e bytes que precisaram
+# ser copiados/convertidos antes do envio (tipo diferente, lista Python, memoria nao contigua)
+contador = {'bytes_enviados': 0, 'bytes_copiados': 0}
+
+
+def zera_contador():
+
+    contador['bytes_enviados'] = 0
+    contador['bytes_copiados'] = 0
+
+
+def as_array(dados, dtype = np.float32):
+    '''
+    Retorna os dados como array NumPy contiguo do tipo dtype, sem copia sempre que possivel.
+
+    Aceita arrays NumPy e qualquer objeto com buffer protocol (memoryview, array.array,
+    bytes, matrizes e vetores glm). Objetos com buffer protocol sao enviados na ordem em que
+    estao na memoria: uma glm.mat3(v1, v2, v3) guarda as colunas (vertices) em sequencia,
+    exatamente o layout esperado no VBO.
+    Buffers de bytes sem tipo (bytes, bytearray, shared_memory.buf) sao reinterpretados
+    como dtype, resultando em um array de uma dimensao; se nao forem contiguos, os bytes
+    sao antes copiados para um buffer contiguo.
+    Listas, tipos diferentes de dtype e memoria nao contigua sao convertidos (copiados).
+    '''
+    if not isinstance(dados, np.ndarray):
+        try:
+            memoria = memoryview(dados)
+        except TypeError:
+            memoria = None
+
+        if memoria is not None and memoria.format in ('B', 'b', 'c'):
+            # Bytes crus: os valores ja estao no formato dtype, nao sao 1 valor por byte
+            if not memoria.c_contiguous:
+                # Bytes com passo (e.g. memoryview fatiada): uma copia dos bytes, na ordem da
+                # memoria, em vez da conversao de cada byte em um valor de dtype
+                memoria = memoryview(memoria.tobytes(order='A'))
+                contador['bytes_copiados'] += memoria.nbytes
+            itemsize = np.dtype(dtype).itemsize
+            if memoria.nbytes % itemsize != 0:
+                raise ValueError(f'Buffer de {memoria.nbytes} bytes nao e multiplo do tamanho de {np.dtype(dtype).name} ({itemsize} bytes).')
+            return np.frombuffer(memoria, dtype=dtype)
+
+        if memoria is not None and (memoria.c_contiguous or memoria.f_contiguous):
+            array = np.asarray(memoria)
+            # Buffer em ordem de colunas (glm): a transposta le a memoria na mesma ordem, sem copia
+            dados = array.T if not memoria.c_contiguous else array
+
+    if isinstance(dados, np.ndarray) and dados.dtype == dtype and dados.flags['C_CONTIGUOUS']:
+        return dados
+
+    array = np.ascontiguousarray(dados, dtype=dtype)
+    contador['bytes_copiados'] += array.nbytes
+
+    return array
+
+
+def buffer_data(target, dados, usage, dtype = np.float32):
+    '''
+    glBufferData com os dados enviados diretamente da memoria de origem quando possivel.
+    Retorna o array enviado.
+    '''
+    array = as_array(dados, dtype)
+
+    gl.glBufferData(target, array.nbytes, array, usage)
+    contador['bytes_enviados'] += array.nbytes
+
+    return array
+
+
+def buffer_sub_data(target, deslocamento, dados, dtype = np.float32):
+    '''
+    glBufferSubData a partir de deslocamento (em bytes), sem copia quando possivel.
+    Retorna o array enviado.
+    '''
+    array = as_array(dados, dtype)
+
+    gl.glBufferSubData(target, deslocamento, array.nbytes, array)
+    contador['bytes_enviados'] += array.nbytes
+
+    return array